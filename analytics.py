@@ -0,0 +1,533 @@
+"""
+需求單分析快照
+
+將需求單表格載入為欄位式的記憶體快照（每個欄位一個 array），
+供報表計算各員工的處理時間分佈與待辦數量，而不必每次都掃描資料庫。
+
+快照透過需求單變更記錄（requirement_changes）增量更新：
+只重新載入有變更的需求單，無法確定變更範圍時才整個重新載入。
+報表查詢使用依員工與優先級分組、依建立時間排序的索引（快照變更後於下次查詢時重建），
+時間窗與逾期以 bisect 找出範圍，不必每次查詢都逐筆掃描快照。
+已歸檔的需求單（requirements_archive）同樣包含在快照中，歸檔不會改變報表結果。
+資料庫中的時間為本地時間，載入時以 'utc' 修飾詞轉換為 epoch 秒，可直接與 time.time() 比較。
+"""
+
+import bisect
+import math
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+from sqlite3 import Error
+
+from database import create_tables, get_requirement_changes
+
+# 狀態與優先級以小整數儲存
+STATUS_CODES = {
+    'not_dispatched': 0,
+    'pending': 1,
+    'submitted': 2,
+    'reviewing': 3,
+    'completed': 4,
+    'invalid': 5,
+}
+STATUS_REMOVED = -1  # 已從資料庫移除（例如取消預約）的列，等待壓縮
+PRIORITY_CODES = {'normal': 0, 'urgent': 1}
+
+# 未完成的狀態（計入待辦）
+OPEN_STATUSES = frozenset((STATUS_CODES['pending'], STATUS_CODES['submitted'], STATUS_CODES['reviewing']))
+
+# 增量更新時每次查詢的ID數量上限（SQLite 舊版本的參數上限為 999）
+_REFRESH_CHUNK = 500
+
+_SNAPSHOT_COLUMNS = '''
+    SELECT id, assignee_id, status, priority, is_dispatched, is_deleted,
+           CAST(strftime('%s', created_at, 'utc') AS REAL),
+           CAST(strftime('%s', completed_at, 'utc') AS REAL),
+           CAST(strftime('%s', approved_at, 'utc') AS REAL)
+    FROM (
+        SELECT id, assignee_id, status, priority, is_dispatched, is_deleted,
+               created_at, completed_at, approved_at
+        FROM requirements
+        UNION ALL
+        SELECT id, assignee_id, status, priority, is_dispatched, is_deleted,
+               created_at, completed_at, approved_at
+        FROM requirements_archive
+    )
+'''
+
+NAN = float('nan')
+
+# 處理時間直方圖的分桶：以 1 秒為起點、每桶放大 5%，百分位數的相對誤差約在 2.5% 以內
+_HISTOGRAM_GROWTH = 1.05
+_LOG_GROWTH = math.log(_HISTOGRAM_GROWTH)
+
+# 分組索引每隔此筆數保存一次累計直方圖，時間窗查詢只需另外計算兩端不滿半段的部分
+_INDEX_BLOCK = 4096
+_NO_BUCKET = -2  # 沒有審核時間的需求單
+
+def _bucket_of(seconds):
+    """時間長度所屬的直方圖分桶（小於 1 秒為 -1）"""
+    return int(math.log(seconds) / _LOG_GROWTH) if seconds >= 1 else -1
+
+def percentile(sorted_values, pct):
+    """計算已排序數列的百分位數（最近排名法）
+
+    Args:
+        sorted_values: 已排序的數列
+        pct: 百分位（0-100）
+
+    Returns:
+        float: 百分位數，數列為空時返回 None
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, int(math.ceil(pct / 100.0 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+def summarize(values, percentiles=(50, 95)):
+    """計算數列的筆數、平均值與百分位數
+
+    Args:
+        values: 數值列表（會被就地排序）
+        percentiles: 要計算的百分位
+
+    Returns:
+        dict: {'count': 筆數, 'mean': 平均值, 'p50': ..., 'p95': ...}
+    """
+    values.sort()
+    result = {
+        'count': len(values),
+        'mean': sum(values) / len(values) if values else None,
+    }
+    for pct in percentiles:
+        result[f'p{pct}'] = percentile(values, pct)
+    return result
+
+class LatencyHistogram:
+    """以對數分桶累計時間長度的直方圖
+
+    不保存個別數值，記憶體用量與資料筆數無關，
+    適合在單次掃描中同時累計多個分組的時間分佈。
+    """
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, seconds):
+        """加入一筆時間長度（秒）"""
+        bucket = _bucket_of(seconds)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+
+    def merge(self, other):
+        """加入另一個直方圖的內容"""
+        buckets = self.buckets
+        for bucket, count in other.buckets.items():
+            buckets[bucket] = buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+
+    def percentile(self, pct):
+        """估算百分位數（取所在分桶的幾何中點）
+
+        Args:
+            pct: 百分位（0-100）
+
+        Returns:
+            float: 百分位數，沒有資料時返回 None
+        """
+        if not self.count:
+            return None
+        rank = max(1, int(math.ceil(pct / 100.0 * self.count)))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                if bucket < 0:
+                    return 0.0
+                return _HISTOGRAM_GROWTH ** (bucket + 0.5)
+        return None
+
+    def summary(self, percentiles=(50, 95)):
+        """返回筆數、平均值與百分位數
+
+        Returns:
+            dict: {'count': 筆數, 'mean': 平均值, 'p50': ..., 'p95': ...}
+        """
+        result = {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+        }
+        for pct in percentiles:
+            result[f'p{pct}'] = self.percentile(pct)
+        return result
+
+class _CompletedSeries:
+    """一個分組（員工與優先級）中已完成的需求單，依建立時間排序
+
+    處理時間、審核時間與其直方圖分桶與建立時間對齊保存，並每隔 _INDEX_BLOCK 筆
+    保存一次累計的分桶數量與總和。時間窗以 bisect 找出範圍，直方圖由最接近兩端的
+    累計值相減，再以 Counter 補上或扣除兩端不滿半段的部分，不必逐筆處理。
+    """
+
+    def __init__(self, rows):
+        rows.sort()
+        self.created = array('d', (row[0] for row in rows))
+        self.turnaround = array('d', (row[1] for row in rows))
+        # 沒有審核時間的需求單以 0 秒與 _NO_BUCKET 表示，不影響總和
+        self.review = array('d', (row[2] if row[2] >= 0 else 0.0 for row in rows))
+        self.turnaround_buckets = array('h', (_bucket_of(row[1]) for row in rows))
+        self.review_buckets = array('h', (_bucket_of(row[2]) if row[2] >= 0 else _NO_BUCKET
+                                          for row in rows))
+        self.sorted_turnaround = array('d', sorted(self.turnaround))
+
+        # 累計值: (位置, ((處理時間分桶數量, 總和), (審核時間分桶數量, 總和)))，
+        # 第 i 個包含前 i * _INDEX_BLOCK 筆，最後一個包含全部
+        self._checkpoints = []
+        counts = (Counter(), Counter())
+        totals = [0.0, 0.0]
+        previous = 0
+        for bound in list(range(0, len(rows), _INDEX_BLOCK)) + [len(rows)]:
+            for index, (values, buckets) in enumerate(self._columns()):
+                counts[index].update(buckets[previous:bound])
+                totals[index] += sum(values[previous:bound])
+            previous = bound
+            self._checkpoints.append((bound, tuple((Counter(counts[index]), totals[index])
+                                                   for index in range(2))))
+
+    def __len__(self):
+        return len(self.created)
+
+    def _columns(self):
+        return ((self.turnaround, self.turnaround_buckets), (self.review, self.review_buckets))
+
+    def window(self, low, high):
+        """返回建立時間在 [low, high) 之間的位置範圍"""
+        start = 0 if low == -math.inf else bisect.bisect_left(self.created, low)
+        end = len(self.created) if high == math.inf else bisect.bisect_left(self.created, high)
+        return start, max(start, end)
+
+    def _nearest(self, pos):
+        return self._checkpoints[min(int(pos / _INDEX_BLOCK + 0.5), len(self._checkpoints) - 1)]
+
+    def histograms(self, low, high):
+        """計算時間窗內的處理時間與審核時間直方圖
+
+        Returns:
+            tuple: (處理時間 LatencyHistogram, 審核時間 LatencyHistogram)
+        """
+        start, end = self.window(low, high)
+        first, first_totals = self._nearest(start)
+        last, last_totals = self._nearest(end)
+        result = []
+        for index, (values, buckets) in enumerate(self._columns()):
+            counts = Counter(last_totals[index][0])
+            counts.subtract(first_totals[index][0])
+            total = last_totals[index][1] - first_totals[index][1]
+
+            def adjust(begin, stop, sign):
+                # 補上或扣除累計值的位置與實際範圍之間的差額（範圍為空時不做任何事）
+                if sign > 0:
+                    counts.update(buckets[begin:stop])
+                else:
+                    counts.subtract(buckets[begin:stop])
+                return sign * sum(values[begin:stop])
+
+            total += (adjust(start, first, 1) + adjust(first, start, -1)
+                      + adjust(last, end, 1) + adjust(end, last, -1))
+            counts.pop(_NO_BUCKET, None)
+            histogram = LatencyHistogram()
+            histogram.buckets = {bucket: count for bucket, count in counts.items() if count}
+            histogram.count = sum(histogram.buckets.values())
+            histogram.total = total
+            result.append(histogram)
+        return tuple(result)
+
+class _SnapshotIndex:
+    """依員工與優先級分組的快照索引，快照有變更後於下次查詢時重建
+
+    只包含已發派且未刪除的需求單。
+    """
+
+    def __init__(self, snapshot):
+        completed = {}
+        open_created = {}
+        open_counts = {}
+        staff_ids = set()
+        for assignee_id, status, priority, dispatched, deleted, created, completed_at, approved in zip(
+                snapshot.assignee_ids, snapshot.status, snapshot.priority, snapshot.is_dispatched,
+                snapshot.is_deleted, snapshot.created, snapshot.completed, snapshot.approved):
+            if deleted or not dispatched or status == STATUS_REMOVED:
+                continue
+            staff_ids.add(assignee_id)
+            key = (assignee_id, priority)
+            if status in OPEN_STATUSES:
+                open_counts[key] = open_counts.get(key, 0) + 1
+                # NaN 無法排序，沒有建立時間的需求單只計入數量
+                if created == created:
+                    open_created.setdefault(key, []).append(created)
+            # NaN 的比較結果永遠為 False，沒有完成時間的需求單會被略過
+            if completed_at >= created:
+                review = approved - completed_at if approved >= completed_at else NAN
+                completed.setdefault(key, []).append((created, completed_at - created, review))
+
+        self.staff_ids = staff_ids
+        self.completed = {key: _CompletedSeries(rows) for key, rows in completed.items()}
+        self.open_created = {key: array('d', sorted(values)) for key, values in open_created.items()}
+        self.open_counts = open_counts
+
+class RequirementSnapshot:
+    """需求單欄位式快照
+
+    每個欄位以 array 儲存，同一位置代表同一筆需求單；
+    時間以 epoch 秒儲存，沒有值時為 NaN。
+    """
+
+    def __init__(self):
+        self.seq = None
+        self._index = None
+        self._clear()
+
+    def _clear(self):
+        self.ids = array('q')
+        self.assignee_ids = array('q')
+        self.status = array('b')
+        self.priority = array('b')
+        self.is_dispatched = array('b')
+        self.is_deleted = array('b')
+        self.created = array('d')
+        self.completed = array('d')
+        self.approved = array('d')
+        self._positions = {}
+        self._removed = 0
+        self._index = None
+
+    def __len__(self):
+        return len(self.ids) - self._removed
+
+    def _columns(self):
+        return (self.ids, self.assignee_ids, self.status, self.priority,
+                self.is_dispatched, self.is_deleted, self.created, self.completed,
+                self.approved)
+
+    @staticmethod
+    def _encode(row):
+        """將查詢結果轉換為各欄位的值"""
+        (req_id, assignee_id, status, priority, is_dispatched, is_deleted,
+         created, completed, approved) = row
+        return (
+            req_id,
+            assignee_id,
+            STATUS_CODES.get(status, STATUS_REMOVED),
+            PRIORITY_CODES.get(priority, 0),
+            1 if is_dispatched else 0,
+            1 if is_deleted else 0,
+            NAN if created is None else created,
+            NAN if completed is None else completed,
+            NAN if approved is None else approved,
+        )
+
+    def _append(self, row):
+        values = self._encode(row)
+        self._positions[values[0]] = len(self.ids)
+        for column, value in zip(self._columns(), values):
+            column.append(value)
+
+    def _update(self, pos, row):
+        for column, value in zip(self._columns(), self._encode(row)):
+            column[pos] = value
+
+    def _remove(self, req_id):
+        pos = self._positions.pop(req_id, None)
+        if pos is not None and self.status[pos] != STATUS_REMOVED:
+            self.status[pos] = STATUS_REMOVED
+            self._removed += 1
+
+    def _compact(self):
+        """移除已標記刪除的列"""
+        keep = [pos for pos, code in enumerate(self.status) if code != STATUS_REMOVED]
+        columns = self._columns()
+        for column in columns:
+            compacted = array(column.typecode, (column[pos] for pos in keep))
+            column[:] = compacted
+        self._positions = {req_id: pos for pos, req_id in enumerate(self.ids)}
+        self._removed = 0
+
+    def load(self, conn):
+        """從資料庫完整載入快照"""
+        seq, _ = get_requirement_changes(conn, None)
+        cursor = conn.cursor()
+        cursor.execute(_SNAPSHOT_COLUMNS + " ORDER BY id")
+        self._clear()
+        for row in cursor:
+            self._append(row)
+        self.seq = seq
+
+    def refresh(self, conn):
+        """依變更記錄增量更新快照
+
+        Returns:
+            int: 重新載入的需求單筆數
+        """
+        current_seq, changed_ids = get_requirement_changes(conn, self.seq)
+        if changed_ids is None:
+            self.load(conn)
+            return len(self)
+        if not changed_ids:
+            return 0
+
+        changed = sorted(changed_ids)
+        cursor = conn.cursor()
+        for start in range(0, len(changed), _REFRESH_CHUNK):
+            chunk = changed[start:start + _REFRESH_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(_SNAPSHOT_COLUMNS + f" WHERE id IN ({placeholders})", chunk)
+            found = set()
+            for row in cursor.fetchall():
+                found.add(row[0])
+                pos = self._positions.get(row[0])
+                if pos is None:
+                    self._append(row)
+                else:
+                    self._update(pos, row)
+            for req_id in chunk:
+                if req_id not in found:
+                    self._remove(req_id)
+
+        if self._removed > len(self.ids) // 2:
+            self._compact()
+        self._index = None
+        self.seq = current_seq
+        return len(changed)
+
+    def _get_index(self):
+        index = self._index
+        if index is None:
+            index = self._index = _SnapshotIndex(self)
+        return index
+
+    def turnaround_by_staff(self, since=None, until=None, percentiles=(50, 95)):
+        """計算各員工的處理時間分佈（建立到提交完成，單位為秒）
+
+        Args:
+            since: 只計算建立時間不早於此 epoch 秒的需求單，None 表示不限
+            until: 只計算建立時間早於此 epoch 秒的需求單，None 表示不限
+            percentiles: 要計算的百分位
+
+        Returns:
+            dict: {員工ID: {'count', 'mean', 'p50', 'p95', ...}}
+        """
+        low = -math.inf if since is None else since
+        high = math.inf if until is None else until
+        groups = {}
+        for (staff_id, _), series in self._get_index().completed.items():
+            start, end = series.window(low, high)
+            if start == end:
+                continue
+            if end - start == len(series):
+                # 不限時間窗時直接使用預先排序的處理時間
+                values = series.sorted_turnaround.tolist()
+            else:
+                values = series.turnaround[start:end].tolist()
+            groups.setdefault(staff_id, []).extend(values)
+        # 各優先級的數列已排序或為時間窗內的片段，合併後的排序成本接近線性
+        return {staff_id: summarize(values, percentiles) for staff_id, values in groups.items()}
+
+    def backlog_by_staff(self):
+        """計算各員工目前未完成的需求單數量
+
+        Returns:
+            dict: {員工ID: {'open': 未完成總數, 'urgent': 其中緊急的數量}}
+        """
+        backlog = {}
+        for (staff_id, priority), count in self._get_index().open_counts.items():
+            counts = backlog.get(staff_id)
+            if counts is None:
+                counts = backlog[staff_id] = {'open': 0, 'urgent': 0}
+            counts['open'] += count
+            counts['urgent'] += count * priority
+        return backlog
+
+    def sla_report(self, since=None, until=None, overdue_after=None, now=None):
+        """計算服務水準報表
+
+        處理時間為建立到員工提交完成；審核時間為員工提交到管理員審核通過。
+        兩者以直方圖累計，百分位數為分桶估算的近似值（相對誤差約 2.5% 以內），
+        需要精確值時使用 turnaround_by_staff()。
+        每個分組以預先建立的索引計算：時間窗與逾期數量以 bisect 找出範圍，
+        不必逐筆掃描快照。
+
+        Args:
+            since: 只統計建立時間不早於此 epoch 秒的需求單，None 表示不限
+            until: 只統計建立時間早於此 epoch 秒的需求單，None 表示不限
+            overdue_after: 未完成超過此秒數即視為逾期，None 表示不計算逾期
+            now: 目前時間的 epoch 秒
+
+        Returns:
+            dict: {
+                'staff': {員工ID: {'turnaround', 'review': LatencyHistogram,
+                                   'open', 'urgent', 'overdue': 數量}},
+                'priority': {優先級代碼: {'turnaround', 'review': LatencyHistogram}},
+                'total': {'turnaround', 'review': LatencyHistogram,
+                          'open', 'urgent', 'overdue': 數量},
+            }
+        """
+        low = -math.inf if since is None else since
+        high = math.inf if until is None else until
+        overdue_before = -math.inf if overdue_after is None else now - overdue_after
+
+        def new_group():
+            return {'turnaround': LatencyHistogram(), 'review': LatencyHistogram(),
+                    'open': 0, 'urgent': 0, 'overdue': 0}
+
+        index = self._get_index()
+        staff = {staff_id: new_group() for staff_id in index.staff_ids}
+        by_priority = {code: new_group() for code in PRIORITY_CODES.values()}
+        total = new_group()
+
+        # 待辦與逾期反映目前狀態，不受時間窗限制
+        for (staff_id, priority), count in index.open_counts.items():
+            created = index.open_created.get((staff_id, priority))
+            overdue = bisect.bisect_left(created, overdue_before) if created else 0
+            for target in (staff[staff_id], by_priority[priority], total):
+                target['open'] += count
+                target['urgent'] += count * priority
+                target['overdue'] += overdue
+
+        for (staff_id, priority), series in index.completed.items():
+            turnaround, review = series.histograms(low, high)
+            for target in (staff[staff_id], by_priority[priority], total):
+                target['turnaround'].merge(turnaround)
+                target['review'].merge(review)
+
+        return {'staff': staff, 'priority': by_priority, 'total': total}
+
+# 進程內共用的快照
+_snapshot = RequirementSnapshot()
+_snapshot_lock = threading.Lock()
+
+def get_snapshot(conn):
+    """獲取已同步到最新變更的共用快照
+
+    Args:
+        conn: 數據庫連接
+
+    Returns:
+        RequirementSnapshot: 需求單快照，載入失敗時返回 None
+    """
+    try:
+        with _snapshot_lock:
+            try:
+                _snapshot.refresh(conn)
+            except sqlite3.OperationalError:
+                # 舊版資料庫沒有歸檔表格
+                create_tables(conn)
+                _snapshot.refresh(conn)
+            return _snapshot
+    except Error as e:
+        print(f"載入需求單分析快照時發生錯誤: {e}")
+        return None
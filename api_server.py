@@ -0,0 +1,622 @@
+"""
+需求管理系統 HTTP/JSON API 伺服器
+
+以 asyncio 處理連線與 HTTP/1.1 協定（支援 keep-alive 與管線化請求），
+資料庫操作則交給固定數量的工作執行緒，每個執行緒持有自己的 SQLite 連接，
+避免阻塞事件迴圈。修改操作在驗證後交給單一寫入執行緒（write_queue.WriterService），
+同時到達的寫入以群組提交合併為一個交易；等待提交期間不佔用工作執行緒。
+
+認證使用 HTTP Basic（使用者名稱與密碼與 CLI 登入相同）或 Bearer 權杖。
+成功的密碼驗證結果會短暫快取，同一組帳號密碼在有效期間內的後續請求不必重新計算密碼雜湊；
+權杖由 POST /token 簽發，格式與 CLI 會話相同（見 tokens 模組），驗證時不需要計算密碼雜湊。
+
+列表與詳情回應帶有以需求單變更序號與請求的資源產生的 ETag：客戶端以 If-None-Match
+重新請求時，若資料沒有變更就直接回應 304，不會執行任何需求單查詢；
+序列化後的回應也會保留在伺服器端快取中，直到有任何寫入使變更序號前進。
+
+端點:
+    GET  /health                          健康檢查（不需認證）
+    POST /token                           簽發 Bearer 權杖
+    GET  /requirements                    需求單列表（?status=...，?archived=1 包含已歸檔）
+    GET  /requirements/<id>               需求單詳情
+    POST /requirements                    建立需求單（管理員）
+    POST /requirements/<id>/submit        提交需求單（員工）
+    POST /requirements/<id>/approve       審核通過（管理員）
+    POST /requirements/<id>/reject        審核拒絕（管理員）
+    GET  /stats                           系統統計（管理員）
+    GET  /metrics                         Prometheus 文字格式的營運指標（不需認證）
+"""
+
+import asyncio
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from sqlite3 import Error, OperationalError
+from urllib.parse import urlsplit, parse_qs
+
+from database import (
+    create_connection, get_user_by_username, get_user_requirements,
+    get_admin_dispatched_requirements, get_requirement_detail, create_requirement,
+    submit_requirement, approve_requirement, reject_requirement,
+    get_requirement_stats, get_all_admins, get_all_staff, get_change_sequence
+)
+from assignment import choose_assignee
+from write_queue import WriterService
+from credentials import VerificationCache
+from rate_limit import LoginRateLimiter, login_keys, SYNC_INTERVAL
+from tokens import get_token_secret, issue_token, verify_token, user_claims
+from user_cache import get_user_by_id
+from metrics import API_REQUEST_SECONDS, render as render_metrics
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+KEEP_ALIVE_TIMEOUT = 15  # 閒置連線保留秒數
+RESPONSE_CACHE_SIZE = 1024  # 伺服器端快取的回應數量上限
+AUTH_CACHE_TTL = 300  # 成功驗證的密碼保留秒數，期間內不必重新計算密碼雜湊
+TOKEN_TTL = 3600  # /token 簽發的權杖有效秒數
+LISTEN_BACKLOG = 1024  # 尚未接受的連線佇列長度（預設 100，大量同時連線時會被丟棄重傳）
+
+STATUS_TEXT = {
+    200: 'OK',
+    201: 'Created',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    401: 'Unauthorized',
+    403: 'Forbidden',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    429: 'Too Many Requests',
+    500: 'Internal Server Error',
+}
+
+class HTTPError(Exception):
+    """以指定狀態碼回應的錯誤"""
+
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+class Request:
+    """已解析的 HTTP 請求"""
+
+    def __init__(self, method, target, version, headers, body):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        self.body = body
+        parts = urlsplit(target)
+        self.path = parts.path
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.user = None
+        self.params = ()
+        self.route = None  # 對應的路徑樣式（營運指標的標籤，避免以每個需求單編號分開統計）
+        self.client = None  # 用戶端位址
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+    def json(self):
+        """解析 JSON 請求內容，內容為空時返回空字典"""
+        if not self.body:
+            return {}
+        try:
+            data = json.loads(self.body.decode('utf-8'))
+        except (UnicodeDecodeError, ValueError):
+            raise HTTPError(400, "請求內容不是有效的 JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(400, "請求內容必須是 JSON 物件")
+        return data
+
+class Response:
+    """HTTP 回應"""
+
+    def __init__(self, status=200, body=b'', headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    def encode(self, keep_alive):
+        lines = [f"HTTP/1.1 {self.status} {STATUS_TEXT.get(self.status, '')}"]
+        headers = dict(self.headers)
+        headers['Content-Length'] = str(len(self.body))
+        headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+        for name, value in headers.items():
+            lines.append(f"{name}: {value}")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1')
+        return head + self.body
+
+def json_response(data, status=200, headers=None):
+    """建立 JSON 回應"""
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    response_headers = {'Content-Type': 'application/json; charset=utf-8'}
+    if headers:
+        response_headers.update(headers)
+    return Response(status, body, response_headers)
+
+def _record(record):
+    """將查詢記錄轉換為可序列化的字典"""
+    return record._asdict()
+
+def _require_admin(request):
+    if request.user.role != 'admin':
+        raise HTTPError(403, "只有管理員可以執行此操作")
+
+def _load_requirement(conn, req_id, include_archived=False):
+    requirement = get_requirement_detail(conn, req_id, include_archived=include_archived)
+    if not requirement or requirement.is_deleted:
+        raise HTTPError(404, f"找不到ID為 {req_id} 的需求單")
+    return requirement
+
+def _public_detail(requirement):
+    """需求單詳情（不含內部旗標）"""
+    data = _record(requirement)
+    data.pop('is_deleted', None)
+    return data
+
+class ResponseCache:
+    """已序列化回應的 LRU 快取
+
+    每個項目記錄產生時的變更序號，序號不同即視為過期，
+    因此任何寫入（不論來自 API、CLI 或 GUI）都會讓快取自然失效。
+    """
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """返回指定版本的快取回應，沒有或已過期時返回 None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, response):
+        with self._lock:
+            self._entries[key] = (version, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class PendingWrite:
+    """已排入寫入服務、等待提交的修改操作
+
+    處理函數完成驗證後返回此物件，工作執行緒隨即釋放；
+    交易提交後再於工作執行緒中以 complete(conn, 修改結果) 產生回應。
+    """
+
+    def __init__(self, future, complete):
+        self.future = future
+        self.complete = complete
+
+def _etag_matches(header, etag):
+    """檢查 If-None-Match 標頭是否包含指定的 ETag"""
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(',')]
+    return '*' in candidates or etag in candidates or f"W/{etag}" in candidates
+
+class APIServer:
+    """HTTP/JSON API 伺服器
+
+    Args:
+        host: 監聽位址
+        port: 監聽埠號
+        workers: 資料庫工作執行緒數量
+    """
+
+    def __init__(self, host='127.0.0.1', port=8080, workers=4):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self._executor = None
+        self._writer = None
+        self._local = threading.local()
+        self._server = None
+        self._cache = ResponseCache()
+        self._verifier = VerificationCache(ttl=AUTH_CACHE_TTL)
+        self._limiter = LoginRateLimiter(sync_interval=SYNC_INTERVAL)
+        # (方法, 路徑, 處理函數, 是否需要認證, 是否可依變更序號快取)
+        self._routes = [
+            ('GET', re.compile(r'^/health$'), self.handle_health, False, False),
+            ('POST', re.compile(r'^/token$'), self.handle_token, True, False),
+            ('GET', re.compile(r'^/requirements$'), self.handle_list, True, True),
+            ('POST', re.compile(r'^/requirements$'), self.handle_create, True, False),
+            ('GET', re.compile(r'^/requirements/(\d+)$'), self.handle_show, True, True),
+            ('POST', re.compile(r'^/requirements/(\d+)/submit$'), self.handle_submit, True, False),
+            ('POST', re.compile(r'^/requirements/(\d+)/approve$'), self.handle_approve, True, False),
+            ('POST', re.compile(r'^/requirements/(\d+)/reject$'), self.handle_reject, True, False),
+            ('GET', re.compile(r'^/stats$'), self.handle_stats, True, False),
+            ('GET', re.compile(r'^/metrics$'), self.handle_metrics, False, False),
+        ]
+
+    # ---- 工作執行緒 ----
+
+    def _connection(self):
+        """獲取目前工作執行緒專用的資料庫連接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = create_connection()
+            if conn is None:
+                raise HTTPError(500, "無法連接到資料庫")
+            self._local.conn = conn
+        return conn
+
+    def _execute(self, handler, request, authenticate, cacheable):
+        """在工作執行緒中執行請求處理函數"""
+        conn = self._connection()
+        if authenticate:
+            request.user = self.authenticate(conn, request)
+        if not cacheable:
+            return handler(conn, request)
+
+        version = get_change_sequence(conn)
+        if version is None:
+            return handler(conn, request)
+
+        # 回應內容取決於使用者身分與角色、請求的資源（路徑與查詢參數），以及需求單資料的版本；
+        # ETag 包含資源的雜湊，從其他資源複製來的 If-None-Match 不會得到 304
+        user = request.user
+        query = tuple(sorted(request.query.items()))
+        resource = hashlib.blake2s(repr((request.path, query)).encode('utf-8'), digest_size=8).hexdigest()
+        etag = f'"{user.id}-{user.role}-{version}-{resource}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if _etag_matches(request.headers.get('if-none-match'), etag):
+            return Response(304, headers=headers)
+
+        key = (user.id, user.role, request.path, query)
+        response = self._cache.get(key, version)
+        if response is None:
+            response = handler(conn, request)
+            if response.status != 200:
+                return response
+            response.headers.update(headers)
+            self._cache.put(key, version, response)
+        return response
+
+    def _complete(self, complete, result):
+        """在工作執行緒中以修改結果產生回應"""
+        return complete(self._connection(), result)
+
+    def authenticate(self, conn, request):
+        """驗證 HTTP Basic 認證資訊或 Bearer 權杖
+
+        Returns:
+            UserRecord: 通過驗證的使用者
+        """
+        challenge = {'WWW-Authenticate': 'Basic realm="reqmgr"'}
+        header = request.headers.get('authorization', '')
+        scheme, _, credentials = header.partition(' ')
+        if scheme.lower() == 'bearer' and credentials:
+            payload = verify_token(get_token_secret(conn), credentials)
+            # 權杖內容只用來識別使用者，角色以目前的使用者資料為準
+            user = get_user_by_id(conn, payload['uid']) if payload else None
+            if not user:
+                raise HTTPError(401, "權杖無效或已過期", {'WWW-Authenticate': 'Bearer realm="reqmgr"'})
+            return user
+        if scheme.lower() != 'basic' or not credentials:
+            raise HTTPError(401, "需要認證", challenge)
+        try:
+            decoded = base64.b64decode(credentials.strip(), validate=True).decode('utf-8')
+        except (binascii.Error, UnicodeDecodeError):
+            raise HTTPError(401, "認證資訊格式錯誤", challenge)
+        username, _, password = decoded.partition(':')
+
+        # 登入失敗次數過多時直接拒絕，不驗證密碼
+        keys = login_keys(username, request.client)
+        wait = self._limiter.check(conn, keys)
+        if wait:
+            raise HTTPError(429, "登入失敗次數過多，請稍後再試", {'Retry-After': str(wait)})
+
+        user = self._verifier.verify(conn, username, password)
+        if not user:
+            self._limiter.record_failure(conn, keys)
+            raise HTTPError(401, "使用者名稱或密碼錯誤", challenge)
+        # 與 CLI 相同只重設此用戶端對該使用者名稱的失敗次數（同一用戶端可能有多位使用者）
+        self._limiter.record_success(conn, keys[:1])
+        return user
+
+    # ---- 請求處理函數（在工作執行緒中執行） ----
+
+    def handle_health(self, conn, request):
+        return json_response({'status': 'ok'})
+
+    def handle_token(self, conn, request):
+        token, payload = issue_token(get_token_secret(conn), user_claims(request.user), TOKEN_TTL)
+        expires_at = datetime.datetime.fromtimestamp(payload['exp']).strftime("%Y-%m-%d %H:%M:%S")
+        return json_response({'data': {'token': token, 'expires_at': expires_at}})
+
+    def handle_list(self, conn, request):
+        user = request.user
+        archived = request.query.get('archived') in ('1', 'true')
+        if user.role == 'admin':
+            requirements = get_admin_dispatched_requirements(conn, user.id, include_archived=archived)
+        else:
+            requirements = get_user_requirements(conn, user.id, include_archived=archived)
+
+        status = request.query.get('status')
+        data = [_record(req) for req in requirements if not status or req.status == status]
+        return json_response({'data': data, 'total': len(data)})
+
+    def handle_show(self, conn, request):
+        requirement = _load_requirement(conn, int(request.params[0]), include_archived=True)
+        if request.user.role != 'admin' and requirement.assignee_id != request.user.id:
+            raise HTTPError(403, "您沒有權限查看此需求單")
+        return json_response({'data': _public_detail(requirement)})
+
+    def handle_create(self, conn, request):
+        _require_admin(request)
+        data = request.json()
+
+        title = data.get('title')
+        description = data.get('description')
+        assignee = data.get('assignee')
+        priority = data.get('priority', 'normal')
+        if not title or not description or not assignee:
+            raise HTTPError(400, "title、description 與 assignee 為必填欄位")
+        if priority not in ('normal', 'urgent'):
+            raise HTTPError(400, "priority 必須是 normal 或 urgent")
+
+        scheduled_time = None
+        if data.get('scheduled_time'):
+            try:
+                scheduled = datetime.datetime.strptime(data['scheduled_time'], '%Y-%m-%d %H:%M')
+            except (TypeError, ValueError):
+                raise HTTPError(400, "scheduled_time 格式錯誤，請使用 YYYY-MM-DD HH:MM")
+            if scheduled <= datetime.datetime.now():
+                raise HTTPError(400, "預約時間必須是未來時間")
+            scheduled_time = scheduled.strftime("%Y-%m-%d %H:%M:%S")
+
+        if assignee == 'auto':
+            # 最後才選出員工：choose_assignee 會保留負載，直到批次寫入提交後出現在變更記錄中
+            assignee_user = choose_assignee(conn, priority)
+            if not assignee_user:
+                raise HTTPError(409, "沒有可自動分配的員工")
+        else:
+            assignee_user = get_user_by_username(conn, assignee)
+            if not assignee_user:
+                raise HTTPError(400, f"找不到用戶 '{assignee}'")
+
+        def created(conn, req_id):
+            if not req_id:
+                raise HTTPError(500, "創建需求單失敗")
+            return json_response({'data': _public_detail(_load_requirement(conn, req_id))}, status=201)
+
+        future = self._writer.submit(create_requirement, title, description, request.user.id,
+                                     assignee_user.id, priority, scheduled_time)
+        return PendingWrite(future, created)
+
+    def handle_submit(self, conn, request):
+        req_id = int(request.params[0])
+        data = request.json()
+        comment = data.get('comment')
+        if not comment:
+            raise HTTPError(400, "comment 為必填欄位")
+
+        requirement = _load_requirement(conn, req_id)
+        if requirement.assignee_id != request.user.id:
+            raise HTTPError(403, "您只能提交指派給自己的需求單")
+        if requirement.status != 'pending':
+            raise HTTPError(409, f"需求單狀態為 '{requirement.status}'，無法提交")
+
+        def submitted(conn, ok):
+            if not ok:
+                raise HTTPError(409, "提交需求單失敗")
+            return json_response({'data': _public_detail(_load_requirement(conn, req_id))})
+
+        return PendingWrite(self._writer.submit(submit_requirement, req_id, comment), submitted)
+
+    def _review(self, conn, request, action):
+        _require_admin(request)
+        req_id = int(request.params[0])
+        requirement = _load_requirement(conn, req_id)
+        if requirement.assigner_id != request.user.id:
+            raise HTTPError(404, f"找不到ID為 {req_id} 的需求單或您沒有權限審核")
+        if requirement.status != 'submitted':
+            raise HTTPError(409, f"需求單狀態為 '{requirement.status}'，無法審核")
+
+        def reviewed(conn, ok):
+            if not ok:
+                raise HTTPError(409, "審核需求單失敗")
+            return json_response({'data': _public_detail(_load_requirement(conn, req_id))})
+
+        return PendingWrite(self._writer.submit(action, req_id), reviewed)
+
+    def handle_approve(self, conn, request):
+        return self._review(conn, request, approve_requirement)
+
+    def handle_reject(self, conn, request):
+        return self._review(conn, request, reject_requirement)
+
+    def handle_stats(self, conn, request):
+        _require_admin(request)
+        stats = get_requirement_stats(conn, request.user.id)
+        if stats is None:
+            raise HTTPError(500, "無法獲取需求單統計")
+        stats['admins'] = len(get_all_admins(conn))
+        stats['staff'] = len(get_all_staff(conn))
+        return json_response({'data': stats})
+
+    def handle_metrics(self, conn, request):
+        # 包含本進程與其他進程保存在資料庫中的指標
+        return Response(200, render_metrics(conn).encode('utf-8'),
+                        {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    # ---- 協定處理（在事件迴圈中執行） ----
+
+    def _match(self, request):
+        """找出請求對應的處理函數"""
+        allowed = []
+        for method, pattern, handler, authenticate, cacheable in self._routes:
+            match = pattern.match(request.path)
+            if match:
+                if method == request.method:
+                    request.params = match.groups()
+                    request.route = pattern.pattern.strip('^$').replace(r'(\d+)', '<id>')
+                    return handler, authenticate, cacheable
+                allowed.append(method)
+        if allowed:
+            raise HTTPError(405, "不支援的請求方法", {'Allow': ', '.join(allowed)})
+        raise HTTPError(404, "找不到請求的資源")
+
+    async def dispatch(self, request):
+        """處理一個請求並返回回應"""
+        start = time.perf_counter()
+        response = await self._dispatch(request)
+        API_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method,
+                                    route=request.route or 'unmatched', status=response.status)
+        return response
+
+    async def _dispatch(self, request):
+        try:
+            handler, authenticate, cacheable = self._match(request)
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(
+                self._executor, self._execute, handler, request, authenticate, cacheable)
+            if isinstance(response, PendingWrite):
+                try:
+                    result = await asyncio.wrap_future(response.future)
+                except OperationalError as e:
+                    # 寫入服務已回滾此操作；資料庫被鎖定屬暫時性錯誤，請客戶端稍後重試
+                    if 'locked' in str(e) or 'busy' in str(e):
+                        raise HTTPError(503, "資料庫忙碌中，請稍後再試", {'Retry-After': '1'})
+                    raise
+                response = await loop.run_in_executor(
+                    self._executor, self._complete, response.complete, result)
+            return response
+        except HTTPError as e:
+            return json_response({'error': e.message}, status=e.status, headers=e.headers)
+        except Exception as e:
+            print(f"處理 API 請求時發生錯誤: {e}")
+            return json_response({'error': "伺服器內部錯誤"}, status=500)
+
+    async def _read_request(self, reader):
+        """從連線讀取一個請求，連線已關閉時返回 None"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_TIMEOUT)
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HTTPError(400, "請求不完整")
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "請求標頭過大")
+
+        try:
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "請求行格式錯誤")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(400, "不支援 chunked 傳輸編碼")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Content-Length 格式錯誤")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(413, "請求內容過大")
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, version, headers, body)
+
+    async def handle_connection(self, reader, writer):
+        """處理一個客戶端連線上的所有請求（依序回應管線化的請求）"""
+        peer = writer.get_extra_info('peername')
+        client = peer[0] if isinstance(peer, tuple) else str(peer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    response = json_response({'error': e.message}, status=e.status)
+                    writer.write(response.encode(keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                request.client = client
+                response = await self.dispatch(request)
+                keep_alive = request.keep_alive
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """啟動伺服器"""
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='reqmgr-db')
+        self._writer = WriterService()
+        self._server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES,
+            backlog=LISTEN_BACKLOG)
+        return self._server
+
+    async def serve_forever(self):
+        """啟動伺服器並持續處理請求"""
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """關閉伺服器、工作執行緒與寫入服務（執行緒結束時其資料庫連接隨之釋放）"""
+        if self._server is not None:
+            self._server.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._writer is not None:
+            self._writer.close()
+        # 寫入尚未同步的登入失敗記錄
+        conn = create_connection()
+        if conn is not None:
+            try:
+                self._limiter.sync(conn)
+            except Error as e:
+                print(f"同步登入限制記錄時發生錯誤: {e}")
+            finally:
+                conn.close()
+
+def run_server(host='127.0.0.1', port=8080, workers=4):
+    """啟動 API 伺服器直到被中斷
+
+    Args:
+        host: 監聽位址
+        port: 監聽埠號
+        workers: 資料庫工作執行緒數量
+    """
+    server = APIServer(host, port, workers)
+    try:
+        asyncio.run(server.serve_forever())
+    finally:
+        server.close()
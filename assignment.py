@@ -0,0 +1,223 @@
+"""
+自動分配需求單
+
+維護每位員工的工作負載索引（未完成數量、緊急數量、近期完成數量），
+以最小堆選出負載最低的員工。索引依需求單變更記錄（requirement_changes）增量更新，
+大量建立需求單時不需要為每一筆需求單重新統計。
+選出的員工先保留對應的負載，寫入尚未提交時（例如 API 的批次寫入）連續自動分配也不會集中到同一人。
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from sqlite3 import Error
+
+import user_cache
+from database import get_requirement_changes
+
+# 計入負載的狀態：尚未發派的預約需求單也算在內，避免大量預約時集中到同一人
+LOAD_STATUSES = ('not_dispatched', 'pending', 'submitted', 'reviewing')
+URGENT_WEIGHT = 2           # 緊急需求單的負載權重
+THROUGHPUT_WINDOW = 7 * 86400  # 近期完成數量的統計區間（秒）
+RELOAD_INTERVAL = 3600      # 完整重新載入的間隔（秒），讓超出統計區間的完成數量過期
+RESERVATION_SECONDS = 60    # 自動分配保留的負載在需求單寫入前的有效時間（秒）
+
+# 每次查詢的ID數量上限（SQLite 舊版本的參數上限為 999）
+_REFRESH_CHUNK = 500
+
+_LOAD_COLUMNS = '''
+    SELECT id, assignee_id, status, priority, is_deleted,
+           CAST(strftime('%s', completed_at, 'utc') AS REAL)
+    FROM requirements
+'''
+
+class AssignmentEngine:
+    """員工負載索引
+
+    _contributions 記錄每筆需求單目前對哪位員工貢獻多少負載，
+    需求單變更時先扣除舊的貢獻再加上新的，因此只需處理有變更的需求單。
+    近期完成數量只在需求單變更時重新判斷，因此每隔 RELOAD_INTERVAL 秒完整重新載入一次。
+    堆中的項目採用延遲刪除：員工負載改變時推入新項目，舊項目在取出時才丟棄。
+    """
+
+    def __init__(self):
+        self.seq = None
+        self._staff_ids = ()
+        self._load = {}           # 員工ID -> 加權未完成數量（包含保留的負載）
+        self._throughput = {}     # 員工ID -> 近期完成數量
+        self._contributions = {}  # 需求單ID -> (員工ID, 負載, 是否為近期完成)
+        self._reservations = deque()  # 尚未寫入的自動分配: [員工ID, 負載, 到期時間]
+        self._heap = []
+        self._loaded_at = 0.0
+
+    @staticmethod
+    def _contribution(row, since):
+        """計算一筆需求單對負載索引的貢獻"""
+        req_id, assignee_id, status, priority, is_deleted, completed = row
+        if is_deleted:
+            return None
+        load = 0
+        if status in LOAD_STATUSES:
+            load = URGENT_WEIGHT if priority == 'urgent' else 1
+        recent = status == 'completed' and completed is not None and completed >= since
+        if not load and not recent:
+            return None
+        return assignee_id, load, recent
+
+    def _apply(self, contribution, sign):
+        assignee_id, load, recent = contribution
+        if assignee_id not in self._load:
+            return
+        self._load[assignee_id] += sign * load
+        self._throughput[assignee_id] += sign * recent
+        self._push(assignee_id)
+
+    def _push(self, staff_id):
+        heapq.heappush(self._heap, (self._load[staff_id], -self._throughput[staff_id], staff_id))
+
+    def _rebuild_heap(self):
+        self._heap = [(self._load[staff_id], -self._throughput[staff_id], staff_id)
+                      for staff_id in self._staff_ids]
+        heapq.heapify(self._heap)
+
+    def load(self, conn, staff_ids):
+        """從資料庫重新建立負載索引
+
+        只讀取未完成與統計區間內完成的需求單；已寫入的需求單已包含在結果中，因此清除保留的負載。
+        """
+        seq, _ = get_requirement_changes(conn, None)
+        now = time.time()
+        since = now - THROUGHPUT_WINDOW
+        placeholders = ", ".join("?" for _ in LOAD_STATUSES)
+        cursor = conn.cursor()
+        # completed_at 為本地時間，以相同格式的字串比較
+        cursor.execute(
+            _LOAD_COLUMNS + f"""
+            WHERE is_deleted = 0
+              AND (status IN ({placeholders})
+                   OR (status = 'completed' AND completed_at >= datetime(?, 'unixepoch', 'localtime')))
+            """,
+            LOAD_STATUSES + (int(since),)
+        )
+
+        self._staff_ids = staff_ids
+        self._load = {staff_id: 0 for staff_id in staff_ids}
+        self._throughput = {staff_id: 0 for staff_id in staff_ids}
+        self._contributions = {}
+        self._reservations.clear()
+        for row in cursor:
+            contribution = self._contribution(row, since)
+            if contribution is not None:
+                self._contributions[row[0]] = contribution
+                assignee_id, load, recent = contribution
+                if assignee_id in self._load:
+                    self._load[assignee_id] += load
+                    self._throughput[assignee_id] += recent
+        self._rebuild_heap()
+        self.seq = seq
+        self._loaded_at = now
+
+    def _release(self, reservation):
+        staff_id, load, _ = reservation
+        if staff_id in self._load:
+            self._load[staff_id] -= load
+            self._push(staff_id)
+
+    def reserve(self, staff_id, load):
+        """保留選出的員工的負載，直到對應的需求單出現在變更記錄中（或 RESERVATION_SECONDS 秒後）"""
+        if staff_id not in self._load:
+            return
+        self._reservations.append([staff_id, load, time.time() + RESERVATION_SECONDS])
+        self._load[staff_id] += load
+        self._push(staff_id)
+
+    def _consume_reservation(self, staff_id):
+        """新的需求單寫入後，以實際的負載取代最早保留的負載"""
+        for reservation in self._reservations:
+            if reservation[0] == staff_id:
+                self._reservations.remove(reservation)
+                self._release(reservation)
+                return
+
+    def refresh(self, conn):
+        """依員工名單與需求單變更記錄更新負載索引"""
+        now = time.time()
+        while self._reservations and self._reservations[0][2] <= now:
+            # 寫入失敗或逾時未提交的保留
+            self._release(self._reservations.popleft())
+
+        staff_ids = tuple(user.id for user in user_cache.get_users(conn, role='staff'))
+        current_seq, changed_ids = get_requirement_changes(conn, self.seq)
+        if (changed_ids is None or staff_ids != self._staff_ids
+                or now - self._loaded_at >= RELOAD_INTERVAL):
+            self.load(conn, staff_ids)
+            return
+        if not changed_ids:
+            return
+
+        since = now - THROUGHPUT_WINDOW
+        changed = sorted(changed_ids)
+        cursor = conn.cursor()
+        for start in range(0, len(changed), _REFRESH_CHUNK):
+            chunk = changed[start:start + _REFRESH_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(_LOAD_COLUMNS + f" WHERE id IN ({placeholders})", chunk)
+            rows = {row[0]: row for row in cursor.fetchall()}
+            for req_id in chunk:
+                old = self._contributions.pop(req_id, None)
+                if old is not None:
+                    self._apply(old, -1)
+                row = rows.get(req_id)
+                new = self._contribution(row, since) if row is not None else None
+                if new is not None:
+                    if old is None and new[1]:
+                        self._consume_reservation(new[0])
+                    self._contributions[req_id] = new
+                    self._apply(new, 1)
+
+        # 延遲刪除的舊項目過多時重建堆，避免堆無限制成長
+        if len(self._heap) > 4 * len(self._staff_ids) + 64:
+            self._rebuild_heap()
+        self.seq = current_seq
+
+    def least_loaded(self):
+        """返回目前負載最低的員工ID，沒有員工時返回 None
+
+        負載相同時優先選擇近期完成數量較多的員工，再依員工ID排序。
+        """
+        heap = self._heap
+        while heap:
+            load, neg_throughput, staff_id = heap[0]
+            if (staff_id in self._load and load == self._load[staff_id]
+                    and -neg_throughput == self._throughput[staff_id]):
+                return staff_id
+            heapq.heappop(heap)
+        return None
+
+# 進程內共用的負載索引
+_engine = AssignmentEngine()
+_engine_lock = threading.Lock()
+
+def choose_assignee(conn, priority='normal'):
+    """選出目前負載最低的員工，並保留即將建立的需求單的負載
+
+    Args:
+        conn: 數據庫連接
+        priority: 即將建立的需求單的優先級
+
+    Returns:
+        UserRecord: 負載最低的員工，沒有可指派的員工時返回 None
+    """
+    try:
+        with _engine_lock:
+            _engine.refresh(conn)
+            staff_id = _engine.least_loaded()
+            if staff_id is not None:
+                _engine.reserve(staff_id, URGENT_WEIGHT if priority == 'urgent' else 1)
+        if staff_id is None:
+            return None
+        return user_cache.get_user_by_id(conn, staff_id)
+    except Error as e:
+        print(f"自動分配需求單時發生錯誤: {e}")
+        return None
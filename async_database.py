@@ -0,0 +1,188 @@
+"""
+非同步資料庫存取層
+
+提供 database.py 各項查詢與修改的 asyncio 版本，讓 API 伺服器或通知程式
+等事件迴圈程式可以直接 await，不會因為 SQLite 的同步呼叫而阻塞事件迴圈。
+
+- 讀取：交給固定數量的讀取執行緒，每個執行緒持有自己的資料庫連接
+- 寫入：全部交給單一寫入執行緒（write_queue.WriterService）依序執行；
+  同時到達的多筆小型修改會合併在同一個交易中執行，只提交一次
+
+用法:
+    db = AsyncDatabase()
+    requirements = await db.get_user_requirements(user_id)
+    ok = await db.submit_requirement(req_id, "已完成")
+    db.close()
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from sqlite3 import Error
+
+import database
+from write_queue import WriterService
+
+class AsyncDatabase:
+    """非同步資料庫存取
+
+    Args:
+        readers: 讀取執行緒數量
+        writer: 共用的 WriterService，None 表示建立自己的寫入服務
+    """
+
+    def __init__(self, readers=4, writer=None):
+        self._local = threading.local()
+        self._readers = ThreadPoolExecutor(max_workers=readers,
+                                           thread_name_prefix='reqmgr-read')
+        self._owns_writer = writer is None
+        self._writer = writer if writer is not None else WriterService()
+        self._closed = False
+
+    # ---- 讀取 ----
+
+    def _reader_connection(self):
+        """獲取目前讀取執行緒專用的資料庫連接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = database.create_connection()
+            if conn is None:
+                raise Error("無法連接到資料庫")
+            self._local.conn = conn
+        return conn
+
+    def _call_reader(self, func, args):
+        return func(self._reader_connection(), *args)
+
+    async def read(self, func, *args):
+        """在讀取執行緒中執行查詢函數
+
+        Args:
+            func: 以資料庫連接為第一個參數的查詢函數
+            *args: 查詢函數的其餘參數
+
+        Returns:
+            查詢函數的返回值
+        """
+        if self._closed:
+            raise RuntimeError("資料庫存取層已關閉")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, self._call_reader, func, args)
+
+    # ---- 寫入 ----
+
+    async def write(self, func, *args, **kwargs):
+        """交給寫入服務執行修改函數
+
+        修改函數會以 commit=False 呼叫，與同時到達的其他寫入合併在同一個交易中提交；
+        結果在提交成功後才返回。
+
+        Args:
+            func: 以資料庫連接為第一個參數、接受 commit 參數的修改函數
+            *args, **kwargs: 修改函數的其餘參數
+
+        Returns:
+            修改函數的返回值
+        """
+        if self._closed:
+            raise RuntimeError("資料庫存取層已關閉")
+        return await asyncio.wrap_future(self._writer.submit(func, *args, **kwargs))
+
+    def close(self):
+        """等待排隊中的寫入完成後關閉讀取與寫入執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._owns_writer:
+            self._writer.close()
+        self._readers.shutdown(wait=True)
+
+    # ---- 查詢 ----
+
+    async def get_user_by_id(self, user_id):
+        """根據用戶ID獲取用戶資料"""
+        return await self.read(database.get_user_by_id, user_id)
+
+    async def get_user_by_username(self, username):
+        """根據使用者名稱獲取使用者資料"""
+        return await self.read(database.get_user_by_username, username)
+
+    async def get_all_staff(self):
+        """獲取所有員工列表"""
+        return await self.read(database.get_all_staff)
+
+    async def get_user_requirements(self, user_id):
+        """獲取員工的需求單列表"""
+        return await self.read(database.get_user_requirements, user_id)
+
+    async def get_admin_dispatched_requirements(self, admin_id):
+        """獲取管理員已發派的需求單列表"""
+        return await self.read(database.get_admin_dispatched_requirements, admin_id)
+
+    async def get_admin_requirements_by_staff(self, admin_id, staff_id):
+        """獲取管理員發派給指定員工的需求單列表"""
+        return await self.read(database.get_admin_requirements_by_staff, admin_id, staff_id)
+
+    async def get_admin_scheduled_requirements(self, admin_id):
+        """獲取管理員的預約需求單列表"""
+        return await self.read(database.get_admin_scheduled_requirements, admin_id)
+
+    async def get_admin_scheduled_by_staff(self, admin_id, staff_id):
+        """獲取管理員預約給指定員工的需求單列表"""
+        return await self.read(database.get_admin_scheduled_by_staff, admin_id, staff_id)
+
+    async def get_requirement_detail(self, req_id):
+        """獲取需求單詳情"""
+        return await self.read(database.get_requirement_detail, req_id)
+
+    async def get_deleted_requirements(self, admin_id):
+        """獲取已刪除的需求單"""
+        return await self.read(database.get_deleted_requirements, admin_id)
+
+    async def get_requirement_stats(self, admin_id):
+        """獲取需求單統計"""
+        return await self.read(database.get_requirement_stats, admin_id)
+
+    async def get_requirement_changes(self, since_seq):
+        """獲取需求單變更記錄"""
+        return await self.read(database.get_requirement_changes, since_seq)
+
+    # ---- 修改 ----
+
+    async def create_requirement(self, title, description, assigner_id, assignee_id,
+                                 priority='normal', scheduled_time=None):
+        """建立新的需求單，返回新建需求單ID"""
+        return await self.write(database.create_requirement, title, description,
+                                assigner_id, assignee_id, priority, scheduled_time)
+
+    async def dispatch_scheduled_requirements(self):
+        """發派到期的預約需求單，返回發派數量"""
+        return await self.write(database.dispatch_scheduled_requirements)
+
+    async def cancel_scheduled_requirement(self, req_id):
+        """取消預約發派的需求單"""
+        return await self.write(database.cancel_scheduled_requirement, req_id)
+
+    async def submit_requirement(self, req_id, comment):
+        """員工提交需求單完成情況"""
+        return await self.write(database.submit_requirement, req_id, comment)
+
+    async def approve_requirement(self, req_id):
+        """管理員審核通過需求單"""
+        return await self.write(database.approve_requirement, req_id)
+
+    async def reject_requirement(self, req_id):
+        """管理員拒絕需求單"""
+        return await self.write(database.reject_requirement, req_id)
+
+    async def invalidate_requirement(self, req_id):
+        """使需求單失效"""
+        return await self.write(database.invalidate_requirement, req_id)
+
+    async def delete_requirement(self, req_id):
+        """刪除需求單（移到垃圾桶）"""
+        return await self.write(database.delete_requirement, req_id)
+
+    async def restore_requirement(self, req_id):
+        """恢復已刪除的需求單"""
+        return await self.write(database.restore_requirement, req_id)
@@ -1,25 +1,41 @@
-from database import create_connection, get_user_by_username
+from database import create_connection
+from credentials import check_credentials
 from models import User
+from rate_limit import login_limiter, login_keys, local_client
 
 
 def login(username, password):
     conn = create_connection()
     if conn is not None:
-        user = get_user_by_username(conn, username)
+        # 先檢查登入失敗次數，被鎖定時不驗證密碼
+        keys = login_keys(username, local_client())
+        wait = login_limiter.check(conn, keys)
+        if wait:
+            conn.close()
+            return {
+                "success": False,
+                "message": f"登入失敗次數過多，請在 {wait} 秒後再試"
+            }
+
+        user = check_credentials(conn, username, password)  # 檢查密碼
+        if user is not None:
+            login_limiter.record_success(conn, keys[:1])
+        else:
+            login_limiter.record_failure(conn, keys)
         conn.close()
 
-        if user is not None and user[2] == password:  # 檢查密碼
+        if user is not None:
             return {
                 "success": True,
                 "user_info": User(
-                    id=user[0],
-                    username=user[1],
-                    name=user[3],
-                    email=user[4],
-                    role=user[5]
+                    id=user.id,
+                    username=user.username,
+                    name=user.name,
+                    email=user.email,
+                    role=user.role
                 )
             }
     return {
         "success": False,
         "message": "使用者名稱或密碼錯誤"
-    } 
\ No newline at end of file
+    }
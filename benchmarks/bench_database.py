@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+database.py 操作效能測試
+
+以 seed_data 在暫存目錄產生不同大小的測試資料庫，量測 database.py 中
+各項列表查詢與修改操作的執行時間，結果以 JSON 保存，並可與基準結果比較：
+任何操作的中位數時間超過基準的 (1 + 門檻) 倍時，以結束碼 1 結束。
+
+修改操作每次都使用不同的需求單，準備資料（例如建立到期的預約需求單）不計入時間。
+
+用法:
+    python benchmarks/bench_database.py                                  # 量測並顯示結果
+    python benchmarks/bench_database.py --save-baseline benchmarks/baseline.json
+    python benchmarks/bench_database.py --baseline benchmarks/baseline.json --threshold 0.5
+    python benchmarks/bench_database.py --sizes 1000,1000000 --output result.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import seed_data
+import user_cache
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+STAFF_COUNT = 50
+ADMIN_COUNT = 2
+MIN_DELTA = 0.0005  # 與基準相差小於此秒數時不視為退步（避免微秒級操作的雜訊）
+
+class Context:
+    """一個測試資料庫的量測狀態：使用者ID與各狀態尚未使用過的需求單ID"""
+
+    def __init__(self, conn, admin_id, staff_id):
+        self.admin_id = admin_id
+        self.staff_id = staff_id
+        self._pools = {}
+        self._conn = conn
+
+    def take(self, status):
+        """取出一筆指定狀態、尚未被量測使用過的需求單ID"""
+        pool = self._pools.get(status)
+        if pool is None:
+            pool = self._pools[status] = [row[0] for row in self._conn.execute(
+                "SELECT id FROM requirements WHERE status = ? AND is_deleted = 0 "
+                "ORDER BY id DESC LIMIT 1000", (status,))]
+        if not pool:
+            raise RuntimeError(f"測試資料庫中沒有足夠的 {status} 需求單")
+        return pool.pop()
+
+def _due_scheduled(conn, ctx, count=20):
+    """建立 count 筆已到期的預約需求單，供 dispatch_scheduled_requirements 發派"""
+    for _ in range(count):
+        database.create_requirement(conn, "效能測試預約需求單", "效能測試", ctx.admin_id,
+                                    ctx.staff_id, scheduled_time='2000-01-01 00:00:00', commit=False)
+    conn.commit()
+    return ()
+
+# 名稱 -> (準備函數, 量測函數)；準備函數返回量測函數的其餘參數，不計入時間
+OPERATIONS = {
+    'get_user_requirements': (
+        lambda conn, ctx: (ctx.staff_id,),
+        database.get_user_requirements),
+    'get_admin_dispatched_requirements': (
+        lambda conn, ctx: (ctx.admin_id,),
+        database.get_admin_dispatched_requirements),
+    'get_admin_scheduled_requirements': (
+        lambda conn, ctx: (ctx.admin_id,),
+        database.get_admin_scheduled_requirements),
+    'get_deleted_requirements': (
+        lambda conn, ctx: (ctx.admin_id,),
+        database.get_deleted_requirements),
+    'get_requirement_stats': (
+        lambda conn, ctx: (ctx.admin_id,),
+        database.get_requirement_stats),
+    'create_requirement': (
+        lambda conn, ctx: ("效能測試需求單", "效能測試", ctx.admin_id, ctx.staff_id),
+        database.create_requirement),
+    'dispatch_scheduled_requirements': (
+        _due_scheduled,
+        database.dispatch_scheduled_requirements),
+    'submit_requirement': (
+        lambda conn, ctx: (ctx.take('pending'), "效能測試"),
+        database.submit_requirement),
+    'approve_requirement': (
+        lambda conn, ctx: (ctx.take('submitted'),),
+        database.approve_requirement),
+    'reject_requirement': (
+        lambda conn, ctx: (ctx.take('submitted'),),
+        database.reject_requirement),
+}
+
+def _result_size(value):
+    """返回結果的筆數（列表）或 None"""
+    return len(value) if isinstance(value, list) else None
+
+def run_size(size, repeat, tmpdir):
+    """產生指定大小的測試資料庫並量測所有操作"""
+    path = os.path.join(tmpdir, f'bench_{size}.db')
+    database.configure_database(path=path)
+    user_cache.invalidate()
+    database.clear_requirement_detail_cache()
+
+    conn = database.create_connection()
+    seeded = seed_data.seed_database(conn, STAFF_COUNT, size, admins=ADMIN_COUNT, seed=size)
+    # 工作量最多的員工與第一位管理員（最壞情況的列表大小）
+    ctx = Context(conn, seeded['admin_ids'][0], seeded['staff_ids'][0])
+
+    results = {}
+    for name, (setup, func) in OPERATIONS.items():
+        timings = []
+        rows = None
+        for _ in range(repeat):
+            args = setup(conn, ctx)
+            start = time.perf_counter()
+            value = func(conn, *args)
+            timings.append(time.perf_counter() - start)
+            rows = _result_size(value)
+        results[name] = {
+            'median': statistics.median(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'rows': rows,
+        }
+    conn.close()
+    return results
+
+def compare(current, baseline, threshold):
+    """與基準結果比較
+
+    Returns:
+        list: (大小, 操作, 基準秒數, 目前秒數, 倍數, 是否退步) 列表
+    """
+    rows = []
+    for size, operations in current['results'].items():
+        for name, result in operations.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            ratio = result['median'] / base['median'] if base['median'] else float('inf')
+            regressed = ratio > 1 + threshold and result['median'] - base['median'] > MIN_DELTA
+            rows.append((size, name, base['median'], result['median'], ratio, regressed))
+    return rows
+
+def print_results(results):
+    print(f"\n{'資料量':>8}  {'操作':<36}{'中位數(毫秒)':>14}{'最小(毫秒)':>12}{'筆數':>10}")
+    for size, operations in results.items():
+        for name, result in operations.items():
+            rows = '' if result['rows'] is None else result['rows']
+            print(f"{size:>8}  {name:<36}{result['median'] * 1000:>14.3f}"
+                  f"{result['min'] * 1000:>12.3f}{rows:>10}")
+
+def print_comparison(rows, threshold):
+    print(f"\n與基準比較（門檻: 慢 {threshold:.0%} 以上）")
+    print(f"{'資料量':>8}  {'操作':<36}{'基準(毫秒)':>12}{'目前(毫秒)':>12}{'倍數':>8}")
+    for size, name, base, current, ratio, regressed in rows:
+        mark = '  ← 退步' if regressed else ''
+        print(f"{size:>8}  {name:<36}{base * 1000:>12.3f}{current * 1000:>12.3f}{ratio:>8.2f}{mark}")
+
+def main():
+    parser = argparse.ArgumentParser(description="量測 database.py 各項操作的執行時間")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="測試資料庫的需求單數量，以逗號分隔 (預設: 1000,10000,100000)")
+    parser.add_argument('--repeat', type=int, default=7, help="每項操作的重複次數 (預設: 7)")
+    parser.add_argument('--output', help="將結果寫入 JSON 文件")
+    parser.add_argument('--baseline', help="與指定的基準結果 JSON 比較")
+    parser.add_argument('--save-baseline', help="將結果保存為基準 JSON")
+    parser.add_argument('--threshold', type=float, default=0.5,
+                        help="中位數時間超過基準多少比例視為退步 (預設: 0.5，即慢 50%%)")
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    except ValueError:
+        parser.error("--sizes 必須是以逗號分隔的整數")
+    if args.repeat < 1:
+        parser.error("--repeat 必須大於 0")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in sizes:
+            print(f"產生並量測 {size} 筆需求單的資料庫...")
+            results[str(size)] = run_size(size, args.repeat, tmpdir)
+
+    report = {
+        'meta': {
+            'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'profile': database.get_database_settings()['profile'],
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    print_results(results)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n結果已寫入 {path}")
+
+    if baseline is not None:
+        rows = compare(report, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        regressions = [row for row in rows if row[5]]
+        if regressions:
+            print(f"\n{len(regressions)} 項操作比基準慢超過 {args.threshold:.0%}")
+            sys.exit(1)
+        print("\n沒有發現效能退步")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+讀取路徑效能測試
+
+比較一般連接與記憶體映射唯讀連接（database.create_read_connection）
+執行報表查詢的速度：
+- 冷讀取：先將資料庫文件從作業系統頁面快取中移除，再以新連接執行一次
+- 熱讀取：在同一個連接上重複執行
+
+用法:
+    python benchmarks/bench_read_path.py                  # 產生暫存測試資料庫
+    python benchmarks/bench_read_path.py --rows 1000000
+    python benchmarks/bench_read_path.py --db requirement.db --admin-id 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+STATUSES = ('pending', 'submitted', 'completed', 'invalid')
+
+def generate_database(path, rows):
+    """產生測試資料庫，返回管理員ID"""
+    database.configure_database(path=path)
+    conn = database.create_connection()
+    database.create_tables(conn)
+    conn.execute("INSERT INTO users (username, password, name, email, role) "
+                 "VALUES ('bench_admin', 'x', '管理員', 'admin@example.com', 'admin')")
+    admin_id = conn.execute("SELECT id FROM users WHERE username = 'bench_admin'").fetchone()[0]
+    staff_ids = []
+    for i in range(20):
+        cursor = conn.execute("INSERT INTO users (username, password, name, email, role) "
+                              "VALUES (?, 'x', ?, 'staff@example.com', 'staff')",
+                              (f"bench_staff{i}", f"員工{i}"))
+        staff_ids.append(cursor.lastrowid)
+
+    description = "需求說明 " * 60
+    conn.executemany(
+        """INSERT INTO requirements
+           (title, description, assigner_id, assignee_id, priority, status, is_dispatched, created_at)
+           VALUES (?, ?, ?, ?, ?, ?, 1, datetime('now', 'localtime', ?))""",
+        ((f"需求單 {i}", description, admin_id, staff_ids[i % len(staff_ids)],
+          'urgent' if i % 7 == 0 else 'normal', STATUSES[i % len(STATUSES)],
+          f"-{i % 5000} minutes")
+         for i in range(rows))
+    )
+    conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return admin_id
+
+def evict_page_cache(path):
+    """將資料庫文件從作業系統頁面快取中移除（不支援的平台上不做任何事）"""
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    for name in (path, path + '-wal'):
+        if os.path.exists(name):
+            fd = os.open(name, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+    return True
+
+def run_workload(conn, admin_id):
+    """報表查詢：管理員的需求單列表與統計"""
+    requirements = database.get_admin_dispatched_requirements(conn, admin_id)
+    database.get_requirement_stats(conn, admin_id)
+    return len(requirements)
+
+def measure(mode, connect, path, admin_id, repeat):
+    """量測一種連接方式的冷讀取與熱讀取時間"""
+    evict_page_cache(path)
+    conn = connect()
+    start = time.perf_counter()
+    rows = run_workload(conn, admin_id)
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_workload(conn, admin_id)
+        warm.append(time.perf_counter() - start)
+    conn.close()
+    return {'mode': mode, 'rows': rows, 'cold': cold, 'warm': min(warm),
+            'warm_avg': sum(warm) / len(warm)}
+
+def main():
+    parser = argparse.ArgumentParser(description="比較一般連接與記憶體映射唯讀連接的讀取速度")
+    parser.add_argument('--db', help="使用現有的資料庫（預設: 產生暫存測試資料庫）")
+    parser.add_argument('--admin-id', type=int, help="使用現有資料庫時的管理員ID")
+    parser.add_argument('--rows', type=int, default=200000, help="測試資料庫的需求單數量 (預設: 200000)")
+    parser.add_argument('--repeat', type=int, default=5, help="熱讀取重複次數 (預設: 5)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.db:
+            path = os.path.abspath(args.db)
+            if args.admin_id is None:
+                parser.error("使用 --db 時必須指定 --admin-id")
+            admin_id = args.admin_id
+            database.configure_database(path=path)
+        else:
+            path = os.path.join(tmpdir, 'bench.db')
+            print(f"產生測試資料庫 ({args.rows} 筆需求單)...")
+            admin_id = generate_database(path, args.rows)
+
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"資料庫: {path} ({size_mb:.1f} MB)")
+        if not hasattr(os, 'posix_fadvise'):
+            print("此平台無法清除頁面快取，冷讀取結果僅反映 SQLite 快取為空的情況")
+
+        results = [
+            measure('一般連接', database.create_connection, path, admin_id, args.repeat),
+            measure('mmap 唯讀', database.create_read_connection, path, admin_id, args.repeat),
+            measure('mmap 不可變', lambda: database.create_read_connection(immutable=True),
+                    path, admin_id, args.repeat),
+        ]
+
+    print(f"\n{'連接方式':<12}{'筆數':>10}{'冷讀取(秒)':>14}{'熱讀取最佳(秒)':>18}{'熱讀取平均(秒)':>18}")
+    for result in results:
+        print(f"{result['mode']:<12}{result['rows']:>10}{result['cold']:>14.3f}"
+              f"{result['warm']:>18.3f}{result['warm_avg']:>18.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多進程負載模擬
+
+以多個進程模擬員工、管理員與預約發派排程器同時使用同一個 requirement.db：
+- 員工：查看自己的需求單列表、提交需求單
+- 管理員：建立需求單（部分為短時間內到期的預約需求單）、審核、查看統計
+- 排程器：與 GUI 的全局排程器相同，定期以新連接發派到期的預約需求單
+
+每位使用者以自己的資料庫連接讀取，操作之間等待隨機的思考時間。修改操作有兩種執行方式：
+- direct（預設）：以自己的連接執行 database.py 的修改函數，每個操作一個交易
+- writer：交給進程內的 WriterService，與同一進程其他使用者的寫入合併提交（與 API 伺服器相同）；
+  以 --users-per-process 讓多位使用者共用一個進程與寫入服務
+
+修改函數以 commit=False 呼叫，資料庫錯誤以例外傳回，依例外類型區分「database is locked」與其他錯誤；
+讀取函數只以返回值回報失敗（統計返回 None），列表讀取失敗時返回空列表，無法與沒有資料區分。
+
+結束後顯示各操作的次數、吞吐量、延遲百分位數與錯誤率，用來比較 WAL、
+連接設定檔與批次寫入等修改前後的鎖定競爭情況。
+
+用法:
+    python benchmarks/load_simulator.py                          # 產生暫存測試資料庫
+    python benchmarks/load_simulator.py --staff 32 --admins 4 --duration 30
+    python benchmarks/load_simulator.py --db load.db --profile safe --think-time 0
+    python benchmarks/load_simulator.py --writes writer --users-per-process 8
+    python benchmarks/load_simulator.py --output result.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import seed_data
+from write_queue import WriterService
+
+# 每個角色的操作與比例
+STAFF_MIX = (('list', 0.7), ('submit', 0.3))
+ADMIN_MIX = (('create', 0.4), ('approve', 0.3), ('stats', 0.3))
+SCHEDULED_CREATE_RATE = 0.2  # 管理員建立的需求單中，預約在數秒後發派的比例
+
+def _is_locked(error):
+    """例外是否為 SQLITE_BUSY（database is locked / busy）"""
+    errorname = getattr(error, 'sqlite_errorname', None)  # Python 3.11+
+    if errorname is not None:
+        return errorname.startswith('SQLITE_BUSY')
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+def _timed(func, *args):
+    """執行一次資料庫操作，返回 (延遲秒數, 結果, 結果類型)
+
+    結果類型為 ok、locked 或 error：拋出 sqlite3 例外時依例外判斷，
+    否則以返回值判斷（None 或 False 表示失敗）。
+    """
+    start = time.perf_counter()
+    try:
+        value = func(*args)
+    except sqlite3.Error as e:
+        return time.perf_counter() - start, None, 'locked' if _is_locked(e) else 'error'
+    latency = time.perf_counter() - start
+    if value is None or value is False:
+        return latency, value, 'error'
+    return latency, value, 'ok'
+
+class DirectWriter:
+    """以指定的連接直接執行修改函數，每個操作一個交易"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def call(self, func, *args):
+        try:
+            result = func(self.conn, *args, commit=False)
+            self.conn.commit()
+        except Exception:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            raise
+        return result
+
+def _pick(rng, mix):
+    value = rng.random()
+    for name, weight in mix:
+        value -= weight
+        if value < 0:
+            return name
+    return mix[-1][0]
+
+def _staff_operation(conn, writer, rng, user_id, state):
+    operation = _pick(rng, STAFF_MIX)
+    if operation == 'submit':
+        # 從上次列表中挑選一筆未完成的需求單
+        pending = state.get('pending')
+        if not pending:
+            operation = 'list'
+        else:
+            req_id = pending.pop(rng.randrange(len(pending)))
+            return operation, _timed(writer.call, database.submit_requirement, req_id, "負載模擬提交")
+    result = _timed(database.get_user_requirements, conn, user_id)
+    state['pending'] = [req.id for req in (result[1] or []) if req.status == 'pending'][:200]
+    return operation, result
+
+def _admin_operation(conn, writer, rng, user_id, state):
+    operation = _pick(rng, ADMIN_MIX)
+    if operation == 'create':
+        scheduled_time = None
+        if rng.random() < SCHEDULED_CREATE_RATE:
+            scheduled_time = time.strftime("%Y-%m-%d %H:%M:%S",
+                                           time.localtime(time.time() + rng.uniform(1, 10)))
+        return operation, _timed(writer.call, database.create_requirement, "負載模擬需求單", "負載模擬",
+                                 user_id, rng.choice(state['staff_ids']), 'normal', scheduled_time)
+    if operation == 'approve':
+        submitted = state.get('submitted')
+        if not submitted:
+            # 挑選審核對象不計入延遲
+            submitted = state['submitted'] = [row[0] for row in conn.execute(
+                "SELECT id FROM requirements WHERE assigner_id = ? AND status = 'submitted' "
+                "AND is_deleted = 0 ORDER BY id DESC LIMIT 200", (user_id,))]
+        if submitted:
+            return operation, _timed(writer.call, database.approve_requirement, submitted.pop())
+        operation = 'stats'
+    return operation, _timed(database.get_requirement_stats, conn, user_id)
+
+def _simulate_user(role, index, user_id, staff_ids, writer, think_time, start_at, deadline, samples):
+    """模擬一位使用者，將 (操作, 延遲, 結果類型) 加入 samples"""
+    rng = random.Random(f"{role}-{index}")
+    conn = database.create_connection()
+    if writer is None:
+        writer = DirectWriter(conn)
+    state = {'staff_ids': staff_ids}
+    operation_func = _staff_operation if role == 'staff' else _admin_operation
+
+    time.sleep(max(0.0, start_at - time.time()))
+    while time.time() < deadline:
+        operation, (latency, _, outcome) = operation_func(conn, writer, rng, user_id, state)
+        samples.append((f"{role}:{operation}", latency, outcome))
+        if think_time > 0:
+            time.sleep(rng.expovariate(1.0 / think_time))
+    conn.close()
+
+def worker(users, staff_ids, path, profile, writes, think_time, start_at, deadline, results):
+    """以一個進程模擬多位使用者（每位一個執行緒），結束時將所有樣本放入 results
+
+    Args:
+        users: [(角色, 編號, 使用者ID), ...]
+        writes: direct 或 writer（進程內的使用者共用一個 WriterService）
+    """
+    database.configure_database(path=path, profile=profile)
+    writer = WriterService() if writes == 'writer' else None
+    samples = []
+    threads = [
+        threading.Thread(target=_simulate_user, args=(role, index, user_id, staff_ids, writer,
+                                                      think_time, start_at, deadline, samples))
+        for role, index, user_id in users
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if writer is not None:
+        writer.close()
+    results.put(samples)
+
+def scheduler(path, profile, writes, interval, start_at, deadline, results):
+    """模擬 GUI 的全局排程器：每次以新連接（或本進程的寫入服務）發派到期的預約需求單"""
+    database.configure_database(path=path, profile=profile)
+    writer = WriterService() if writes == 'writer' else None
+    samples = []
+    time.sleep(max(0.0, start_at - time.time()))
+    while time.time() < deadline:
+        if writer is not None:
+            latency, _, outcome = _timed(writer.call, database.dispatch_scheduled_requirements)
+        else:
+            conn = database.create_connection()
+            latency, _, outcome = _timed(DirectWriter(conn).call, database.dispatch_scheduled_requirements)
+            conn.close()
+        samples.append(("scheduler:dispatch", latency, outcome))
+        time.sleep(interval)
+    if writer is not None:
+        writer.close()
+    results.put(samples)
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(samples, duration):
+    """依操作彙整次數、吞吐量、延遲百分位數與錯誤數"""
+    groups = {}
+    for operation, latency, outcome in samples:
+        groups.setdefault(operation, []).append((latency, outcome))
+    groups['total'] = [(latency, outcome) for _, latency, outcome in samples]
+
+    summary = {}
+    for operation, values in sorted(groups.items()):
+        latencies = sorted(latency for latency, _ in values)
+        locked = sum(1 for _, outcome in values if outcome == 'locked')
+        errors = sum(1 for _, outcome in values if outcome == 'error')
+        summary[operation] = {
+            'count': len(values),
+            'ops_per_s': len(values) / duration,
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p95_ms': _percentile(latencies, 0.95) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000,
+            'locked': locked,
+            'errors': errors,
+            'locked_rate': locked / len(values),
+        }
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description="模擬多位員工與管理員同時使用資料庫")
+    parser.add_argument('--db', help="使用現有的資料庫（預設: 產生暫存測試資料庫）")
+    parser.add_argument('--requirements', type=int, default=100000,
+                        help="暫存測試資料庫的需求單數量 (預設: 100000)")
+    parser.add_argument('--staff', type=int, default=16, help="員工進程數量 (預設: 16)")
+    parser.add_argument('--admins', type=int, default=2, help="管理員進程數量 (預設: 2)")
+    parser.add_argument('--duration', type=float, default=10.0, help="模擬秒數 (預設: 10)")
+    parser.add_argument('--think-time', type=float, default=0.05,
+                        help="操作之間的平均思考時間秒數，0 表示不等待 (預設: 0.05)")
+    parser.add_argument('--scheduler-interval', type=float, default=1.0,
+                        help="排程器的發派間隔秒數，0 表示不啟動排程器 (預設: 1)")
+    parser.add_argument('--profile', choices=list(database.PRAGMA_PROFILES),
+                        help="資料庫效能設定檔 (預設: 環境變量 REQMGR_DB_PROFILE 或 balanced)")
+    parser.add_argument('--writes', choices=('direct', 'writer'), default='direct',
+                        help="修改操作的執行方式：direct 直接以各自的連接提交，"
+                             "writer 交給進程內的 WriterService 合併提交 (預設: direct)")
+    parser.add_argument('--users-per-process', type=int, default=1,
+                        help="每個進程模擬的使用者數量，同一進程的使用者共用寫入服務 (預設: 1)")
+    parser.add_argument('--prefix', default=seed_data.DEFAULT_PREFIX,
+                        help="測試使用者名稱前綴 (預設: seed)")
+    parser.add_argument('--output', help="將結果寫入 JSON 文件")
+    args = parser.parse_args()
+    if args.staff < 1 or args.admins < 1:
+        parser.error("--staff 與 --admins 必須大於 0")
+    if args.users_per_process < 1:
+        parser.error("--users-per-process 必須大於 0")
+
+    profile = args.profile or database.get_database_settings()['profile']
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if args.db:
+            path = os.path.abspath(args.db)
+        else:
+            path = os.path.join(tmpdir, 'load.db')
+            print(f"產生測試資料庫 ({args.requirements} 筆需求單)...")
+        database.configure_database(path=path, profile=profile)
+        conn = database.create_connection()
+        seeded = seed_data.seed_database(conn, args.staff, 0 if args.db else args.requirements,
+                                         admins=args.admins, prefix=args.prefix, seed=0)
+        conn.close()
+        admin_ids, staff_ids = seeded['admin_ids'], seeded['staff_ids']
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        start_at = time.time() + 2.0  # 等待所有進程啟動後同時開始
+        deadline = start_at + args.duration
+        users = ([('staff', i, staff_ids[i]) for i in range(args.staff)]
+                 + [('admin', i, admin_ids[i]) for i in range(args.admins)])
+        per_process = args.users_per_process
+        processes = [
+            context.Process(target=worker, args=(users[i:i + per_process], staff_ids, path, profile,
+                                                 args.writes, args.think_time, start_at, deadline,
+                                                 results))
+            for i in range(0, len(users), per_process)
+        ]
+        if args.scheduler_interval > 0:
+            processes.append(context.Process(target=scheduler, args=(
+                path, profile, args.writes, args.scheduler_interval, start_at, deadline, results)))
+
+        print(f"模擬 {args.staff} 位員工與 {args.admins} 位管理員 {args.duration:g} 秒 "
+              f"(設定檔: {profile}，寫入: {args.writes}，每進程 {per_process} 位使用者，"
+              f"思考時間: {args.think_time:g} 秒)...")
+        for process in processes:
+            process.start()
+        samples = []
+        for _ in processes:
+            samples.extend(results.get())
+        for process in processes:
+            process.join()
+
+    summary = summarize(samples, args.duration)
+    print(f"\n{'操作':<22}{'次數':>8}{'每秒':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}"
+          f"{'最大(ms)':>10}{'鎖定':>7}{'錯誤':>7}")
+    for operation, row in summary.items():
+        print(f"{operation:<22}{row['count']:>8}{row['ops_per_s']:>9.1f}{row['p50_ms']:>10.2f}"
+              f"{row['p95_ms']:>10.2f}{row['p99_ms']:>10.2f}{row['max_ms']:>10.1f}"
+              f"{row['locked']:>7}{row['errors']:>7}")
+    total = summary.get('total')
+    if total:
+        print(f"\n「database is locked」比例: {total['locked_rate']:.2%}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'settings': {
+                    'staff': args.staff, 'admins': args.admins, 'duration': args.duration,
+                    'think_time': args.think_time, 'scheduler_interval': args.scheduler_interval,
+                    'profile': profile, 'database': args.db or None,
+                    'writes': args.writes, 'users_per_process': args.users_per_process,
+                },
+                'summary': summary,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"結果已寫入 {args.output}")
+
+if __name__ == '__main__':
+    main()
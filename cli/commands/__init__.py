@@ -6,4 +6,7 @@ CLI 命令模組
 - user: 用戶管理命令
 - requirement: 需求單管理命令
 - admin: 管理員專用命令
+- serve: HTTP/JSON API 伺服器
+- dev: 開發與測試工具
+- metrics: 匯出營運指標
 """ 
\ No newline at end of file
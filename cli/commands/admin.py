@@ -7,7 +7,11 @@
 """
 
 import click
+import os
+import sqlite3
 import sys
+import tempfile
+import time
 from pathlib import Path
 from datetime import datetime
 
@@ -19,8 +23,16 @@ from database import (
     create_connection, get_admin_scheduled_requirements, 
     cancel_scheduled_requirement, dispatch_scheduled_requirements,
     get_deleted_requirements, restore_requirement, get_all_users,
-    get_admin_dispatched_requirements, clear_all_requirements
+    get_admin_dispatched_requirements, clear_all_requirements, get_all_admins,
+    get_all_staff, get_requirement_detail, get_requirement_stats,
+    get_database_settings, apply_pragmas, PRAGMA_PROFILES, TUNABLE_PRAGMAS,
+    create_read_connection, archive_requirements, count_archivable_requirements,
+    get_archive_stats, count_purgeable_requirements, purge_deleted_requirements,
+    trim_requirement_changes, reclaim_free_pages, enable_incremental_vacuum, get_free_space
 )
+from metrics import observe_trash_purge
+from analytics import get_snapshot, PRIORITY_CODES
+from user_cache import get_user_names
 from cli.utils.session import require_admin, get_current_user
 from cli.utils.formatter import format_output, success_message, error_message, warning_message
 
@@ -51,52 +63,30 @@ def stats_command(ctx):
             error_message("無法連接到資料庫")
             sys.exit(1)
         
-        cursor = conn.cursor()
-        
-        # 獲取用戶統計
-        cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'admin'")
-        admin_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM users WHERE role = 'staff'")
-        staff_count = cursor.fetchone()[0]
+        # 獲取用戶統計（由使用者目錄快取提供）
+        admin_count = len(get_all_admins(conn))
+        staff_count = len(get_all_staff(conn))
         
         # 獲取需求單統計
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE is_deleted = 0")
-        total_requirements = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE status = 'pending' AND is_deleted = 0")
-        pending_requirements = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE status = 'submitted' AND is_deleted = 0")
-        submitted_requirements = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE status = 'completed' AND is_deleted = 0")
-        completed_requirements = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE is_dispatched = 0")
-        scheduled_requirements = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE is_deleted = 1")
-        deleted_requirements = cursor.fetchone()[0]
-        
-        # 獲取當前管理員的需求單統計
-        cursor.execute("SELECT COUNT(*) FROM requirements WHERE assigner_id = ? AND is_deleted = 0", (current_user['id'],))
-        my_requirements = cursor.fetchone()[0]
-        
+        requirement_stats = get_requirement_stats(conn, current_user['id'])
         conn.close()
         
+        if requirement_stats is None:
+            error_message("無法獲取需求單統計")
+            sys.exit(1)
+        
         # 準備統計數據
         stats_data = [
             {'category': '用戶統計', 'item': '管理員數量', 'count': admin_count},
             {'category': '用戶統計', 'item': '員工數量', 'count': staff_count},
             {'category': '用戶統計', 'item': '總用戶數', 'count': admin_count + staff_count},
-            {'category': '需求單統計', 'item': '總需求單數', 'count': total_requirements},
-            {'category': '需求單統計', 'item': '待處理', 'count': pending_requirements},
-            {'category': '需求單統計', 'item': '已提交', 'count': submitted_requirements},
-            {'category': '需求單統計', 'item': '已完成', 'count': completed_requirements},
-            {'category': '需求單統計', 'item': '預約發派', 'count': scheduled_requirements},
-            {'category': '需求單統計', 'item': '已刪除', 'count': deleted_requirements},
-            {'category': '個人統計', 'item': '我發派的需求單', 'count': my_requirements}
+            {'category': '需求單統計', 'item': '總需求單數', 'count': requirement_stats['total']},
+            {'category': '需求單統計', 'item': '待處理', 'count': requirement_stats['pending']},
+            {'category': '需求單統計', 'item': '已提交', 'count': requirement_stats['submitted']},
+            {'category': '需求單統計', 'item': '已完成', 'count': requirement_stats['completed']},
+            {'category': '需求單統計', 'item': '預約發派', 'count': requirement_stats['scheduled']},
+            {'category': '需求單統計', 'item': '已刪除', 'count': requirement_stats['deleted']},
+            {'category': '個人統計', 'item': '我發派的需求單', 'count': requirement_stats['mine']}
         ]
         
         # 顯示統計信息
@@ -155,11 +145,11 @@ def scheduled_command(ctx, dispatch):
             req_data = []
             for req in scheduled_reqs:
                 req_data.append({
-                    'id': req[0],
-                    'title': req[1],
-                    'priority': req[3],
-                    'scheduled_time': req[4][:19] if req[4] else '',
-                    'assignee': req[5],
+                    'id': req.id,
+                    'title': req.title,
+                    'priority': req.priority,
+                    'scheduled_time': req.scheduled_time[:19] if req.scheduled_time else '',
+                    'assignee': req.assignee_name,
                     'status': '待發派'
                 })
             
@@ -198,17 +188,10 @@ def cancel_command(ctx, req_id):
             sys.exit(1)
         
         # 檢查需求單是否存在且為預約狀態
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, u.name as assignee_name
-            FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
-            WHERE r.id = ? AND r.assigner_id = ? AND r.is_dispatched = 0
-        ''', (req_id, current_user['id']))
+        requirement = get_requirement_detail(conn, req_id)
         
-        requirement = cursor.fetchone()
-        
-        if not requirement:
+        if (not requirement or requirement.is_dispatched
+                or requirement.assigner_id != current_user['id']):
             error_message(f"找不到ID為 {req_id} 的預約需求單或您沒有權限取消")
             conn.close()
             sys.exit(2)
@@ -218,8 +201,8 @@ def cancel_command(ctx, req_id):
         conn.close()
         
         if success:
-            success_message(f"成功取消預約需求單 '{requirement[1]}' (ID: {req_id})")
-            click.echo(f"原指派對象: {requirement[2]}")
+            success_message(f"成功取消預約需求單 '{requirement.title}' (ID: {req_id})")
+            click.echo(f"原指派對象: {requirement.assignee_name}")
         else:
             error_message("取消預約需求單失敗")
             sys.exit(1)
@@ -232,15 +215,20 @@ def cancel_command(ctx, req_id):
 @click.option('--restore', '-r',
               type=int,
               help='恢復指定ID的已刪除需求單')
+@click.option('--archived',
+              is_flag=True,
+              help='包含垃圾桶清除時歸檔的需求單（admin purge --archive）')
 @click.pass_context
 @require_admin
-def trash_command(ctx, restore):
+def trash_command(ctx, restore, archived):
     """管理垃圾桶中的需求單
     
-    顯示或恢復已刪除的需求單。
+    顯示或恢復已刪除的需求單。超過保留天數的需求單可用 admin purge 清除；
+    以 --archive 清除的需求單仍可用 --archived 列出並恢復。
     
     範例:
         reqmgr admin trash
+        reqmgr admin trash --archived
         reqmgr admin trash --restore 5
     """
     try:
@@ -266,7 +254,7 @@ def trash_command(ctx, restore):
                 sys.exit(1)
         else:
             # 顯示已刪除的需求單列表
-            deleted_reqs = get_deleted_requirements(conn, current_user['id'])
+            deleted_reqs = get_deleted_requirements(conn, current_user['id'], include_archived=archived)
             conn.close()
             
             if not deleted_reqs:
@@ -277,12 +265,12 @@ def trash_command(ctx, restore):
             req_data = []
             for req in deleted_reqs:
                 req_data.append({
-                    'id': req[0],
-                    'title': req[1],
-                    'status': req[3],
-                    'priority': req[4],
-                    'assignee': req[7],
-                    'deleted_at': req[8][:19] if req[8] else ''
+                    'id': req.id,
+                    'title': req.title,
+                    'status': req.status,
+                    'priority': req.priority,
+                    'assignee': req.assignee_name,
+                    'deleted_at': req.deleted_at[:19] if req.deleted_at else ''
                 })
             
             # 顯示已刪除需求單列表
@@ -349,16 +337,17 @@ def backup_command(ctx, output):
         reqmgr admin backup --output my_backup.sql
     """
     try:
-        import sqlite3
-        import os
-        
         # 檢查源數據庫是否存在
-        if not os.path.exists('requirement.db'):
-            error_message("找不到數據庫文件 requirement.db")
+        db_path = get_database_settings()['path']
+        if not os.path.exists(db_path):
+            error_message(f"找不到數據庫文件 {db_path}")
             sys.exit(1)
         
-        # 連接到源數據庫
-        source_conn = sqlite3.connect('requirement.db')
+        # 以唯讀連接讀取源數據庫（記憶體映射讀取）
+        source_conn = create_read_connection()
+        if not source_conn:
+            error_message("無法連接到資料庫")
+            sys.exit(1)
         
         # 創建備份
         with open(output, 'w', encoding='utf-8') as f:
@@ -376,4 +365,424 @@ def backup_command(ctx, output):
         
     except Exception as e:
         error_message(f"備份數據庫時發生錯誤: {e}")
-        sys.exit(1) 
\ No newline at end of file
+        sys.exit(1) 
+
+@admin_group.command('archive')
+@click.option('--days', '-d',
+              type=click.IntRange(min=0),
+              help='審核通過或失效超過此天數的需求單才歸檔 (預設: 配置文件 archive.days)')
+@click.option('--batch-size',
+              type=click.IntRange(min=1),
+              help='每個交易移動的筆數 (預設: 配置文件 archive.batch_size)')
+@click.option('--dry-run',
+              is_flag=True,
+              help='只顯示可歸檔的數量，不移動資料')
+@click.option('--yes', '-y',
+              is_flag=True,
+              help='不詢問確認（排程執行時使用）')
+@click.pass_context
+@require_admin
+def archive_command(ctx, days, batch_size, dry_run, yes):
+    """歸檔已完成與已失效的舊需求單
+    
+    將超過保留天數的已完成、已失效需求單移到歸檔表格，
+    日常的列表查詢只掃描仍在處理中的需求單。歸檔的需求單仍可用
+    'reqmgr requirement list --archived' 與 'reqmgr requirement show' 查看，
+    處理時間報表也會包含歸檔的需求單。垃圾桶中的需求單不會被歸檔。
+    
+    每批在獨立的交易中移動，執行期間其他使用者仍可正常寫入，適合以 cron 定期執行。
+    
+    範例:
+        reqmgr admin archive --dry-run
+        reqmgr admin archive --days 365 --yes
+    """
+    archive_config = ctx.obj.get('config', {}).get('archive', {})
+    days = days if days is not None else archive_config.get('days', 180)
+    batch_size = batch_size or archive_config.get('batch_size', 500)
+    
+    conn = create_connection()
+    if not conn:
+        error_message("無法連接到資料庫")
+        sys.exit(1)
+    
+    try:
+        candidates = count_archivable_requirements(conn, days)
+        if candidates is None:
+            error_message("無法計算可歸檔的需求單")
+            sys.exit(1)
+        
+        if dry_run or not candidates:
+            click.echo(f"可歸檔的需求單 (超過 {days} 天): {candidates} 筆")
+            return
+        
+        if not yes and not click.confirm(f"將 {candidates} 筆超過 {days} 天的需求單移到歸檔，是否繼續？"):
+            click.echo("操作已取消")
+            return
+        
+        start = time.perf_counter()
+        with click.progressbar(length=candidates, label='歸檔中') as bar:
+            state = {'done': 0}
+            
+            def progress(moved):
+                bar.update(moved - state['done'])
+                state['done'] = moved
+            
+            moved = archive_requirements(conn, days=days, batch_size=batch_size, progress=progress)
+        
+        if moved is None:
+            error_message("歸檔需求單失敗，已完成的批次保留在歸檔中")
+            sys.exit(1)
+        
+        success_message(f"已歸檔 {moved} 筆需求單，耗時 {time.perf_counter() - start:.1f} 秒")
+        stats = get_archive_stats(conn)
+        if stats:
+            click.echo(f"需求單表格: {stats['active']} 筆，歸檔: {stats['archived']} 筆")
+    finally:
+        conn.close()
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+@admin_group.command('purge')
+@click.option('--days', '-d',
+              type=click.IntRange(min=0),
+              help='清除刪除超過此天數的需求單 (預設: 配置文件 trash.retention_days)')
+@click.option('--batch-size',
+              type=click.IntRange(min=1),
+              help='每個交易處理的筆數 (預設: 配置文件 archive.batch_size)')
+@click.option('--archive/--delete', 'archive',
+              default=None,
+              help='移到歸檔表格或永久刪除 (預設: 配置文件 trash.archive)')
+@click.option('--no-vacuum',
+              is_flag=True,
+              help='清除後不執行 incremental_vacuum')
+@click.option('--enable-incremental-vacuum',
+              'convert_vacuum',
+              is_flag=True,
+              help='先將資料庫轉換為增量清理模式（執行一次完整 VACUUM，期間鎖定資料庫）')
+@click.option('--dry-run',
+              is_flag=True,
+              help='只顯示可清除的數量與空閒空間，不修改資料')
+@click.option('--yes', '-y',
+              is_flag=True,
+              help='不詢問確認（排程執行時使用）')
+@click.pass_context
+@require_admin
+def purge_command(ctx, days, batch_size, archive, no_vacuum, convert_vacuum, dry_run, yes):
+    """清除垃圾桶中超過保留天數的需求單
+    
+    分批永久刪除（或歸檔）刪除超過保留天數的需求單，每批在獨立的交易中處理，
+    再以 incremental_vacuum 分段將空閒空間歸還給檔案系統，並清理較早的需求單變更記錄。
+    永久刪除的需求單無法再恢復；歸檔的需求單可用 'reqmgr admin trash --archived' 列出並恢復。
+    適合以 cron 定期執行。
+    
+    範例:
+        reqmgr admin purge --dry-run
+        reqmgr admin purge --days 60 --yes
+        reqmgr admin purge --archive --yes
+    """
+    config = ctx.obj.get('config', {})
+    trash_config = config.get('trash', {})
+    days = days if days is not None else trash_config.get('retention_days', 30)
+    batch_size = batch_size or config.get('archive', {}).get('batch_size', 500)
+    archive = archive if archive is not None else bool(trash_config.get('archive', False))
+    action = '歸檔' if archive else '永久刪除'
+    
+    conn = create_connection()
+    if not conn:
+        error_message("無法連接到資料庫")
+        sys.exit(1)
+    
+    try:
+        candidates = count_purgeable_requirements(conn, days)
+        if candidates is None:
+            error_message("無法計算可清除的需求單")
+            sys.exit(1)
+        space = get_free_space(conn)
+        
+        if dry_run:
+            click.echo(f"可清除的需求單 (刪除超過 {days} 天): {candidates} 筆")
+            click.echo(f"空閒空間: {_format_bytes(space['free_pages'] * space['page_size'])}，"
+                       f"增量清理: {'已啟用' if space['auto_vacuum'] == 2 else '未啟用'}")
+            return
+        
+        if convert_vacuum and space['auto_vacuum'] != 2:
+            if not yes and not click.confirm("轉換期間會鎖定整個資料庫，是否繼續？"):
+                click.echo("操作已取消")
+                return
+            if not enable_incremental_vacuum(conn):
+                error_message("無法轉換為增量清理模式")
+                sys.exit(1)
+            success_message("已轉換為增量清理模式")
+        
+        purged = 0
+        if candidates:
+            if not yes and not click.confirm(f"將{action} {candidates} 筆刪除超過 {days} 天的需求單，是否繼續？"):
+                click.echo("操作已取消")
+                return
+            with click.progressbar(length=candidates, label='清除中') as bar:
+                state = {'done': 0}
+                
+                def progress(count):
+                    bar.update(count - state['done'])
+                    state['done'] = count
+                
+                purged = purge_deleted_requirements(conn, days=days, batch_size=batch_size,
+                                                    archive=archive, progress=progress)
+            if purged is None:
+                error_message("清除垃圾桶失敗，已完成的批次不會還原")
+                sys.exit(1)
+            success_message(f"已{action} {purged} 筆需求單")
+        else:
+            click.echo(f"垃圾桶中沒有刪除超過 {days} 天的需求單")
+        
+        trimmed = trim_requirement_changes(conn, trash_config.get('change_log_retention', 100000))
+        if trimmed:
+            click.echo(f"已清理 {trimmed} 筆較早的需求單變更記錄")
+        
+        reclaimed = {'enabled': space['auto_vacuum'] == 2, 'reclaimed_bytes': 0,
+                     'free_pages': get_free_space(conn)['free_pages']}
+        if not no_vacuum:
+            reclaimed = reclaim_free_pages(conn) or reclaimed
+            if reclaimed['enabled']:
+                click.echo(f"已歸還 {_format_bytes(reclaimed['reclaimed_bytes'])} 空間")
+            elif reclaimed['free_pages']:
+                warning_message("資料庫未啟用增量清理，空閒空間會留給之後的寫入使用；"
+                                "可使用 --enable-incremental-vacuum 轉換")
+        
+        observe_trash_purge(purged, archive, reclaimed['reclaimed_bytes'],
+                            reclaimed['free_pages'] * space['page_size'], time.time())
+    finally:
+        conn.close()
+
+def _measure_profile(path, profile, admin_id, writes, duration):
+    """在資料庫副本上量測設定檔的寫入與查詢速度
+
+    Returns:
+        dict: 每秒提交次數與每秒統計查詢次數
+    """
+    conn = sqlite3.connect(path)
+    try:
+        apply_pragmas(conn, profile, {})
+        conn.execute("DROP TABLE IF EXISTS _db_tune")
+        conn.execute("CREATE TABLE _db_tune (id INTEGER PRIMARY KEY, value TEXT)")
+        conn.commit()
+
+        # 小型寫入：每筆各自提交，反映同步設定的成本
+        start = time.perf_counter()
+        for i in range(writes):
+            conn.execute("INSERT INTO _db_tune (value) VALUES (?)", (str(i),))
+            conn.commit()
+        commits_per_s = writes / (time.perf_counter() - start)
+
+        # 查詢：重複執行統計查詢（第一次為冷快取）
+        queries = 0
+        start = time.perf_counter()
+        while True:
+            get_requirement_stats(conn, admin_id)
+            queries += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= duration:
+                break
+
+        conn.execute("DROP TABLE _db_tune")
+        conn.commit()
+        return {'commits_per_s': round(commits_per_s), 'stats_queries_per_s': round(queries / elapsed)}
+    finally:
+        conn.close()
+
+@admin_group.command('db-tune')
+@click.option('--profile', '-p', 'profiles',
+              multiple=True,
+              type=click.Choice(list(PRAGMA_PROFILES)),
+              help='只量測指定的設定檔（可重複指定，預設: 全部）')
+@click.option('--writes',
+              type=int,
+              default=200,
+              help='每個設定檔量測的提交次數 (預設: 200)')
+@click.option('--duration',
+              type=float,
+              default=1.0,
+              help='每個設定檔量測查詢的秒數 (預設: 1.0)')
+@click.option('--no-measure',
+              is_flag=True,
+              help='只顯示目前設定，不進行量測')
+@click.pass_context
+@require_admin
+def db_tune_command(ctx, profiles, writes, duration, no_measure):
+    """顯示資料庫效能設定並量測各設定檔的效果
+    
+    列出設定檔指定的 PRAGMA 與資料庫實際生效的值，
+    再將資料庫複製到暫存目錄，依序以各設定檔量測小型寫入與統計查詢的速度。
+    量測只在副本上進行，不會修改正式資料庫。
+    
+    在配置文件的 database.profile 與 database.pragmas 中調整設定，
+    或以環境變量 REQMGR_DB_PROFILE 暫時切換（例如夜間批次作業使用 bulk-load）。
+    
+    範例:
+        reqmgr admin db-tune
+        reqmgr admin db-tune --no-measure
+        reqmgr admin db-tune -p balanced -p fast --writes 500
+    """
+    try:
+        current_user = get_current_user()
+        settings = get_database_settings()
+        
+        conn = create_connection()
+        if not conn:
+            error_message("無法連接到資料庫")
+            sys.exit(1)
+        
+        settings_data = []
+        for name in TUNABLE_PRAGMAS:
+            effective = conn.execute(f"PRAGMA {name}").fetchone()[0]
+            settings_data.append({
+                'pragma': name,
+                'configured': settings['pragmas'].get(name, ''),
+                'effective': effective,
+            })
+        conn.close()
+        
+        format_output(settings_data, ['pragma', 'configured', 'effective'],
+                      title=f"資料庫設定 ({settings['path']}，設定檔: {settings['profile']})",
+                      ctx=ctx)
+        if no_measure:
+            return
+        
+        # 在資料庫副本上量測，避免影響正式資料
+        with tempfile.TemporaryDirectory() as tmpdir:
+            copy_path = os.path.join(tmpdir, 'tune.db')
+            source = create_read_connection()
+            if not source:
+                error_message("無法連接到資料庫")
+                sys.exit(1)
+            target = sqlite3.connect(copy_path)
+            source.backup(target)
+            target.close()
+            source.close()
+            
+            results = []
+            for profile in profiles or PRAGMA_PROFILES:
+                pragmas = PRAGMA_PROFILES[profile]
+                row = {
+                    'profile': profile,
+                    'synchronous': pragmas['synchronous'],
+                    'cache_size': pragmas['cache_size'],
+                    'mmap_size': pragmas['mmap_size'],
+                }
+                row.update(_measure_profile(copy_path, profile, current_user['id'], writes, duration))
+                results.append(row)
+        
+        format_output(results,
+                      ['profile', 'synchronous', 'cache_size', 'mmap_size',
+                       'commits_per_s', 'stats_queries_per_s'],
+                      title="設定檔量測結果", ctx=ctx)
+        
+    except Exception as e:
+        error_message(f"量測資料庫設定時發生錯誤: {e}")
+        sys.exit(1)
+
+@admin_group.group('report')
+def report_group():
+    """統計報表相關命令"""
+    pass
+
+def _parse_report_date(value, option_name):
+    """解析報表日期參數 (YYYY-MM-DD，本地時間的當天零時)，返回 epoch 秒"""
+    try:
+        return time.mktime(datetime.strptime(value, '%Y-%m-%d').timetuple())
+    except ValueError:
+        error_message(f"{option_name} 日期格式錯誤，請使用 YYYY-MM-DD")
+        sys.exit(2)
+
+def _hours(seconds):
+    """將秒數轉換為小時（保留一位小數）"""
+    return '' if seconds is None else round(seconds / 3600.0, 1)
+
+def _sla_row(group_name, group):
+    """將報表分組轉換為輸出列"""
+    turnaround = group['turnaround'].summary()
+    review = group['review'].summary()
+    return {
+        'group': group_name,
+        'completed': turnaround['count'],
+        'turnaround_p50_h': _hours(turnaround['p50']),
+        'turnaround_p95_h': _hours(turnaround['p95']),
+        'review_p50_h': _hours(review['p50']),
+        'review_p95_h': _hours(review['p95']),
+        'open': group.get('open', ''),
+        'overdue': group.get('overdue', ''),
+    }
+
+@report_group.command('sla')
+@click.option('--days', '-d',
+              type=int,
+              default=90,
+              help='只統計最近 N 天建立的需求單，0 表示全部 (預設: 90)')
+@click.option('--since',
+              help='統計起始日期 (YYYY-MM-DD)，優先於 --days')
+@click.option('--until',
+              help='統計結束日期 (YYYY-MM-DD，不含當天)')
+@click.option('--overdue-days',
+              type=int,
+              default=7,
+              help='未完成超過 N 天視為逾期 (預設: 7)')
+@click.pass_context
+@require_admin
+def sla_report_command(ctx, days, since, until, overdue_days):
+    """需求單處理時間與逾期報表
+    
+    依員工與緊急程度統計處理時間（發派到提交）與審核時間（提交到審核通過）
+    的中位數與 95 百分位，以及目前的未完成與逾期數量。時間單位為小時。
+    百分位數由對數直方圖估算，為近似值（相對誤差約 2.5% 以內）。
+    
+    範例:
+        reqmgr admin report sla
+        reqmgr admin report sla --days 30 --overdue-days 3
+        reqmgr --format json admin report sla --since 2024-01-01 --until 2025-01-01
+    """
+    try:
+        now = time.time()
+        if since:
+            since_ts = _parse_report_date(since, '--since')
+        else:
+            since_ts = now - days * 86400 if days > 0 else None
+        until_ts = _parse_report_date(until, '--until') if until else None
+        
+        # 報表只讀取資料，使用記憶體映射的唯讀連接
+        conn = create_read_connection()
+        if not conn:
+            error_message("無法連接到資料庫")
+            sys.exit(1)
+        
+        snapshot = get_snapshot(conn)
+        names = get_user_names(conn)
+        conn.close()
+        
+        if snapshot is None:
+            error_message("無法載入需求單資料")
+            sys.exit(1)
+        
+        report = snapshot.sla_report(since=since_ts, until=until_ts,
+                                     overdue_after=overdue_days * 86400, now=now)
+        
+        report_data = []
+        for staff_id, group in sorted(report['staff'].items()):
+            report_data.append(_sla_row(f"員工: {names.get(staff_id, staff_id)}", group))
+        priority_names = {PRIORITY_CODES['urgent']: '緊急', PRIORITY_CODES['normal']: '普通'}
+        for code, group in sorted(report['priority'].items(), reverse=True):
+            report_data.append(_sla_row(f"緊急程度: {priority_names[code]}", group))
+        report_data.append(_sla_row("全部", report['total']))
+        
+        format_output(report_data,
+                      ['group', 'completed', 'turnaround_p50_h', 'turnaround_p95_h',
+                       'review_p50_h', 'review_p95_h', 'open', 'overdue'],
+                      title="需求單處理時間報表 (小時，P50/P95 為近似值，誤差約 ±2.5%)", ctx=ctx)
+        
+    except Exception as e:
+        error_message(f"產生報表時發生錯誤: {e}")
+        sys.exit(1)
@@ -16,18 +16,20 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from database import create_connection, get_user_by_username
+from credentials import check_credentials
+from rate_limit import login_limiter, login_keys, local_client
 from cli.utils.session import save_session as save_user_session, load_session, clear_session
 from cli.utils.formatter import format_output, success_message, error_message
 
 class UserInfo:
     """用戶信息類"""
     def __init__(self, user_data):
-        self.id = user_data[0]
-        self.username = user_data[1]
-        self.password = user_data[2]  # 實際使用中不會暴露
-        self.name = user_data[3]
-        self.email = user_data[4]
-        self.role = user_data[5]
+        self.id = user_data.id
+        self.username = user_data.username
+        self.password = user_data.password  # 實際使用中不會暴露
+        self.name = user_data.name
+        self.email = user_data.email
+        self.role = user_data.role
 
 def authenticate_user(username, password):
     """驗證用戶登入"""
@@ -36,15 +38,26 @@ def authenticate_user(username, password):
         if not conn:
             return {'success': False, 'message': '無法連接到資料庫'}
         
-        user_data = get_user_by_username(conn, username)
-        conn.close()
+        # 先檢查登入失敗次數，被鎖定時不查詢用戶也不驗證密碼
+        keys = login_keys(username, local_client())
+        wait = login_limiter.check(conn, keys)
+        if wait:
+            conn.close()
+            return {'success': False, 'message': f'登入失敗次數過多，請在 {wait} 秒後再試'}
         
-        if not user_data:
+        if not get_user_by_username(conn, username):
+            login_limiter.record_failure(conn, keys)
+            conn.close()
             return {'success': False, 'message': '用戶不存在'}
         
-        # 檢查密碼（這裡簡化處理，實際應該使用加密比較）
-        if user_data[2] != password:
+        # 檢查密碼雜湊（舊版明文密碼驗證成功後自動升級為雜湊）
+        user_data = check_credentials(conn, username, password)
+        if not user_data:
+            login_limiter.record_failure(conn, keys)
+            conn.close()
             return {'success': False, 'message': '密碼錯誤'}
+        login_limiter.record_success(conn, keys[:1])
+        conn.close()
         
         user_info = UserInfo(user_data)
         return {'success': True, 'user_info': user_info}
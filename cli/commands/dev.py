@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+開發與測試工具命令
+
+提供產生大量測試資料等開發用功能，不應在正式資料庫上使用。
+"""
+
+import click
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from database import configure_database, create_connection, get_database_settings
+from seed_data import seed_database, DEFAULT_PREFIX, DEFAULT_PASSWORD
+from cli.utils.formatter import success_message, error_message, warning_message
+
+@click.group()
+def dev_group():
+    """開發與測試工具"""
+    pass
+
+@dev_group.command('seed')
+@click.option('--users', '-u',
+              type=click.IntRange(1),
+              default=50,
+              help='員工數量 (預設: 50)')
+@click.option('--admins',
+              type=click.IntRange(1),
+              default=2,
+              help='管理員數量 (預設: 2)')
+@click.option('--requirements', '-r',
+              type=click.IntRange(0),
+              default=10000,
+              help='需求單數量 (預設: 10000)')
+@click.option('--days',
+              type=click.IntRange(1),
+              default=365,
+              help='需求單建立時間分布的天數 (預設: 365)')
+@click.option('--prefix',
+              default=DEFAULT_PREFIX,
+              help=f'測試使用者名稱前綴 (預設: {DEFAULT_PREFIX})')
+@click.option('--password',
+              default=DEFAULT_PASSWORD,
+              help=f'測試使用者的密碼 (預設: {DEFAULT_PASSWORD})')
+@click.option('--seed', 'random_seed',
+              type=int,
+              help='亂數種子，相同種子產生相同的資料')
+@click.option('--batch-size',
+              type=click.IntRange(1),
+              default=50000,
+              help='每次提交的筆數 (預設: 50000)')
+@click.option('--db', 'db_path',
+              type=click.Path(dir_okay=False),
+              help='寫入指定的資料庫文件（預設: 配置文件中的資料庫）')
+@click.option('--yes', '-y',
+              is_flag=True,
+              help='不詢問確認')
+@click.pass_context
+def seed_command(ctx, users, admins, requirements, days, prefix, password, random_seed,
+                 batch_size, db_path, yes):
+    """產生效能測試用的大量資料
+
+    建立指定數量的測試使用者與需求單，狀態、優先級、預約發派與刪除的比例
+    接近正式環境，描述長度不一。已存在的測試使用者會沿用，需求單則每次新增。
+
+    寫入期間會暫時移除需求單的列表索引，請勿在其他程式使用同一個資料庫時執行。
+
+    範例:
+        reqmgr dev seed --db load.db -u 200 -r 1000000
+        reqmgr dev seed -r 50000 --seed 42 --yes
+    """
+    if not re.match(r'^[A-Za-z0-9]+$', prefix):
+        error_message("使用者名稱前綴只能包含英文字母與數字")
+        sys.exit(2)
+
+    if db_path:
+        configure_database(path=db_path)
+    path = get_database_settings()['path']
+
+    if not yes:
+        if os.path.exists(path):
+            warning_message(f"將在現有資料庫 {path} 中新增 {requirements} 筆需求單")
+        if not click.confirm("確定要產生測試資料嗎？"):
+            click.echo("操作已取消")
+            return
+
+    try:
+        conn = create_connection()
+        if not conn:
+            error_message("無法連接到資料庫")
+            sys.exit(1)
+
+        start = time.perf_counter()
+
+        def progress(written, total):
+            if not ctx.obj.get('quiet'):
+                elapsed = time.perf_counter() - start
+                click.echo(f"\r已寫入 {written}/{total} 筆需求單 ({elapsed:.1f} 秒)", nl=False)
+
+        result = seed_database(conn, users, requirements, admins=admins, prefix=prefix,
+                               password=password, days=days, batch_size=batch_size,
+                               seed=random_seed, progress=progress)
+        conn.close()
+        elapsed = time.perf_counter() - start
+        if requirements and not ctx.obj.get('quiet'):
+            click.echo()
+
+        success_message(f"已產生 {len(result['admin_ids'])} 位管理員、{len(result['staff_ids'])} 位員工"
+                        f"與 {result['requirements']} 筆需求單 ({elapsed:.1f} 秒)")
+        click.echo(f"資料庫: {path}")
+        click.echo(f"測試帳號: {prefix}_admin0000 / {prefix}_staff000000，密碼: {password}")
+
+    except Exception as e:
+        error_message(f"產生測試資料時發生錯誤: {e}")
+        sys.exit(1)
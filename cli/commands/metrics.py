@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+營運指標命令
+
+以 Prometheus 文字格式匯出保存在資料庫中的營運指標。
+"""
+
+import click
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from database import create_connection
+from metrics import render, write_textfile, is_enabled
+from cli.utils.formatter import success_message, error_message
+
+@click.command('metrics')
+@click.option('--output', '-o',
+              type=click.Path(dir_okay=False),
+              help='寫入文字檔（供 node_exporter textfile collector 讀取），預設輸出到終端')
+def metrics_command(output):
+    """匯出 Prometheus 文字格式的營運指標
+
+    包含排程器、資料庫語句、CLI 命令與 API 請求的指標。
+    CLI 與 GUI 需以 REQMGR_METRICS=1 或配置文件 metrics.enabled 啟用後才會保存指標。
+
+    範例:
+        reqmgr metrics
+        reqmgr metrics -o /var/lib/node_exporter/textfile/reqmgr.prom
+    """
+    conn = create_connection()
+    if conn is None:
+        error_message("無法連接到資料庫")
+        sys.exit(1)
+
+    try:
+        if output:
+            write_textfile(output, conn)
+            success_message(f"營運指標已寫入 {output}")
+        else:
+            click.echo(render(conn), nl=False)
+        if not is_enabled():
+            # 輸出到 stderr，不影響導向到文件的指標內容
+            click.echo("⚠️  營運指標未啟用，只包含其他已啟用的進程保存的數值", err=True)
+    except OSError as e:
+        error_message(f"無法寫入文字檔: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
@@ -18,8 +18,9 @@ sys.path.insert(0, str(project_root))
 from database import (
     create_connection, create_requirement, get_user_requirements, 
     get_admin_dispatched_requirements, submit_requirement, approve_requirement,
-    reject_requirement, get_user_by_username, get_all_staff
+    reject_requirement, get_user_by_username, get_all_staff, get_requirement_detail
 )
+from assignment import choose_assignee
 from cli.utils.session import require_auth, get_current_user
 from cli.utils.formatter import format_output, success_message, error_message, warning_message
 
@@ -35,9 +36,12 @@ def requirement_group():
               help='篩選需求單狀態')
 @click.option('--assignee', '-a',
               help='篩選指派給特定用戶的需求單 (用戶名)')
+@click.option('--archived',
+              is_flag=True,
+              help='包含已歸檔的歷史需求單')
 @click.pass_context
 @require_auth
-def list_requirements_command(ctx, status, assignee):
+def list_requirements_command(ctx, status, assignee, archived):
     """列出需求單
     
     顯示當前用戶相關的需求單。管理員可以看到所有發派的需求單，
@@ -47,6 +51,7 @@ def list_requirements_command(ctx, status, assignee):
         reqmgr requirement list
         reqmgr requirement list --status pending
         reqmgr requirement list --assignee user1
+        reqmgr requirement list --status completed --archived
     """
     try:
         current_user = get_current_user()
@@ -62,11 +67,11 @@ def list_requirements_command(ctx, status, assignee):
         # 根據用戶角色獲取需求單
         if current_user['role'] == 'admin':
             # 管理員可以看到所有發派的需求單
-            requirements = get_admin_dispatched_requirements(conn, current_user['id'])
+            requirements = get_admin_dispatched_requirements(conn, current_user['id'], include_archived=archived)
             title = "管理員發派的需求單"
         else:
             # 員工只能看到指派給自己的需求單
-            requirements = get_user_requirements(conn, current_user['id'])
+            requirements = get_user_requirements(conn, current_user['id'], include_archived=archived)
             title = "我的需求單"
         
         conn.close()
@@ -78,26 +83,24 @@ def list_requirements_command(ctx, status, assignee):
         # 格式化需求單數據
         req_data = []
         for req in requirements:
-            # 處理不同的數據結構
+            # 列表查詢只包含摘要欄位，描述與完成說明請使用 'requirement show' 查看
             if current_user['role'] == 'admin':  # 管理員視圖
                 req_info = {
-                    'id': req[0],
-                    'title': req[1],
-                    'status': req[3],
-                    'priority': req[4],
-                    'created_at': req[5][:19] if req[5] else '',
-                    'assignee': req[6],
-                    'comment': req[9] if len(req) > 9 and req[9] else ''
+                    'id': req.id,
+                    'title': req.title,
+                    'status': req.status,
+                    'priority': req.priority,
+                    'created_at': req.created_at[:19] if req.created_at else '',
+                    'assignee': req.assignee_name
                 }
             else:  # 員工視圖
                 req_info = {
-                    'id': req[0],
-                    'title': req[1],
-                    'status': req[3],
-                    'priority': req[4],
-                    'created_at': req[5][:19] if req[5] else '',
-                    'assigner': req[6],
-                    'comment': req[8] if len(req) > 8 and req[8] else ''
+                    'id': req.id,
+                    'title': req.title,
+                    'status': req.status,
+                    'priority': req.priority,
+                    'created_at': req.created_at[:19] if req.created_at else '',
+                    'assigner': req.assigner_name
                 }
             
             # 狀態篩選
@@ -106,7 +109,7 @@ def list_requirements_command(ctx, status, assignee):
             
             # 指派對象篩選（僅管理員）
             if assignee and current_user['role'] == 'admin':
-                if req[6].lower() != assignee.lower():
+                if req.assignee_name.lower() != assignee.lower():
                     continue
             
             req_data.append(req_info)
@@ -155,42 +158,32 @@ def show_requirement_command(ctx, req_id):
             error_message("無法連接到資料庫")
             sys.exit(1)
         
-        # 獲取需求單詳情
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.description, r.status, r.priority, r.created_at,
-                   u1.name as assigner_name, u2.name as assignee_name, r.comment, r.completed_at
-            FROM requirements r
-            JOIN users u1 ON r.assigner_id = u1.id
-            JOIN users u2 ON r.assignee_id = u2.id
-            WHERE r.id = ? AND r.is_deleted = 0
-        ''', (req_id,))
-        
-        requirement = cursor.fetchone()
+        # 按需載入需求單詳情（包含描述與完成說明），已歸檔的需求單同樣可以查看
+        requirement = get_requirement_detail(conn, req_id, include_archived=True)
         conn.close()
         
-        if not requirement:
+        if not requirement or requirement.is_deleted:
             error_message(f"找不到ID為 {req_id} 的需求單")
             sys.exit(2)
         
         # 檢查權限：員工只能查看指派給自己的需求單
         if current_user['role'] == 'staff':
-            if requirement[7] != current_user['name']:
+            if requirement.assignee_id != current_user['id']:
                 error_message("您沒有權限查看此需求單")
                 sys.exit(3)
         
         # 格式化需求單詳細信息
         req_data = {
-            'id': requirement[0],
-            'title': requirement[1],
-            'description': requirement[2][:100] + '...' if len(requirement[2]) > 100 else requirement[2],
-            'status': requirement[3],
-            'priority': requirement[4],
-            'created_at': requirement[5][:19] if requirement[5] else '',
-            'assigner': requirement[6],
-            'assignee': requirement[7],
-            'comment': requirement[8] if requirement[8] else '無',
-            'completed_at': requirement[9][:19] if requirement[9] else '未完成'
+            'id': requirement.id,
+            'title': requirement.title,
+            'description': requirement.description[:100] + '...' if len(requirement.description) > 100 else requirement.description,
+            'status': requirement.status,
+            'priority': requirement.priority,
+            'created_at': requirement.created_at[:19] if requirement.created_at else '',
+            'assigner': requirement.assigner_name,
+            'assignee': requirement.assignee_name,
+            'comment': requirement.comment if requirement.comment else '無',
+            'completed_at': requirement.completed_at[:19] if requirement.completed_at else '未完成'
         }
         
         # 顯示需求單詳情
@@ -203,7 +196,7 @@ def show_requirement_command(ctx, req_id):
         if ctx.obj.get('format', 'table') == 'table':
             click.echo(f"\n完整描述:")
             click.echo("=" * 50)
-            click.echo(requirement[2])
+            click.echo(requirement.description)
         
     except Exception as e:
         error_message(f"獲取需求單詳情時發生錯誤: {e}")
@@ -218,7 +211,7 @@ def show_requirement_command(ctx, req_id):
               help='需求單描述')
 @click.option('--assignee', '-a',
               required=True,
-              help='指派給的用戶 (用戶名)')
+              help='指派給的用戶 (用戶名)，auto 表示自動分配給負載最低的員工')
 @click.option('--priority', '-p',
               type=click.Choice(['normal', 'urgent'], case_sensitive=False),
               default='normal',
@@ -236,6 +229,7 @@ def create_requirement_command(ctx, title, description, assignee, priority, sche
         reqmgr requirement create -t "測試需求" -d "這是一個測試需求單" -a user1
         reqmgr requirement create -t "緊急任務" -d "緊急處理" -a staff1 -p urgent
         reqmgr requirement create -t "預約任務" -d "明天執行" -a user1 -s "2024-01-15 09:00"
+        reqmgr requirement create -t "例行任務" -d "自動分配" -a auto
     """
     try:
         current_user = get_current_user()
@@ -253,14 +247,23 @@ def create_requirement_command(ctx, title, description, assignee, priority, sche
             error_message("無法連接到資料庫")
             sys.exit(1)
         
-        # 檢查指派對象是否存在
-        assignee_user = get_user_by_username(conn, assignee)
-        if not assignee_user:
-            error_message(f"找不到用戶 '{assignee}'")
-            conn.close()
-            sys.exit(2)
+        if assignee.lower() == 'auto':
+            # 自動分配給目前負載最低的員工
+            assignee_user = choose_assignee(conn, priority.lower())
+            if not assignee_user:
+                error_message("沒有可自動分配的員工")
+                conn.close()
+                sys.exit(2)
+            assignee = assignee_user.username
+        else:
+            # 檢查指派對象是否存在
+            assignee_user = get_user_by_username(conn, assignee)
+            if not assignee_user:
+                error_message(f"找不到用戶 '{assignee}'")
+                conn.close()
+                sys.exit(2)
         
-        assignee_id = assignee_user[0]
+        assignee_id = assignee_user.id
         
         # 處理預約時間
         scheduled_time = None
@@ -348,30 +351,22 @@ def submit_requirement_command(ctx, req_id, message):
             sys.exit(1)
         
         # 檢查需求單是否存在且屬於當前用戶
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.status, u.name as assignee_name
-            FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
-            WHERE r.id = ? AND r.is_deleted = 0
-        ''', (req_id,))
-        
-        requirement = cursor.fetchone()
+        requirement = get_requirement_detail(conn, req_id)
         
-        if not requirement:
+        if not requirement or requirement.is_deleted:
             error_message(f"找不到ID為 {req_id} 的需求單")
             conn.close()
             sys.exit(2)
         
         # 檢查權限：只能提交指派給自己的需求單
-        if requirement[3] != current_user['name']:
+        if requirement.assignee_id != current_user['id']:
             error_message("您只能提交指派給自己的需求單")
             conn.close()
             sys.exit(3)
         
         # 檢查狀態：只能提交待處理的需求單
-        if requirement[2] != 'pending':
-            error_message(f"需求單狀態為 '{requirement[2]}'，無法提交")
+        if requirement.status != 'pending':
+            error_message(f"需求單狀態為 '{requirement.status}'，無法提交")
             conn.close()
             sys.exit(2)
         
@@ -380,7 +375,7 @@ def submit_requirement_command(ctx, req_id, message):
         conn.close()
         
         if success:
-            success_message(f"成功提交需求單 '{requirement[1]}' (ID: {req_id})")
+            success_message(f"成功提交需求單 '{requirement.title}' (ID: {req_id})")
             click.echo(f"提交說明: {message}")
         else:
             error_message("提交需求單失敗")
@@ -423,24 +418,17 @@ def approve_requirement_command(ctx, req_id):
             sys.exit(1)
         
         # 檢查需求單狀態
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.status, u.name as assignee_name
-            FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
-            WHERE r.id = ? AND r.assigner_id = ? AND r.is_deleted = 0
-        ''', (req_id, current_user['id']))
+        requirement = get_requirement_detail(conn, req_id)
         
-        requirement = cursor.fetchone()
-        
-        if not requirement:
+        if (not requirement or requirement.is_deleted
+                or requirement.assigner_id != current_user['id']):
             error_message(f"找不到ID為 {req_id} 的需求單或您沒有權限審核")
             conn.close()
             sys.exit(2)
         
         # 檢查狀態：只能審核已提交的需求單
-        if requirement[2] != 'submitted':
-            error_message(f"需求單狀態為 '{requirement[2]}'，無法審核")
+        if requirement.status != 'submitted':
+            error_message(f"需求單狀態為 '{requirement.status}'，無法審核")
             conn.close()
             sys.exit(2)
         
@@ -449,8 +437,8 @@ def approve_requirement_command(ctx, req_id):
         conn.close()
         
         if success:
-            success_message(f"成功審核通過需求單 '{requirement[1]}' (ID: {req_id})")
-            click.echo(f"執行者: {requirement[3]}")
+            success_message(f"成功審核通過需求單 '{requirement.title}' (ID: {req_id})")
+            click.echo(f"執行者: {requirement.assignee_name}")
         else:
             error_message("審核需求單失敗")
             sys.exit(1)
@@ -492,24 +480,17 @@ def reject_requirement_command(ctx, req_id):
             sys.exit(1)
         
         # 檢查需求單狀態
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.status, u.name as assignee_name
-            FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
-            WHERE r.id = ? AND r.assigner_id = ? AND r.is_deleted = 0
-        ''', (req_id, current_user['id']))
-        
-        requirement = cursor.fetchone()
+        requirement = get_requirement_detail(conn, req_id)
         
-        if not requirement:
+        if (not requirement or requirement.is_deleted
+                or requirement.assigner_id != current_user['id']):
             error_message(f"找不到ID為 {req_id} 的需求單或您沒有權限審核")
             conn.close()
             sys.exit(2)
         
         # 檢查狀態：只能審核已提交的需求單
-        if requirement[2] != 'submitted':
-            error_message(f"需求單狀態為 '{requirement[2]}'，無法審核")
+        if requirement.status != 'submitted':
+            error_message(f"需求單狀態為 '{requirement.status}'，無法審核")
             conn.close()
             sys.exit(2)
         
@@ -518,8 +499,8 @@ def reject_requirement_command(ctx, req_id):
         conn.close()
         
         if success:
-            success_message(f"已拒絕需求單 '{requirement[1]}' (ID: {req_id})")
-            click.echo(f"執行者: {requirement[3]}")
+            success_message(f"已拒絕需求單 '{requirement.title}' (ID: {req_id})")
+            click.echo(f"執行者: {requirement.assignee_name}")
             click.echo("需求單狀態已重置為待處理，員工可重新提交")
         else:
             error_message("拒絕需求單失敗")
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+API 伺服器命令
+
+以 HTTP/JSON 提供需求單操作，供其他工具直接呼叫而不必解析 CLI 輸出。
+"""
+
+import click
+import sys
+from pathlib import Path
+
+# 添加專案根目錄到 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from api_server import run_server
+from cli.utils.formatter import success_message, error_message
+
+@click.command('serve')
+@click.option('--host',
+              help='監聽位址 (預設: 配置文件 server.host)')
+@click.option('--port', '-p',
+              type=int,
+              help='監聽埠號 (預設: 配置文件 server.port)')
+@click.option('--workers', '-w',
+              type=click.IntRange(1, 64),
+              help='資料庫工作執行緒數量 (預設: 配置文件 server.workers)')
+@click.pass_context
+def serve_command(ctx, host, port, workers):
+    """啟動 HTTP/JSON API 伺服器
+    
+    提供需求單列表、詳情、創建、提交、審核與統計等 API，
+    使用 HTTP Basic 認證（帳號密碼與登入相同）。按 Ctrl+C 停止。
+    
+    範例:
+        reqmgr serve
+        reqmgr serve --host 0.0.0.0 --port 9000 --workers 8
+    """
+    server_config = ctx.obj.get('config', {}).get('server', {})
+    host = host or server_config.get('host', '127.0.0.1')
+    port = port or server_config.get('port', 8080)
+    workers = workers or server_config.get('workers', 4)
+    
+    success_message(f"API 伺服器已啟動: http://{host}:{port} (工作執行緒: {workers})")
+    try:
+        run_server(host, port, workers)
+    except OSError as e:
+        error_message(f"無法啟動 API 伺服器: {e}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        click.echo("\nAPI 伺服器已停止")
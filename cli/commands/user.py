@@ -14,7 +14,7 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from database import create_connection, get_all_users, get_all_staff, get_all_admins, get_user_by_id, create_user
+from database import create_connection, get_all_users, get_all_staff, get_all_admins, get_user_by_id, create_user, update_user
 from cli.utils.session import require_auth, get_current_user
 from cli.utils.formatter import format_output, success_message, error_message, warning_message
 
@@ -67,11 +67,11 @@ def list_users_command(ctx, role):
         user_data = []
         for user in users:
             user_data.append({
-                'id': user[0],
-                'username': user[1],
-                'name': user[3],
-                'email': user[4],
-                'role': user[5]
+                'id': user.id,
+                'username': user.username,
+                'name': user.name,
+                'email': user.email,
+                'role': user.role
             })
         
         # 顯示用戶列表
@@ -113,12 +113,12 @@ def show_user_command(ctx, user_id):
         
         # 格式化用戶詳細信息
         user_data = {
-            'id': user[0],
-            'username': user[1],
-            'name': user[3],
-            'email': user[4],
-            'role': user[5],
-            'created_at': user[6] if len(user) > 6 else '未知'
+            'id': user.id,
+            'username': user.username,
+            'name': user.name,
+            'email': user.email,
+            'role': user.role,
+            'created_at': '未知'
         }
         
         # 顯示用戶詳情
@@ -266,53 +266,41 @@ def update_user_command(ctx, user_id, name, email, password, role):
             conn.close()
             sys.exit(2)
         
-        # 構建更新語句
-        update_fields = []
-        params = []
+        # 收集要更新的欄位
+        update_fields = {}
         
         if name:
-            update_fields.append("name = ?")
-            params.append(name)
+            update_fields['name'] = name
         
         if email:
             if '@' not in email:
                 error_message("請提供有效的電子郵件地址")
                 conn.close()
                 sys.exit(2)
-            update_fields.append("email = ?")
-            params.append(email)
+            update_fields['email'] = email
         
         if password:
             if len(password) < 6:
                 error_message("密碼至少需要6個字符")
                 conn.close()
                 sys.exit(2)
-            update_fields.append("password = ?")
-            params.append(password)
+            update_fields['password'] = password
         
         if role:
-            update_fields.append("role = ?")
-            params.append(role.lower())
+            update_fields['role'] = role.lower()
         
-        params.append(user_id)
-        
-        # 執行更新
-        cursor = conn.cursor()
-        update_sql = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
-        cursor.execute(update_sql, params)
-        conn.commit()
-        
-        if cursor.rowcount > 0:
+        # 執行更新（透過 database.update_user 以同步使用者目錄快取）
+        if update_user(conn, user_id, **update_fields):
             success_message(f"成功更新用戶 ID {user_id} 的信息")
             
             # 顯示更新後的用戶信息
             updated_user = get_user_by_id(conn, user_id)
             user_data = {
-                'id': updated_user[0],
-                'username': updated_user[1],
-                'name': updated_user[3],
-                'email': updated_user[4],
-                'role': updated_user[5]
+                'id': updated_user.id,
+                'username': updated_user.username,
+                'name': updated_user.name,
+                'email': updated_user.email,
+                'role': updated_user.role
             }
             
             format_output([user_data], ['id', 'username', 'name', 'email', 'role'],
@@ -14,6 +14,7 @@
 
 import sys
 import os
+import time
 import click
 from pathlib import Path
 
@@ -25,13 +26,57 @@ from cli.commands.auth import auth_group
 from cli.commands.user import user_group
 from cli.commands.requirement import requirement_group
 from cli.commands.admin import admin_group
-from cli.utils.config import load_config
+from cli.commands.serve import serve_command
+from cli.commands.dev import dev_group
+from cli.commands.metrics import metrics_command
+from cli.utils.config import load_config, get_database_path
+from database import configure_database
+from credentials import configure_credentials
+from query_profiler import configure_profiling
+from metrics import configure_metrics, record_cli_command
 from cli.utils.formatter import setup_output_format
+from cli.utils.profiler import CommandProfiler, SORT_KEYS
 
 # 全局配置
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 
-@click.group(context_settings=CONTEXT_SETTINGS)
+class MetricsGroup(click.Group):
+    """記錄每個命令執行時間的命令組（營運指標 reqmgr_cli_command_duration_seconds）"""
+
+    def resolve_command(self, ctx, args):
+        cmd_name, cmd, rest = super().resolve_command(ctx, args)
+        # 解析完整的命令名稱，例如 "admin report sla"
+        names = [cmd_name]
+        command = cmd
+        for arg in rest:
+            if not isinstance(command, click.Group):
+                break
+            command = command.get_command(ctx, arg)
+            if command is None:
+                break
+            names.append(arg)
+        ctx.meta['metrics_command'] = ' '.join(names)
+        return cmd_name, cmd, rest
+
+    def invoke(self, ctx):
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            result = super().invoke(ctx)
+            status = 'ok'
+            return result
+        except click.exceptions.Exit as e:
+            status = 'ok' if e.exit_code == 0 else 'error'
+            raise
+        except SystemExit as e:
+            status = 'ok' if not e.code else 'error'
+            raise
+        finally:
+            command = ctx.meta.get('metrics_command')
+            if command:
+                record_cli_command(command, status, time.perf_counter() - start)
+
+@click.group(cls=MetricsGroup, context_settings=CONTEXT_SETTINGS)
 @click.option('--config', '-c', 
               type=click.Path(exists=True),
               help='指定配置文件路徑')
@@ -45,9 +90,24 @@ CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 @click.option('--quiet', '-q', 
               is_flag=True,
               help='靜默模式')
+@click.option('--profile',
+              is_flag=True,
+              envvar='REQMGR_CPROFILE',
+              help='以 cProfile 分析命令，結束時輸出函數時間與 SQL/Python 時間報表')
+@click.option('--profile-memory',
+              is_flag=True,
+              envvar='REQMGR_CPROFILE_MEMORY',
+              help='同時以 tracemalloc 記錄記憶體峰值與配置位置（較慢）')
+@click.option('--profile-sort',
+              type=click.Choice(SORT_KEYS),
+              default='cumulative',
+              help='函數列表的排序方式 (預設: cumulative)')
+@click.option('--profile-output',
+              type=click.Path(dir_okay=False),
+              help='將效能分析報表寫入文件（預設輸出到標準錯誤）')
 @click.version_option(version='0.1.0', prog_name='reqmgr')
 @click.pass_context
-def cli(ctx, config, format, verbose, quiet):
+def cli(ctx, config, format, verbose, quiet, profile, profile_memory, profile_sort, profile_output):
     """需求管理系統命令行工具
     
     這個工具提供了完整的需求管理系統命令行操作能力，
@@ -62,6 +122,20 @@ def cli(ctx, config, format, verbose, quiet):
     else:
         ctx.obj['config'] = load_config()
     
+    # 套用資料庫路徑與效能設定檔（設定無效時由 main() 顯示錯誤）
+    db_config = ctx.obj['config'].get('database', {})
+    configure_database(path=get_database_path(ctx.obj['config']),
+                       profile=db_config.get('profile'),
+                       pragmas=db_config.get('pragmas') or {})
+    configure_credentials(iterations=ctx.obj['config'].get('auth', {}).get('password_iterations'))
+    profiling_config = ctx.obj['config'].get('profiling', {})
+    configure_profiling(enabled=profiling_config.get('enabled'),
+                        slow_query_ms=profiling_config.get('slow_query_ms'),
+                        slow_query_log=profiling_config.get('slow_query_log'))
+    metrics_config = ctx.obj['config'].get('metrics', {})
+    configure_metrics(enabled=metrics_config.get('enabled'),
+                      textfile=metrics_config.get('textfile') or '')
+    
     # 設置輸出格式
     ctx.obj['format'] = format
     ctx.obj['verbose'] = verbose
@@ -69,12 +143,35 @@ def cli(ctx, config, format, verbose, quiet):
     
     # 設置輸出格式化器
     setup_output_format(format, verbose, quiet)
+    
+    # 效能分析（在其他設定之後開始，只記錄子命令本身）
+    if profile or profile_memory:
+        profiler = CommandProfiler(memory=profile_memory, sort=profile_sort)
+        profiler.start()
+        ctx.call_on_close(lambda: _finish_profile(ctx, profiler, profile_output))
+
+def _finish_profile(ctx, profiler, output):
+    """停止效能分析並輸出報表"""
+    profiler.stop()
+    report = profiler.report(ctx.meta.get('metrics_command'))
+    if output:
+        try:
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(report)
+            click.echo(f"效能分析報表已寫入 {output}", err=True)
+            return
+        except OSError as e:
+            click.echo(f"無法寫入效能分析報表: {e}", err=True)
+    click.echo(report, err=True)
 
 # 註冊命令組
 cli.add_command(auth_group, name='auth')
 cli.add_command(user_group, name='user')
 cli.add_command(requirement_group, name='requirement')
 cli.add_command(admin_group, name='admin')
+cli.add_command(serve_command, name='serve')
+cli.add_command(dev_group, name='dev')
+cli.add_command(metrics_command, name='metrics')
 
 def main():
     """主函數入口"""
@@ -14,20 +14,46 @@ from typing import Dict, Any, Optional
 # 預設配置
 DEFAULT_CONFIG = {
     'database': {
-        'path': './requirement.db'
+        'path': './requirement.db',
+        'profile': 'balanced',  # safe / balanced / fast / bulk-load
+        'pragmas': {}  # 個別覆蓋設定檔的 PRAGMA，例如 cache_size: -32000
     },
     'auth': {
         'session_timeout': 3600,  # 1小時
-        'save_session': True
+        'save_session': True,
+        'password_iterations': 600000  # 密碼雜湊 (PBKDF2) 的迭代次數
     },
     'output': {
         'default_format': 'table',
         'max_rows': 50,
         'show_headers': True
     },
+    'profiling': {
+        'enabled': False,  # 記錄每個 SQL 語句的執行時間（見 query_profiler 模組）
+        'slow_query_ms': 100,  # 超過此毫秒數的語句寫入慢查詢日誌
+        'slow_query_log': 'slow_queries.log'
+    },
+    'metrics': {
+        'enabled': False,  # 記錄並保存營運指標（見 metrics 模組）
+        'textfile': None  # GUI 排程器寫入的 Prometheus 文字檔路徑，None 表示不寫入
+    },
+    'archive': {
+        'days': 180,  # reqmgr admin archive 歸檔審核通過或失效超過此天數的需求單
+        'batch_size': 500  # 每個交易移動的筆數
+    },
+    'trash': {
+        'retention_days': 30,  # reqmgr admin purge 清除刪除超過此天數的需求單
+        'archive': False,  # True 表示移到歸檔表格而不是永久刪除
+        'change_log_retention': 100000  # 保留的需求單變更記錄筆數
+    },
     'logging': {
         'level': 'INFO',
         'file': None  # None 表示不寫入文件
+    },
+    'server': {
+        'host': '127.0.0.1',
+        'port': 8080,
+        'workers': 4  # 資料庫工作執行緒數量
     }
 }
 
@@ -135,6 +161,42 @@ def apply_env_overrides(config: Dict[str, Any]) -> Dict[str, Any]:
     if db_path:
         config['database']['path'] = db_path
     
+    # 資料庫效能設定檔
+    db_profile = os.getenv('REQMGR_DB_PROFILE')
+    if db_profile:
+        config['database']['profile'] = db_profile
+    
+    # 密碼雜湊迭代次數
+    password_iterations = os.getenv('REQMGR_PASSWORD_ITERATIONS')
+    if password_iterations:
+        config['auth']['password_iterations'] = int(password_iterations)
+    
+    # 查詢效能紀錄
+    profile = os.getenv('REQMGR_PROFILE')
+    if profile:
+        config['profiling']['enabled'] = profile != '0'
+    slow_query_ms = os.getenv('REQMGR_SLOW_QUERY_MS')
+    if slow_query_ms:
+        try:
+            threshold = float(slow_query_ms)
+        except ValueError:
+            threshold = -1
+        if threshold >= 0:
+            config['profiling']['slow_query_ms'] = threshold
+        else:
+            print(f"警告: 環境變量 REQMGR_SLOW_QUERY_MS={slow_query_ms!r} 不是有效的毫秒數，已忽略")
+    slow_query_log = os.getenv('REQMGR_SLOW_QUERY_LOG')
+    if slow_query_log:
+        config['profiling']['slow_query_log'] = slow_query_log
+    
+    # 營運指標
+    metrics_enabled = os.getenv('REQMGR_METRICS')
+    if metrics_enabled:
+        config['metrics']['enabled'] = metrics_enabled != '0'
+    metrics_file = os.getenv('REQMGR_METRICS_FILE')
+    if metrics_file:
+        config['metrics']['textfile'] = metrics_file
+    
     # 輸出格式
     output_format = os.getenv('REQMGR_FORMAT')
     if output_format:
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令效能分析模組
+
+以 cProfile 記錄一個 CLI 命令的函數呼叫時間，並可選擇以 tracemalloc 記錄記憶體配置。
+同時啟用查詢效能紀錄（query_profiler），報表將命令時間分為 SQL 與 Python 兩部分。
+"""
+
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+from typing import Optional
+
+import query_profiler
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+class CommandProfiler:
+    """記錄一個命令的執行時間、函數呼叫與記憶體配置
+
+    Args:
+        memory: 是否以 tracemalloc 記錄記憶體配置（會明顯拖慢命令）
+        sort: 函數列表的排序方式（cumulative / tottime / calls）
+        limit: 報表列出的函數與記憶體配置位置數量
+    """
+
+    def __init__(self, memory: bool = False, sort: str = 'cumulative', limit: int = 25):
+        self.memory = memory
+        self.sort = sort
+        self.limit = limit
+        self._profile = cProfile.Profile()
+        self._started = None
+        self._elapsed = 0.0
+        self._peak = 0
+        self._snapshot = None
+
+    def start(self) -> None:
+        """開始記錄（同時啟用查詢效能紀錄並清除先前的結果）"""
+        query_profiler.configure_profiling(enabled=True)
+        query_profiler.reset_query_stats()
+        if self.memory:
+            tracemalloc.start(10)
+        self._started = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """停止記錄"""
+        self._profile.disable()
+        self._elapsed = time.perf_counter() - self._started
+        if self.memory:
+            self._peak = tracemalloc.get_traced_memory()[1]
+            self._snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, query_profiler.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            ))
+            tracemalloc.stop()
+
+    def report(self, command: Optional[str] = None) -> str:
+        """產生文字報表
+
+        查詢彙整結果併入報表後即清除，進程結束時不會再重複輸出。
+
+        Args:
+            command: 命令名稱
+
+        Returns:
+            str: 報表內容
+        """
+        queries = query_profiler.get_query_stats()
+        sql_seconds = sum(item['total_ms'] for item in queries) / 1000
+        python_seconds = max(self._elapsed - sql_seconds, 0.0)
+        total = self._elapsed or 1.0
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream).strip_dirs()
+        stream.write(f"==== 命令效能分析: {command or '(無子命令)'} ====\n")
+        stream.write(f"總時間: {self._elapsed:.3f} 秒"
+                     f"（SQL {sql_seconds:.3f} 秒 {sql_seconds / total:.1%}，"
+                     f"Python {python_seconds:.3f} 秒 {python_seconds / total:.1%}）\n")
+        stream.write(f"函數呼叫: {stats.total_calls} 次，SQL 語句: {sum(item['count'] for item in queries)} 次\n")
+        if self.memory:
+            stream.write(f"記憶體峰值: {self._peak / 1024 / 1024:.2f} MB\n")
+
+        stream.write(f"\n前 {self.limit} 個函數（依 {self.sort} 排列）:\n")
+        stats.sort_stats(self.sort).print_stats(self.limit)
+
+        stream.write(f"SQL 語句（依總時間排列）:\n{query_profiler.format_report(limit=10)}\n")
+        query_profiler.reset_query_stats()
+
+        if self._snapshot is not None:
+            stream.write(f"\n命令結束時仍佔用記憶體的位置（前 {self.limit} 個）:\n")
+            for stat in self._snapshot.statistics('lineno')[:self.limit]:
+                frame = stat.traceback[0]
+                stream.write(f"{stat.size / 1024:>10.1f} KiB {stat.count:>8} 個  "
+                             f"{frame.filename}:{frame.lineno}\n")
+        return stream.getvalue()
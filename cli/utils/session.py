@@ -7,12 +7,17 @@
 """
 
 import os
-import json
+import sys
 import time
 from pathlib import Path
 from typing import Dict, Any, Optional
-from datetime import datetime, timedelta
-import base64
+from datetime import datetime
+
+from database import create_connection, create_read_connection, get_database_settings
+from tokens import get_token_secret, issue_token, verify_token, user_claims
+
+# 本進程已載入的會話（會話文件只讀取與驗證一次）
+_memo = {'loaded': False, 'session': None}
 
 def get_session_file() -> Path:
     """獲取會話文件路徑
@@ -26,9 +31,60 @@ def get_session_file() -> Path:
     
     return config_dir / 'session'
 
+def _token_secret(create: bool = False) -> Optional[bytes]:
+    """從資料庫獲取會話權杖的簽章金鑰
+    
+    Args:
+        create: 金鑰不存在時是否建立（只有登入時建立）；
+                否則以唯讀方式開啟，不會建立資料庫文件、表格或新的金鑰
+        
+    Returns:
+        bytes or None: 簽章金鑰，資料庫或金鑰不存在時返回 None
+    """
+    if create:
+        conn = create_connection()
+    elif not os.path.exists(get_database_settings()['path']):
+        return None
+    else:
+        conn = create_read_connection()
+    if conn is None:
+        raise RuntimeError("無法連接到資料庫")
+    try:
+        return get_token_secret(conn, create=create)
+    finally:
+        conn.close()
+
+def _session_from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """將權杖內容轉換為會話數據"""
+    return {
+        'user_id': payload['uid'],
+        'username': payload['usr'],
+        'name': payload['name'],
+        'email': payload['email'],
+        'role': payload['role'],
+        'login_time': datetime.fromtimestamp(payload['iat']).isoformat(),
+        'expires_at': datetime.fromtimestamp(payload['exp']).isoformat(),
+        'timeout': payload['exp'] - payload['iat'],
+        '_exp': payload['exp'],
+        '_payload': payload,
+    }
+
+def _write_token(token: str) -> None:
+    """將權杖寫入會話文件"""
+    session_file = get_session_file()
+    with open(session_file, 'w', encoding='utf-8') as f:
+        f.write(token)
+    
+    # 設置文件權限（僅限 Unix 系統）
+    if os.name != 'nt':  # 不是 Windows
+        os.chmod(session_file, 0o600)  # 只有用戶可讀寫
+
 def save_session(user_info, timeout: int = 3600) -> bool:
     """保存用戶會話
     
+    會話文件保存一個簽章權杖（見 tokens 模組），內容包含用戶資料與過期時間，
+    之後的命令只需驗證簽章即可取得用戶資料，不必查詢資料庫。
+    
     Args:
         user_info: 用戶信息對象
         timeout: 會話超時時間（秒），預設 1 小時
@@ -37,36 +93,10 @@ def save_session(user_info, timeout: int = 3600) -> bool:
         bool: 是否保存成功
     """
     try:
-        session_file = get_session_file()
-        
-        # 計算過期時間
-        login_time = datetime.now()
-        expires_at = login_time + timedelta(seconds=timeout)
-        
-        # 準備會話數據
-        session_data = {
-            'user_id': user_info.id,
-            'username': user_info.username,
-            'name': user_info.name,
-            'email': user_info.email,
-            'role': user_info.role,
-            'login_time': login_time.isoformat(),
-            'expires_at': expires_at.isoformat(),
-            'timeout': timeout
-        }
-        
-        # 簡單的編碼（不是真正的加密，只是混淆）
-        session_json = json.dumps(session_data)
-        encoded_session = base64.b64encode(session_json.encode('utf-8')).decode('utf-8')
-        
-        # 保存到文件
-        with open(session_file, 'w', encoding='utf-8') as f:
-            f.write(encoded_session)
-        
-        # 設置文件權限（僅限 Unix 系統）
-        if os.name != 'nt':  # 不是 Windows
-            os.chmod(session_file, 0o600)  # 只有用戶可讀寫
-        
+        token, payload = issue_token(_token_secret(create=True), user_claims(user_info), timeout)
+        _write_token(token)
+        _memo['session'] = _session_from_payload(payload)
+        _memo['loaded'] = True
         return True
         
     except Exception as e:
@@ -76,36 +106,55 @@ def save_session(user_info, timeout: int = 3600) -> bool:
 def load_session() -> Optional[Dict[str, Any]]:
     """載入用戶會話
     
+    會話文件在每個進程中只讀取與驗證一次，之後的呼叫直接使用記憶體中的結果，
+    只檢查是否已過期。
+    
     Returns:
         dict or None: 會話數據，如果沒有有效會話則返回 None
     """
+    if not _memo['loaded']:
+        _memo['session'] = _read_session()
+        _memo['loaded'] = True
+    
+    session = _memo['session']
+    if session is not None and time.time() >= session['_exp']:
+        # 會話已過期，刪除文件
+        clear_session()
+        return None
+    return session
+
+def _read_session() -> Optional[Dict[str, Any]]:
+    """讀取並驗證會話文件
+    
+    只有權杖的簽章或有效期限驗證失敗時才刪除會話文件；
+    無法讀取資料庫中的金鑰（例如在其他目錄執行而找不到資料庫、資料庫被鎖定）時保留文件。
+    """
     try:
         session_file = get_session_file()
         
         if not session_file.exists():
             return None
         
-        # 讀取會話文件
-        with open(session_file, 'r', encoding='utf-8') as f:
-            encoded_session = f.read().strip()
-        
-        # 解碼會話數據
-        session_json = base64.b64decode(encoded_session.encode('utf-8')).decode('utf-8')
-        session_data = json.loads(session_json)
-        
-        # 檢查會話是否過期
-        expires_at = datetime.fromisoformat(session_data['expires_at'])
-        if datetime.now() > expires_at:
-            # 會話已過期，刪除文件
-            clear_session()
-            return None
-        
-        return session_data
+        # 無法解碼的內容交由簽章驗證判定為無效
+        with open(session_file, 'r', encoding='utf-8', errors='replace') as f:
+            token = f.read().strip()
         
+        secret = _token_secret()
     except Exception as e:
-        # 如果讀取失敗，清除可能損壞的會話文件
+        print(f"無法驗證會話: {e}", file=sys.stderr)
+        return None
+    
+    if secret is None:
+        print(f"無法驗證會話: 資料庫 {get_database_settings()['path']} 不存在或沒有會話金鑰，"
+              f"請確認資料庫路徑（REQMGR_DB_PATH 或配置文件 database.path）", file=sys.stderr)
+        return None
+    
+    payload = verify_token(secret, token)
+    if payload is None:
+        # 簽章錯誤、已過期或舊格式的會話文件
         clear_session()
         return None
+    return _session_from_payload(payload)
 
 def clear_session() -> bool:
     """清除用戶會話
@@ -113,6 +162,8 @@ def clear_session() -> bool:
     Returns:
         bool: 是否清除成功
     """
+    _memo['session'] = None
+    _memo['loaded'] = True
     try:
         session_file = get_session_file()
         
@@ -166,18 +217,13 @@ def extend_session(additional_time: int = 3600) -> bool:
         if not session:
             return False
         
-        # 更新過期時間
-        current_expires = datetime.fromisoformat(session['expires_at'])
-        new_expires = current_expires + timedelta(seconds=additional_time)
-        session['expires_at'] = new_expires.isoformat()
-        
-        # 重新保存會話
-        session_file = get_session_file()
-        session_json = json.dumps(session)
-        encoded_session = base64.b64encode(session_json.encode('utf-8')).decode('utf-8')
-        
-        with open(session_file, 'w', encoding='utf-8') as f:
-            f.write(encoded_session)
+        # 以原本的登入時間重新簽發權杖
+        payload = session['_payload']
+        claims = {key: value for key, value in payload.items() if key not in ('iat', 'exp')}
+        ttl = payload['exp'] - payload['iat'] + additional_time
+        token, new_payload = issue_token(_token_secret(), claims, ttl, issued_at=payload['iat'])
+        _write_token(token)
+        _memo['session'] = _session_from_payload(new_payload)
         
         return True
         
@@ -31,8 +31,8 @@ def create_cli_implementation_requirement():
             print("❌ 找不到管理員用戶 'nicholas'")
             return False
         
-        admin_id = admin_user[0]
-        print(f"✅ 找到管理員用戶: {admin_user[3]} (ID: {admin_id})")
+        admin_id = admin_user.id
+        print(f"✅ 找到管理員用戶: {admin_user.name} (ID: {admin_id})")
         
         # 獲取所有員工
         staff_list = get_all_staff(conn)
@@ -43,8 +43,8 @@ def create_cli_implementation_requirement():
         print(f"✅ 找到 {len(staff_list)} 個員工用戶")
         
         # 選擇指派對象（選擇第一個員工）
-        assignee_id = staff_list[0][0]
-        assignee_name = staff_list[0][1]
+        assignee_id = staff_list[0].id
+        assignee_name = staff_list[0].username
         print(f"📋 將需求單指派給: {assignee_name} (ID: {assignee_id})")
         
         # 需求單詳細內容
@@ -247,7 +247,7 @@ python reqmgr.py admin trash list
             print(f"✅ 成功創建 CLI 功能實現需求單！")
             print(f"   需求單ID: {req_id}")
             print(f"   標題: {title}")
-            print(f"   指派者: {admin_user[3]} (ID: {admin_id})")
+            print(f"   指派者: {admin_user.name} (ID: {admin_id})")
             print(f"   接收者: {assignee_name} (ID: {assignee_id})")
             print(f"   優先級: 緊急")
             print(f"   狀態: 已發派")
@@ -32,8 +32,8 @@ def create_cli_requirement():
             print("❌ 找不到管理員用戶 'nicholas'")
             return False
         
-        admin_id = admin_user[0]  # 用戶ID
-        print(f"✅ 找到管理員用戶: {admin_user[3]} (ID: {admin_id})")
+        admin_id = admin_user.id  # 用戶ID
+        print(f"✅ 找到管理員用戶: {admin_user.name} (ID: {admin_id})")
         
         # 獲取所有員工
         staff_list = get_all_staff(conn)
@@ -43,11 +43,11 @@ def create_cli_requirement():
         
         print(f"✅ 找到 {len(staff_list)} 個員工用戶:")
         for staff in staff_list:
-            print(f"   - {staff[1]} (ID: {staff[0]})")
+            print(f"   - {staff.username} (ID: {staff.id})")
         
         # 選擇指派對象（這裡選擇第一個員工，您可以修改）
-        assignee_id = staff_list[0][0]
-        assignee_name = staff_list[0][1]
+        assignee_id = staff_list[0].id
+        assignee_name = staff_list[0].username
         print(f"📋 將需求單指派給: {assignee_name} (ID: {assignee_id})")
         
         # 需求單詳細內容
@@ -196,7 +196,7 @@ def create_cli_requirement():
             print(f"✅ 成功創建需求單！")
             print(f"   需求單ID: {req_id}")
             print(f"   標題: {title}")
-            print(f"   指派者: {admin_user[3]} (ID: {admin_id})")
+            print(f"   指派者: {admin_user.name} (ID: {admin_id})")
             print(f"   接收者: {assignee_name} (ID: {assignee_id})")
             print(f"   優先級: {'緊急' if priority == 'urgent' else '普通'}")
             print(f"   狀態: 已發派")
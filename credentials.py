@@ -0,0 +1,180 @@
+"""
+密碼雜湊與驗證
+
+密碼以加鹽的 PBKDF2-HMAC-SHA256 儲存，格式為
+    pbkdf2_sha256$<迭代次數>$<鹽值 base64>$<雜湊值 base64>
+
+舊版資料庫中的明文密碼仍可登入，驗證成功後會自動改存為雜湊值；
+迭代次數調整後，舊雜湊值也會在下次登入時以新的迭代次數重新雜湊。
+
+迭代次數可由環境變量 REQMGR_PASSWORD_ITERATIONS 或 configure_credentials() 調整。
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlite3 import Error
+
+import user_cache
+
+ALGORITHM = 'pbkdf2_sha256'
+DEFAULT_ITERATIONS = 600000
+SALT_BYTES = 16
+
+_settings = {
+    'iterations': int(os.getenv('REQMGR_PASSWORD_ITERATIONS') or DEFAULT_ITERATIONS),
+}
+
+def configure_credentials(iterations=None):
+    """設定之後產生的密碼雜湊所使用的迭代次數
+
+    Args:
+        iterations: PBKDF2 迭代次數，None 表示不變
+    """
+    if iterations is not None:
+        if int(iterations) < 1:
+            raise ValueError("密碼雜湊的迭代次數必須大於 0")
+        _settings['iterations'] = int(iterations)
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+def hash_password(password, iterations=None):
+    """產生密碼雜湊
+
+    Args:
+        password: 明文密碼
+        iterations: 迭代次數，None 表示使用目前設定
+
+    Returns:
+        str: 可儲存於 users.password 的雜湊字串
+    """
+    iterations = iterations or _settings['iterations']
+    salt = os.urandom(SALT_BYTES)
+    digest = _pbkdf2(password, salt, iterations)
+    return '$'.join((ALGORITHM, str(iterations),
+                     base64.b64encode(salt).decode('ascii'),
+                     base64.b64encode(digest).decode('ascii')))
+
+def _parse(stored):
+    """解析雜湊字串，不是雜湊格式（舊版明文密碼）時返回 None"""
+    parts = stored.split('$')
+    if len(parts) != 4 or parts[0] != ALGORITHM:
+        return None
+    try:
+        return int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        return None
+
+def is_hashed(stored):
+    """檢查儲存的密碼是否為雜湊值"""
+    return _parse(stored) is not None
+
+def verify_password(password, stored):
+    """驗證密碼
+
+    Args:
+        password: 使用者輸入的明文密碼
+        stored: users.password 中儲存的值（雜湊值或舊版明文）
+
+    Returns:
+        bool: 密碼是否正確
+    """
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    iterations, salt, digest = parsed
+    return hmac.compare_digest(_pbkdf2(password, salt, iterations), digest)
+
+def needs_rehash(stored):
+    """儲存的密碼是否需要以目前設定重新雜湊（明文或迭代次數不同）"""
+    parsed = _parse(stored)
+    return parsed is None or parsed[0] != _settings['iterations']
+
+def check_credentials(conn, username, password):
+    """驗證使用者名稱與密碼，必要時將儲存的密碼升級為目前設定的雜湊
+
+    Args:
+        conn: 數據庫連接
+        username: 使用者名稱
+        password: 明文密碼
+
+    Returns:
+        UserRecord: 驗證成功的使用者，失敗時返回 None
+    """
+    user = user_cache.get_user_by_username(conn, username)
+    if user is None or not verify_password(password, user.password):
+        return None
+
+    if needs_rehash(user.password):
+        new_hash = hash_password(password)
+        try:
+            # 只在密碼未被其他人同時修改時更新
+            conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                         (new_hash, user.id, user.password))
+            conn.commit()
+            user_cache.invalidate()
+            user = user._replace(password=new_hash)
+        except Error as e:
+            # 升級失敗不影響本次登入，下次登入時再試
+            print(f"更新密碼雜湊時發生錯誤: {e}")
+    return user
+
+class VerificationCache:
+    """短期保存成功驗證結果的快取（API 伺服器使用）
+
+    每個不帶權杖的請求都以 Basic 認證重新驗證密碼，若每次都計算 PBKDF2，
+    大量登入時 CPU 會被雜湊計算佔滿。快取以進程內隨機金鑰的 HMAC 作為鍵，
+    不保存明文密碼；項目在 ttl 秒後過期，使用者的密碼雜湊改變時也立即失效。
+
+    Args:
+        ttl: 驗證結果保留秒數
+        max_size: 快取項目數量上限
+    """
+
+    def __init__(self, ttl=300, max_size=4096):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()  # 鍵 -> (驗證時的密碼雜湊, 過期時間)
+        self._lock = threading.Lock()
+
+    def _cache_key(self, username, password):
+        message = username.encode('utf-8') + b'\0' + password.encode('utf-8')
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def verify(self, conn, username, password):
+        """驗證使用者名稱與密碼，近期驗證成功過的組合直接返回
+
+        Returns:
+            UserRecord: 驗證成功的使用者，失敗時返回 None
+        """
+        key = self._cache_key(username, password)
+        now = time.monotonic()
+        user = user_cache.get_user_by_username(conn, username)
+        if user is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == user.password and entry[1] > now:
+                self._entries.move_to_end(key)
+                return user
+
+        user = check_credentials(conn, username, password)
+        if user is None:
+            return None
+        with self._lock:
+            self._entries[key] = (user.password, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return user
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,22 +1,187 @@
 import sqlite3
 from sqlite3 import Error
+from collections import OrderedDict
 import datetime
+import os
+import re
+import threading
+from pathlib import Path
+
+import query_profiler
+import user_cache
+from credentials import hash_password
+from models import (
+    RequirementSummary, DispatchedRequirement, ScheduledRequirement,
+    DeletedRequirement, RequirementDetail, record_factory
+)
+
+# 資料庫效能設定檔：耐久性與速度的取捨
+# - safe:      每次提交都完整同步到磁碟
+# - balanced:  互動使用（預設）。WAL 模式下 NORMAL 同步在斷電時可能遺失最後幾筆提交，但不會損毀資料庫
+# - fast:      不等待磁碟同步，適合可以重建資料的測試環境
+# - bulk-load: 大量匯入與夜間批次作業，使用較大的快取
+PRAGMA_PROFILES = {
+    'safe': {
+        'journal_mode': 'wal', 'synchronous': 'full', 'cache_size': -2000,
+        'mmap_size': 0, 'temp_store': 'default',
+    },
+    'balanced': {
+        'journal_mode': 'wal', 'synchronous': 'normal', 'cache_size': -16000,
+        'mmap_size': 64 * 1024 * 1024, 'temp_store': 'memory',
+    },
+    'fast': {
+        'journal_mode': 'wal', 'synchronous': 'off', 'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024, 'temp_store': 'memory',
+    },
+    'bulk-load': {
+        'journal_mode': 'wal', 'synchronous': 'off', 'cache_size': -256000,
+        'mmap_size': 256 * 1024 * 1024, 'temp_store': 'memory',
+    },
+}
+DEFAULT_PROFILE = 'balanced'
+
+# 可由設定檔指定的 PRAGMA（依套用順序排列：page_size 必須在切換到 WAL 之前設定）
+TUNABLE_PRAGMAS = ('page_size', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+_MB = 1024 * 1024
+
+_PRAGMA_VALUE = re.compile(r'^-?\d+$|^[A-Za-z]+$')
+
+# 歸檔：已完成或已失效超過保留天數的需求單移到 requirements_archive，
+# 日常列表查詢只掃描較小的 requirements，查看歷史資料時才包含歸檔
+ARCHIVE_STATUSES = ('completed', 'invalid')
+DEFAULT_ARCHIVE_DAYS = 180
+ARCHIVE_BATCH_SIZE = 500  # 每個交易移動的筆數，避免長時間持有寫入鎖
+# 垃圾桶保留天數：刪除超過此天數的需求單由 purge_deleted_requirements 永久刪除（或歸檔）
+DEFAULT_TRASH_RETENTION_DAYS = 30
+# 需求單變更記錄保留的筆數；更早的記錄刪除後，落後太多的快取會改為整個重新載入
+CHANGE_LOG_RETENTION = 100000
+VACUUM_STEP_PAGES = 1000  # 每次 incremental_vacuum 釋放的頁數
+# 資料庫結構版本（PRAGMA user_version）：1 表示 created_at 已轉換為本地時間
+LOCAL_TIME_SCHEMA_VERSION = 1
+_ARCHIVE_COLUMNS = ('id, title, description, assigner_id, assignee_id, status, priority, created_at, '
+                    'scheduled_time, is_dispatched, completed_at, comment, is_deleted, deleted_at, approved_at')
+
+_db_settings = {
+    'path': 'requirement.db',
+    'profile': os.getenv('REQMGR_DB_PROFILE') or DEFAULT_PROFILE,
+    'pragmas': {},
+}
+
+def resolve_pragmas(profile=None, pragmas=None):
+    """合併設定檔與個別指定的 PRAGMA
+
+    Args:
+        profile: 設定檔名稱，None 表示目前設定的設定檔
+        pragmas: 個別覆蓋的 PRAGMA，None 表示目前設定的覆蓋值
+
+    Returns:
+        dict: 依套用順序排列的 {PRAGMA: 值}
+
+    Raises:
+        ValueError: 設定檔名稱、PRAGMA 名稱或值無效
+    """
+    profile = _db_settings['profile'] if profile is None else profile
+    pragmas = _db_settings['pragmas'] if pragmas is None else pragmas
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"未知的資料庫設定檔 '{profile}'，可用: {', '.join(PRAGMA_PROFILES)}")
+    merged = dict(PRAGMA_PROFILES[profile])
+    for name, value in (pragmas or {}).items():
+        if name not in TUNABLE_PRAGMAS:
+            raise ValueError(f"不支援的 PRAGMA '{name}'，可用: {', '.join(TUNABLE_PRAGMAS)}")
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"PRAGMA {name} 的值無效: {value}")
+        merged[name] = value
+    return {name: merged[name] for name in TUNABLE_PRAGMAS if name in merged}
+
+def configure_database(path=None, profile=None, pragmas=None):
+    """設定之後建立的資料庫連接所使用的路徑與效能設定
+
+    Args:
+        path: 資料庫文件路徑，None 表示不變
+        profile: 效能設定檔名稱 (safe / balanced / fast / bulk-load)，None 表示不變
+        pragmas: 個別覆蓋的 PRAGMA，例如 {'cache_size': -32000}，None 表示不變
+
+    Raises:
+        ValueError: 設定檔名稱、PRAGMA 名稱或值無效
+    """
+    resolve_pragmas(profile, pragmas)
+    if path is not None:
+        _db_settings['path'] = path
+    if profile is not None:
+        _db_settings['profile'] = profile
+    if pragmas is not None:
+        _db_settings['pragmas'] = dict(pragmas)
+
+def get_database_settings():
+    """返回目前的資料庫路徑、設定檔名稱與實際套用的 PRAGMA"""
+    return {
+        'path': _db_settings['path'],
+        'profile': _db_settings['profile'],
+        'pragmas': resolve_pragmas(),
+    }
+
+def apply_pragmas(conn, profile=None, pragmas=None):
+    """在連接上套用效能設定
+
+    Args:
+        conn: 數據庫連接
+        profile: 設定檔名稱，None 表示目前設定的設定檔
+        pragmas: 個別覆蓋的 PRAGMA，None 表示目前設定的覆蓋值
+    """
+    for name, value in resolve_pragmas(profile, pragmas).items():
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
 
 def create_connection():
-    """建立資料庫連接"""
+    """建立資料庫連接，並套用設定的效能設定檔"""
     conn = None
     try:
-        conn = sqlite3.connect('requirement.db')
+        conn = sqlite3.connect(_db_settings['path'], factory=query_profiler.connection_factory())
+        # 新資料庫在切換到 WAL 之前啟用增量清理，清除大量資料後可用 reclaim_free_pages 分段歸還空間
+        # （現有資料庫需以 enable_incremental_vacuum 轉換）
+        if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        apply_pragmas(conn)
         return conn
     except Error as e:
         print(e)
     return conn
 
+def create_read_connection(immutable=False):
+    """建立唯讀資料庫連接（報表與匯出使用）
+
+    以 URI 唯讀模式開啟，並將 mmap_size 設為資料庫（含 WAL 文件）的大小，
+    查詢直接讀取記憶體映射的頁面，不必再經由 read() 複製到 SQLite 的頁面快取。
+
+    Args:
+        immutable: 宣告資料庫文件不會被修改（例如備份副本），SQLite 將略過鎖定與變更偵測；
+                   其他程式仍在寫入的資料庫不可使用，否則可能讀到不一致的資料
+
+    Returns:
+        sqlite3.Connection: 唯讀連接，失敗時返回 None
+    """
+    path = os.path.abspath(_db_settings['path'])
+    try:
+        size = os.path.getsize(path)
+        if os.path.exists(path + '-wal'):
+            size += os.path.getsize(path + '-wal')
+        uri = Path(path).as_uri() + '?mode=ro' + ('&immutable=1' if immutable else '')
+        conn = sqlite3.connect(uri, uri=True, factory=query_profiler.connection_factory())
+        pragmas = resolve_pragmas()
+        for name in ('cache_size', 'temp_store'):
+            if name in pragmas:
+                conn.execute(f"PRAGMA {name} = {pragmas[name]}")
+        # 映射大小取整到 1MB；超過 SQLite 編譯時上限的部分會被自動截斷
+        conn.execute(f"PRAGMA mmap_size = {(size // _MB + 1) * _MB}").fetchall()
+        conn.execute("PRAGMA query_only = 1")
+        return conn
+    except (Error, OSError) as e:
+        print(e)
+        return None
+
 def get_user_by_username(conn, username):
-    """根據使用者名稱獲取使用者資料"""
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username=?", (username,))
-    return cursor.fetchone()
+    """根據使用者名稱獲取使用者資料（由使用者目錄快取提供）"""
+    return user_cache.get_user_by_username(conn, username)
 
 def create_tables(conn):
     """建立所有需要的表格"""
@@ -38,7 +203,8 @@ def create_tables(conn):
         columns_dict = {col[1]: col for col in columns}
         
         # 如果缺少必要欄位，則嘗試添加它們
-        if 'comment' not in columns_dict or 'completed_at' not in columns_dict or 'is_deleted' not in columns_dict:
+        if columns_dict and ('comment' not in columns_dict or 'completed_at' not in columns_dict
+                             or 'is_deleted' not in columns_dict or 'approved_at' not in columns_dict):
             try:
                 if 'comment' not in columns_dict:
                     conn.execute("ALTER TABLE requirements ADD COLUMN comment TEXT")
@@ -46,6 +212,8 @@ def create_tables(conn):
                     conn.execute("ALTER TABLE requirements ADD COLUMN completed_at TIMESTAMP")
                 if 'is_deleted' not in columns_dict:
                     conn.execute("ALTER TABLE requirements ADD COLUMN is_deleted INTEGER DEFAULT 0")
+                if 'approved_at' not in columns_dict:
+                    conn.execute("ALTER TABLE requirements ADD COLUMN approved_at TIMESTAMP")
                 conn.commit()
                 print("需求單表格結構已更新")
             except Error as e:
@@ -60,16 +228,141 @@ def create_tables(conn):
                         assignee_id INTEGER NOT NULL,
                         status TEXT NOT NULL DEFAULT 'pending',
                         priority TEXT NOT NULL DEFAULT 'normal',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
                         scheduled_time TIMESTAMP,
                         is_dispatched INTEGER DEFAULT 1,
                         completed_at TIMESTAMP,
                         comment TEXT,
                         is_deleted INTEGER DEFAULT 0,
                         deleted_at TIMESTAMP,
+                        approved_at TIMESTAMP,
                         FOREIGN KEY (assigner_id) REFERENCES users (id),
                         FOREIGN KEY (assignee_id) REFERENCES users (id)
                     );''')
+
+        # 所有時間欄位統一為本地時間；舊版的 created_at 以 CURRENT_TIMESTAMP 寫入 UTC 時間
+        # （預約發派的需求單在發派時改寫為本地時間，不需轉換）
+        if conn.execute("PRAGMA user_version").fetchone()[0] < LOCAL_TIME_SCHEMA_VERSION:
+            # 轉換期間移除更新觸發器（稍後重建），改為寫入一筆要求重新載入全部資料的變更記錄
+            conn.execute("DROP TRIGGER IF EXISTS trg_requirements_update")
+            tables = ['requirements']
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                            "AND name = 'requirements_archive'").fetchone():
+                tables.append('requirements_archive')
+            converted = 0
+            for table in tables:
+                converted += conn.execute(f'''UPDATE {table}
+                                              SET created_at = datetime(created_at, 'localtime')
+                                              WHERE scheduled_time IS NULL AND created_at IS NOT NULL''').rowcount
+            if converted and conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                          "AND name = 'requirement_changes'").fetchone():
+                conn.execute("INSERT INTO requirement_changes (requirement_id) VALUES (NULL)")
+            conn.execute(f"PRAGMA user_version = {LOCAL_TIME_SCHEMA_VERSION}")
+            conn.commit()
+        
+        # 需求單變更記錄：由觸發器寫入，供快取失效與增量同步使用
+        # requirement_id 為 NULL 表示影響所有需求單的變更（例如使用者姓名修改）
+        conn.execute('''CREATE TABLE IF NOT EXISTS requirement_changes (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        requirement_id INTEGER,
+                        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_requirements_insert
+                        AFTER INSERT ON requirements
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NEW.id);
+                        END;''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_requirements_update
+                        AFTER UPDATE ON requirements
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NEW.id);
+                        END;''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_requirements_delete
+                        AFTER DELETE ON requirements
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (OLD.id);
+                        END;''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_users_name_update
+                        AFTER UPDATE OF name ON users
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NULL);
+                        END;''')
+        conn.execute('''CREATE TRIGGER IF NOT EXISTS trg_users_delete
+                        AFTER DELETE ON users
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NULL);
+                        END;''')
+
+        # 使用者表格的修改計數：由觸發器遞增，供使用者目錄快取判斷是否需要重新載入
+        # （需求單的修改不會改變此計數）
+        conn.execute('''CREATE TABLE IF NOT EXISTS users_version (
+                        id INTEGER PRIMARY KEY CHECK (id = 0),
+                        version INTEGER NOT NULL
+                    );''')
+        conn.execute("INSERT OR IGNORE INTO users_version (id, version) VALUES (0, 0)")
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_users_version_{event.lower()}
+                            AFTER {event} ON users
+                            BEGIN
+                                UPDATE users_version SET version = version + 1 WHERE id = 0;
+                            END;''')
+
+        # 系統金鑰（例如會話權杖的簽章金鑰），由需要的模組在第一次使用時產生
+        conn.execute('''CREATE TABLE IF NOT EXISTS app_secrets (
+                        name TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    );''')
+
+        # 登入失敗限制（見 rate_limit 模組），讓多個進程共用鎖定狀態
+        conn.execute('''CREATE TABLE IF NOT EXISTS login_rate_limits (
+                        key TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        locked_until REAL NOT NULL DEFAULT 0
+                    );''')
+
+        # 營運指標的累計值（見 metrics 模組），讓短期進程的指標在進程結束後仍可匯出
+        conn.execute('''CREATE TABLE IF NOT EXISTS metric_totals (
+                        metric TEXT NOT NULL,
+                        sample TEXT NOT NULL,
+                        labels TEXT NOT NULL,
+                        value REAL NOT NULL,
+                        PRIMARY KEY (sample, labels)
+                    );''')
+
+        # 歸檔的需求單（見 archive_requirements），欄位與 requirements 相同，ID 保持不變
+        conn.execute('''CREATE TABLE IF NOT EXISTS requirements_archive (
+                        id INTEGER PRIMARY KEY,
+                        title TEXT NOT NULL,
+                        description TEXT NOT NULL,
+                        assigner_id INTEGER NOT NULL,
+                        assignee_id INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        priority TEXT NOT NULL,
+                        created_at TIMESTAMP,
+                        scheduled_time TIMESTAMP,
+                        is_dispatched INTEGER,
+                        completed_at TIMESTAMP,
+                        comment TEXT,
+                        is_deleted INTEGER,
+                        deleted_at TIMESTAMP,
+                        approved_at TIMESTAMP,
+                        archived_at TIMESTAMP NOT NULL
+                    );''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_requirements_archive_assignee
+                        ON requirements_archive (assignee_id, created_at)''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_requirements_archive_assigner
+                        ON requirements_archive (assigner_id, created_at)''')
+
+        # 列表查詢的覆蓋索引：只包含摘要欄位，列表畫面不必讀取描述等大型文字
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_requirements_assignee_summary
+                        ON requirements (assignee_id, is_dispatched, is_deleted, created_at,
+                                         status, priority, title, assigner_id, scheduled_time)''')
+        conn.execute('''CREATE INDEX IF NOT EXISTS idx_requirements_assigner_summary
+                        ON requirements (assigner_id, is_dispatched, is_deleted, created_at,
+                                         assignee_id, status, priority, title, scheduled_time,
+                                         completed_at, deleted_at)''')
+        conn.commit()
     except Error as e:
         print(e)
 
@@ -93,21 +386,23 @@ def initialize_database():
             username = user[0]
             cursor.execute("SELECT COUNT(*) FROM users WHERE username=?", (username,))
             if cursor.fetchone()[0] == 0:
+                username, password, name, email, role = user
                 cursor.execute(
                     "INSERT INTO users (username, password, name, email, role) VALUES (?, ?, ?, ?, ?)",
-                    user
+                    (username, hash_password(password), name, email, role)
                 )
                 print(f"已添加預設使用者: {username}")
         
         conn.commit()
         conn.close()
+        user_cache.invalidate()
 
 def add_user(username, password, name, email, role='staff'):
     """添加新使用者
     
     Args:
         username: 使用者名稱
-        password: 密碼
+        password: 明文密碼（以雜湊值儲存）
         name: 真實姓名
         email: 電子郵件
         role: 角色 ('admin'或'staff')
@@ -131,11 +426,12 @@ def add_user(username, password, name, email, role='staff'):
             
         cursor.execute(
             "INSERT INTO users (username, password, name, email, role) VALUES (?, ?, ?, ?, ?)",
-            (username, password, name, email, role)
+            (username, hash_password(password), name, email, role)
         )
         conn.commit()
         user_id = cursor.lastrowid
         conn.close()
+        user_cache.invalidate()
         
         print(f"成功添加使用者 '{username}' (ID: {user_id})")
         return True
@@ -143,7 +439,7 @@ def add_user(username, password, name, email, role='staff'):
         print(f"添加使用者時發生錯誤: {e}")
         return False
 
-def create_requirement(conn, title, description, assigner_id, assignee_id, priority='normal', scheduled_time=None):
+def create_requirement(conn, title, description, assigner_id, assignee_id, priority='normal', scheduled_time=None, commit=True):
     """建立新的需求單
     
     Args:
@@ -154,6 +450,7 @@ def create_requirement(conn, title, description, assigner_id, assignee_id, prior
         assignee_id: 接收者ID
         priority: 優先級 ('normal'或'urgent')
         scheduled_time: 預約發派時間，None表示立即發派
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
     
     Returns:
         int: 新建需求單ID
@@ -167,57 +464,124 @@ def create_requirement(conn, title, description, assigner_id, assignee_id, prior
         # 設置狀態：未發派(not_dispatched)或未完成(pending)
         status = 'not_dispatched' if scheduled_time else 'pending'
         
+        # 與其他時間欄位一致使用本地時間（舊資料庫的欄位預設值為 UTC 的 CURRENT_TIMESTAMP）
+        created_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
         cursor.execute(
             """INSERT INTO requirements 
-               (title, description, assigner_id, assignee_id, priority, scheduled_time, is_dispatched, status) 
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-            (title, description, assigner_id, assignee_id, priority, scheduled_time, is_dispatched, status)
+               (title, description, assigner_id, assignee_id, priority, created_at, scheduled_time,
+                is_dispatched, status) 
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (title, description, assigner_id, assignee_id, priority, created_at, scheduled_time,
+             is_dispatched, status)
         )
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.lastrowid
     except Error as e:
+        if not commit:
+            # 批次寫入時交由呼叫者回滾此操作（見 write_queue 的 SAVEPOINT），錯誤傳回給呼叫者
+            raise
+        conn.rollback()
         print(e)
         return None
 
 def get_all_staff(conn):
     """獲取所有員工列表 (排除管理員)"""
+    return user_cache.get_users(conn, role='staff')
+
+def _resolve_assignee_names(conn, rows, index, record_type):
+    """在記憶體中解析管理員列表查詢的接收人姓名，取代 JOIN users
+    
+    Args:
+        conn: 數據庫連接
+        rows: 查詢結果
+        index: assignee_id 所在的欄位位置，姓名會插入在該欄位之前
+        record_type: 結果記錄類型
+        
+    Returns:
+        list: 加入接收人姓名後的記錄；接收人已不存在的需求單會被略過（與 JOIN 的行為一致）
+    """
+    names = user_cache.get_user_names(conn)
+    make = record_type._make
+    return [
+        make(row[:index] + (names[row[index]],) + row[index:])
+        for row in rows
+        if row[index] in names
+    ]
+
+def _execute_with_archive(conn, cursor, sql, params, include_archived, order_by="created_at DESC"):
+    """執行列表查詢，需要時以 UNION ALL 加入歸檔表格中相同條件的需求單
+
+    Args:
+        conn: 數據庫連接
+        cursor: 執行查詢的游標
+        sql: 查詢 requirements r 的語句（不含 ORDER BY）
+        params: 查詢參數
+        include_archived: 是否包含歸檔的需求單
+        order_by: 排序條件
+    """
+    if not include_archived:
+        cursor.execute(f"{sql} ORDER BY {order_by}", params)
+        return
+    sql = sql + " UNION ALL " + sql.replace("FROM requirements r", "FROM requirements_archive r")
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE role = 'staff' ORDER BY id")
-        return cursor.fetchall()
-    except Error as e:
-        print(f"獲取員工列表時發生錯誤: {e}")
-        return []
+        cursor.execute(f"{sql} ORDER BY {order_by}", params + params)
+    except sqlite3.OperationalError:
+        # 舊版資料庫沒有歸檔表格
+        create_tables(conn)
+        cursor.execute(f"{sql} ORDER BY {order_by}", params + params)
 
-def get_user_requirements(conn, user_id):
-    """獲取指定用戶收到的需求單 (只顯示已發派的)"""
+def get_user_requirements(conn, user_id, include_archived=False):
+    """獲取指定用戶收到的需求單 (只顯示已發派的)
+    
+    Args:
+        conn: 數據庫連接
+        user_id: 員工ID
+        include_archived: 是否包含已歸檔的需求單（查看歷史資料時使用）
+        
+    Returns:
+        list: 需求單列表，依建立時間由新到舊排列
+    """
     try:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.description, r.status, r.priority, r.created_at, u.name, r.scheduled_time, r.comment
+        _execute_with_archive(conn, cursor, '''
+            SELECT r.id, r.title, r.status, r.priority, r.created_at, r.assigner_id, r.scheduled_time
             FROM requirements r
-            JOIN users u ON r.assigner_id = u.id
             WHERE r.assignee_id = ? AND r.is_dispatched = 1 AND r.is_deleted = 0
-            ORDER BY r.created_at DESC
-        ''', (user_id,))
-        return cursor.fetchall()
+        ''', (user_id,), include_archived)
+        
+        # 在記憶體中解析指派人姓名，取代 JOIN users
+        names = user_cache.get_user_names(conn)
+        return [
+            RequirementSummary(req_id, title, status, priority, created_at, names[assigner_id], scheduled_time)
+            for req_id, title, status, priority, created_at, assigner_id, scheduled_time in cursor.fetchall()
+            if assigner_id in names
+        ]
     except Error as e:
         print(e)
         return []
 
-def get_admin_dispatched_requirements(conn, admin_id):
-    """獲取管理員已發派的需求單"""
+def get_admin_dispatched_requirements(conn, admin_id, include_archived=False):
+    """獲取管理員已發派的需求單
+    
+    Args:
+        conn: 數據庫連接
+        admin_id: 管理員ID
+        include_archived: 是否包含已歸檔的需求單（查看歷史資料時使用）
+        
+    Returns:
+        list: 需求單列表，依建立時間由新到舊排列
+    """
     try:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.description, r.status, r.priority, r.created_at, 
-                   u.name as assignee_name, u.id as assignee_id, r.scheduled_time, r.comment, r.completed_at
+        _execute_with_archive(conn, cursor, '''
+            SELECT r.id, r.title, r.status, r.priority, r.created_at, 
+                   r.assignee_id, r.scheduled_time, r.completed_at
             FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
             WHERE r.assigner_id = ? AND r.is_dispatched = 1 AND r.is_deleted = 0
-            ORDER BY r.created_at DESC
-        ''', (admin_id,))
-        return cursor.fetchall()
+        ''', (admin_id,), include_archived)
+        return _resolve_assignee_names(conn, cursor.fetchall(), 5, DispatchedRequirement)
     except Error as e:
         print(e)
         return []
@@ -236,14 +600,13 @@ def get_admin_requirements_by_staff(conn, admin_id, staff_id):
     try:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT r.id, r.title, r.description, r.status, r.priority, r.created_at, 
-                   u.name as assignee_name, u.id as assignee_id, r.scheduled_time, r.comment, r.completed_at
+            SELECT r.id, r.title, r.status, r.priority, r.created_at, 
+                   r.assignee_id, r.scheduled_time, r.completed_at
             FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
             WHERE r.assigner_id = ? AND r.assignee_id = ? AND r.is_dispatched = 1 AND r.is_deleted = 0
             ORDER BY r.created_at DESC
         ''', (admin_id, staff_id))
-        return cursor.fetchall()
+        return _resolve_assignee_names(conn, cursor.fetchall(), 5, DispatchedRequirement)
     except Error as e:
         print(e)
         return []
@@ -253,14 +616,12 @@ def get_admin_scheduled_requirements(conn, admin_id):
     try:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT r.id, r.title, r.description, r.priority, r.scheduled_time, 
-                   u.name as assignee_name, u.id as assignee_id
+            SELECT r.id, r.title, r.priority, r.scheduled_time, r.assignee_id
             FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
             WHERE r.assigner_id = ? AND r.is_dispatched = 0
             ORDER BY r.scheduled_time ASC
         ''', (admin_id,))
-        return cursor.fetchall()
+        return _resolve_assignee_names(conn, cursor.fetchall(), 4, ScheduledRequirement)
     except Error as e:
         print(e)
         return []
@@ -279,19 +640,198 @@ def get_admin_scheduled_by_staff(conn, admin_id, staff_id):
     try:
         cursor = conn.cursor()
         cursor.execute('''
-            SELECT r.id, r.title, r.description, r.priority, r.scheduled_time, 
-                   u.name as assignee_name, u.id as assignee_id
+            SELECT r.id, r.title, r.priority, r.scheduled_time, r.assignee_id
             FROM requirements r
-            JOIN users u ON r.assignee_id = u.id
             WHERE r.assigner_id = ? AND r.assignee_id = ? AND r.is_dispatched = 0
             ORDER BY r.scheduled_time ASC
         ''', (admin_id, staff_id))
-        return cursor.fetchall()
+        return _resolve_assignee_names(conn, cursor.fetchall(), 4, ScheduledRequirement)
     except Error as e:
         print(e)
         return []
 
-def dispatch_scheduled_requirements(conn):
+# 需求單詳情快取：列表只載入摘要欄位，描述與完成說明在查看詳情時才按需載入
+# 快取以 LRU 方式保留最近查看的需求單，並依變更序號（requirement_changes）精確失效
+DETAIL_CACHE_SIZE = 256
+_DETAIL_COLUMNS = '''
+    SELECT r.id, r.title, r.description, r.status, r.priority, r.created_at,
+           u1.name as assigner_name, u2.name as assignee_name,
+           r.assigner_id, r.assignee_id, r.scheduled_time, r.comment, r.completed_at,
+           r.is_dispatched, r.is_deleted, r.deleted_at
+    FROM requirements r
+    JOIN users u1 ON r.assigner_id = u1.id
+    JOIN users u2 ON r.assignee_id = u2.id
+'''
+_ARCHIVE_DETAIL_COLUMNS = _DETAIL_COLUMNS.replace("FROM requirements r", "FROM requirements_archive r")
+_detail_factory = record_factory(RequirementDetail)
+_detail_cache = {'seq': None, 'rows': OrderedDict()}
+_detail_cache_lock = threading.Lock()
+
+def get_change_sequence(conn):
+    """獲取目前的需求單變更序號
+    
+    每次新增、修改或刪除需求單時，觸發器都會寫入一筆變更記錄，
+    因此序號不變即表示需求單資料沒有被任何連接修改過。
+    
+    Args:
+        conn: 數據庫連接
+        
+    Returns:
+        int: 目前的變更序號，變更記錄表不存在時返回 None
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(seq), 0) FROM requirement_changes")
+        return cursor.fetchone()[0]
+    except Error:
+        return None
+
+def get_requirement_changes(conn, since_seq):
+    """獲取指定序號之後被修改過的需求單ID
+    
+    Args:
+        conn: 數據庫連接
+        since_seq: 上次同步時的變更序號
+        
+    Returns:
+        tuple: (目前的變更序號, 需求單ID集合)。若無法得知確切的變更範圍
+               （例如使用者姓名被修改或變更記錄已被清理），ID集合為 None，
+               呼叫端應該重新載入全部資料
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(MIN(seq), 1), COALESCE(MAX(seq), 0) FROM requirement_changes")
+        min_seq, current_seq = cursor.fetchone()
+        
+        if current_seq == since_seq:
+            return current_seq, set()
+        if since_seq is None or since_seq < min_seq - 1 or since_seq > current_seq:
+            return current_seq, None
+        
+        cursor.execute(
+            "SELECT DISTINCT requirement_id FROM requirement_changes WHERE seq > ?",
+            (since_seq,)
+        )
+        changed_ids = set()
+        for (req_id,) in cursor.fetchall():
+            if req_id is None:
+                # 使用者資料變更會影響所有需求單的姓名欄位
+                return current_seq, None
+            changed_ids.add(req_id)
+        return current_seq, changed_ids
+    except Error as e:
+        print(f"獲取需求單變更記錄時發生錯誤: {e}")
+        return None, None
+
+def clear_requirement_detail_cache(req_id=None):
+    """清除需求單詳情快取
+    
+    Args:
+        req_id: 要清除的需求單ID，None 表示清除全部
+    """
+    with _detail_cache_lock:
+        if req_id is None:
+            _detail_cache['rows'].clear()
+            _detail_cache['seq'] = None
+        else:
+            _detail_cache['rows'].pop(req_id, None)
+
+def _sync_detail_cache(conn):
+    """依變更序號淘汰已失效的快取項目
+    
+    Returns:
+        bool: 快取是否可用（變更記錄表不存在時不使用快取）
+    """
+    current_seq, changed_ids = get_requirement_changes(conn, _detail_cache['seq'])
+    if current_seq is None:
+        _detail_cache['rows'].clear()
+        _detail_cache['seq'] = None
+        return False
+    
+    if changed_ids is None:
+        _detail_cache['rows'].clear()
+    else:
+        for req_id in changed_ids:
+            _detail_cache['rows'].pop(req_id, None)
+    _detail_cache['seq'] = current_seq
+    return True
+
+def _store_detail(requirement):
+    """將需求單詳情放入 LRU 快取，超出容量時淘汰最久未使用的項目"""
+    rows = _detail_cache['rows']
+    rows[requirement.id] = requirement
+    rows.move_to_end(requirement.id)
+    while len(rows) > DETAIL_CACHE_SIZE:
+        rows.popitem(last=False)
+
+def get_requirement_detail(conn, req_id, include_archived=False):
+    """獲取單一需求單的完整資料（包含描述與完成說明）
+    
+    列表查詢只返回摘要欄位，查看詳情時再透過此函數載入大型文字欄位。
+    結果保存在 LRU 快取中，直到該需求單被任何連接修改為止。
+    
+    Args:
+        conn: 數據庫連接
+        req_id: 需求單ID
+        include_archived: 找不到時是否查詢已歸檔的需求單（歸檔的需求單不放入快取）
+        
+    Returns:
+        RequirementDetail: 需求單完整資料，找不到時返回 None
+    """
+    try:
+        with _detail_cache_lock:
+            use_cache = _sync_detail_cache(conn)
+            if use_cache and req_id in _detail_cache['rows']:
+                _detail_cache['rows'].move_to_end(req_id)
+                return _detail_cache['rows'][req_id]
+            
+            cursor = conn.cursor()
+            cursor.row_factory = _detail_factory
+            cursor.execute(_DETAIL_COLUMNS + " WHERE r.id = ?", (req_id,))
+            requirement = cursor.fetchone()
+            
+            if use_cache and requirement is not None:
+                _store_detail(requirement)
+            if requirement is None and include_archived:
+                cursor.execute(_ARCHIVE_DETAIL_COLUMNS + " WHERE r.id = ?", (req_id,))
+                requirement = cursor.fetchone()
+            return requirement
+    except Error as e:
+        print(f"獲取需求單詳情時發生錯誤: {e}")
+        return None
+
+def prefetch_requirement_details(conn, req_ids):
+    """預先載入多筆需求單詳情到快取（用於列表中相鄰的項目）
+    
+    Args:
+        conn: 數據庫連接
+        req_ids: 需求單ID列表
+        
+    Returns:
+        int: 實際從資料庫載入的筆數
+    """
+    try:
+        with _detail_cache_lock:
+            if not _sync_detail_cache(conn):
+                return 0
+            
+            missing = [req_id for req_id in req_ids if req_id not in _detail_cache['rows']]
+            if not missing:
+                return 0
+            
+            placeholders = ", ".join("?" for _ in missing)
+            cursor = conn.cursor()
+            cursor.row_factory = _detail_factory
+            cursor.execute(_DETAIL_COLUMNS + f" WHERE r.id IN ({placeholders})", missing)
+            rows = cursor.fetchall()
+            for requirement in rows:
+                _store_detail(requirement)
+            return len(rows)
+    except Error as e:
+        print(f"預先載入需求單詳情時發生錯誤: {e}")
+        return 0
+
+def dispatch_scheduled_requirements(conn, commit=True):
     """檢查並發派到期的預約需求單"""
     try:
         current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -314,15 +854,45 @@ def dispatch_scheduled_requirements(conn):
                     WHERE id = ?
                 ''', (current_time, req_id))
             
-            conn.commit()
+            if commit:
+                conn.commit()
             return len(req_ids)
         
         return 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return 0
 
-def cancel_scheduled_requirement(conn, req_id):
+def get_dispatch_lag(conn):
+    """獲取最早到期但尚未發派的預約需求單已逾時的秒數
+
+    排程器正常運作時，到期的預約需求單會在下一次檢查時發派，逾時不會超過檢查間隔。
+
+    Args:
+        conn: 數據庫連接
+
+    Returns:
+        float: 逾時秒數，沒有到期未發派的需求單時返回 0，查詢失敗時返回 None
+    """
+    try:
+        now = datetime.datetime.now()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT MIN(scheduled_time) FROM requirements
+            WHERE is_dispatched = 0 AND scheduled_time <= ?
+        ''', (now.strftime("%Y-%m-%d %H:%M:%S"),))
+        oldest = cursor.fetchone()[0]
+        if oldest is None:
+            return 0.0
+        return (now - datetime.datetime.strptime(oldest[:19], "%Y-%m-%d %H:%M:%S")).total_seconds()
+    except (Error, ValueError) as e:
+        print(f"獲取預約發派延遲時發生錯誤: {e}")
+        return None
+
+def cancel_scheduled_requirement(conn, req_id, commit=True):
     """取消預約發派的需求單"""
     try:
         cursor = conn.cursor()
@@ -330,19 +900,24 @@ def cancel_scheduled_requirement(conn, req_id):
             DELETE FROM requirements 
             WHERE id = ? AND is_dispatched = 0
         ''', (req_id,))
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.rowcount > 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
-def submit_requirement(conn, req_id, comment):
+def submit_requirement(conn, req_id, comment, commit=True):
     """員工提交需求單完成情況
     
     Args:
         conn: 數據庫連接
         req_id: 需求單ID
         comment: 員工完成情況說明
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
         
     Returns:
         bool: 操作是否成功
@@ -357,43 +932,54 @@ def submit_requirement(conn, req_id, comment):
             WHERE id = ? AND status = 'pending'
         ''', (comment, current_time, req_id))
         
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.rowcount > 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
-def approve_requirement(conn, req_id):
+def approve_requirement(conn, req_id, commit=True):
     """管理員審核通過需求單
     
     Args:
         conn: 數據庫連接
         req_id: 需求單ID
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
         
     Returns:
         bool: 操作是否成功
     """
     try:
         cursor = conn.cursor()
+        current_time = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         cursor.execute('''
             UPDATE requirements
-            SET status = 'completed'
+            SET status = 'completed', approved_at = ?
             WHERE id = ? AND status = 'submitted'
-        ''', (req_id,))
+        ''', (current_time, req_id))
         
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.rowcount > 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
-def reject_requirement(conn, req_id):
+def reject_requirement(conn, req_id, commit=True):
     """管理員拒絕需求單，將狀態改回未完成
     
     Args:
         conn: 數據庫連接
         req_id: 需求單ID
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
         
     Returns:
         bool: 操作是否成功
@@ -407,18 +993,23 @@ def reject_requirement(conn, req_id):
             WHERE id = ? AND status = 'submitted'
         ''', (req_id,))
         
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.rowcount > 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
-def invalidate_requirement(conn, req_id):
+def invalidate_requirement(conn, req_id, commit=True):
     """使需求單失效
     
     Args:
         conn: 數據庫連接
         req_id: 需求單ID
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
         
     Returns:
         bool: 操作是否成功
@@ -432,9 +1023,13 @@ def invalidate_requirement(conn, req_id):
             WHERE id = ?
         ''', (req_id,))
         
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.rowcount > 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
@@ -456,8 +1051,10 @@ def clear_all_requirements():
         cursor.execute("SELECT COUNT(*) FROM requirements")
         count = cursor.fetchone()[0]
         
-        # 刪除所有需求單
+        # 刪除所有需求單（包含歸檔）
         cursor.execute("DELETE FROM requirements")
+        cursor.execute("DROP TABLE IF EXISTS requirements_archive")
+        create_tables(conn)
         conn.commit()
         
         print(f"已清空資料庫中的 {count} 個需求單")
@@ -467,12 +1064,13 @@ def clear_all_requirements():
         print(f"清空需求單時發生錯誤: {e}")
         return False
 
-def delete_requirement(conn, req_id):
+def delete_requirement(conn, req_id, commit=True):
     """刪除需求單（移到垃圾桶）
     
     Args:
         conn: 數據庫連接
         req_id: 需求單ID
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
         
     Returns:
         bool: 操作是否成功
@@ -487,18 +1085,25 @@ def delete_requirement(conn, req_id):
             WHERE id = ? AND is_deleted = 0
         ''', (current_time, req_id))
         
-        conn.commit()
+        if commit:
+            conn.commit()
         return cursor.rowcount > 0
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
-def restore_requirement(conn, req_id):
+def restore_requirement(conn, req_id, commit=True):
     """恢復已刪除的需求單
+
+    垃圾桶清除時歸檔的需求單（admin purge --archive）會先從 requirements_archive 移回。
     
     Args:
         conn: 數據庫連接
         req_id: 需求單ID
+        commit: 是否立即提交，False 表示由呼叫者統一提交（批次寫入，資料庫錯誤會拋出）
         
     Returns:
         bool: 操作是否成功
@@ -511,70 +1116,394 @@ def restore_requirement(conn, req_id):
             SET is_deleted = 0, deleted_at = NULL
             WHERE id = ? AND is_deleted = 1
         ''', (req_id,))
+        restored = cursor.rowcount > 0
         
-        conn.commit()
-        return cursor.rowcount > 0
+        if not restored and cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                                           "AND name = 'requirements_archive'").fetchone():
+            cursor.execute(f'''
+                INSERT INTO requirements ({_ARCHIVE_COLUMNS})
+                SELECT {_ARCHIVE_COLUMNS} FROM requirements_archive
+                WHERE id = ? AND is_deleted = 1
+            ''', (req_id,))
+            if cursor.rowcount > 0:
+                cursor.execute("DELETE FROM requirements_archive WHERE id = ?", (req_id,))
+                cursor.execute('''
+                    UPDATE requirements
+                    SET is_deleted = 0, deleted_at = NULL
+                    WHERE id = ?
+                ''', (req_id,))
+                restored = True
+        
+        if commit:
+            conn.commit()
+        return restored
     except Error as e:
+        if not commit:
+            raise
+        conn.rollback()
         print(e)
         return False
 
-def get_deleted_requirements(conn, admin_id):
-    """獲取已刪除的需求單 (管理員功能)"""
+def get_deleted_requirements(conn, admin_id, include_archived=False):
+    """獲取已刪除的需求單 (管理員功能)
+
+    Args:
+        conn: 數據庫連接
+        admin_id: 管理員ID
+        include_archived: 是否包含垃圾桶清除時歸檔的需求單
+
+    Returns:
+        list: 需求單列表，依刪除時間由新到舊排列
+    """
     try:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT r.id, r.title, r.description, r.status, r.priority, r.created_at, 
-                   u1.name as assigner_name, u2.name as assignee_name, r.deleted_at
+        _execute_with_archive(conn, cursor, '''
+            SELECT r.id, r.title, r.status, r.priority, r.created_at, 
+                   r.assigner_id, r.assignee_id, r.deleted_at
             FROM requirements r
-            JOIN users u1 ON r.assigner_id = u1.id
-            JOIN users u2 ON r.assignee_id = u2.id
             WHERE r.assigner_id = ? AND r.is_deleted = 1
-            ORDER BY r.deleted_at DESC
-        ''', (admin_id,))
-        return cursor.fetchall()
+        ''', (admin_id,), include_archived, order_by="deleted_at DESC")
+        
+        names = user_cache.get_user_names(conn)
+        return [
+            DeletedRequirement(req_id, title, status, priority, created_at,
+                               names[assigner_id], names[assignee_id], deleted_at)
+            for req_id, title, status, priority, created_at, assigner_id, assignee_id, deleted_at in cursor.fetchall()
+            if assigner_id in names and assignee_id in names
+        ]
     except Error as e:
         print(f"獲取已刪除需求單時發生錯誤: {e}")
         return []
 
-# 添加缺少的用戶管理函數
+def get_requirement_stats(conn, admin_id):
+    """獲取需求單統計（單次掃描）
+    
+    Args:
+        conn: 數據庫連接
+        admin_id: 管理員ID，用於統計該管理員發派的需求單
+        
+    Returns:
+        dict: 各項統計數量，發生錯誤時返回 None
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT
+                COALESCE(SUM(is_deleted = 0), 0),
+                COALESCE(SUM(status = 'pending' AND is_deleted = 0), 0),
+                COALESCE(SUM(status = 'submitted' AND is_deleted = 0), 0),
+                COALESCE(SUM(status = 'completed' AND is_deleted = 0), 0),
+                COALESCE(SUM(is_dispatched = 0), 0),
+                COALESCE(SUM(is_deleted = 1), 0),
+                COALESCE(SUM(assigner_id = ? AND is_deleted = 0), 0)
+            FROM requirements
+        ''', (admin_id,))
+        total, pending, submitted, completed, scheduled, deleted, mine = cursor.fetchone()
+        return {
+            'total': total,
+            'pending': pending,
+            'submitted': submitted,
+            'completed': completed,
+            'scheduled': scheduled,
+            'deleted': deleted,
+            'mine': mine,
+        }
+    except Error as e:
+        print(f"獲取需求單統計時發生錯誤: {e}")
+        return None
 
-def get_all_users(conn):
-    """獲取所有用戶列表"""
+# 可歸檔：已完成或已失效、不在垃圾桶中，且最後處理時間早於門檻
+_ARCHIVE_CONDITION = (f"status IN ({', '.join('?' for _ in ARCHIVE_STATUSES)}) AND is_deleted = 0 "
+                      "AND COALESCE(approved_at, completed_at, created_at) < ?")
+
+def _archive_cutoff(days):
+    return (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+
+def _remove_requirements(conn, condition, params, batch_size, archive=True, progress=None):
+    """分批將符合條件的需求單從 requirements 移到 requirements_archive（或直接刪除）
+
+    依ID順序處理，每批一個交易，避免長時間持有寫入鎖。
+    刪除時觸發器寫入變更記錄，快取與分析快照會隨之更新。
+
+    Args:
+        conn: 數據庫連接
+        condition: 篩選需求單的 SQL 條件（欄位不加表格別名）
+        params: 條件的參數
+        batch_size: 每批處理的筆數
+        archive: True 表示複製到歸檔表格後刪除，False 表示直接刪除
+        progress: 每批完成後呼叫的函數，參數為累計處理的筆數
+
+    Returns:
+        int: 處理的筆數
+    """
+    if batch_size < 1:
+        raise ValueError("批次大小必須大於 0")
+    cursor = conn.cursor()
+    if archive:
+        try:
+            cursor.execute("SELECT 1 FROM requirements_archive LIMIT 1")
+        except sqlite3.OperationalError:
+            # 舊版資料庫沒有歸檔表格
+            create_tables(conn)
+
+    removed = 0
+    last_id = 0
+    while True:
+        cursor.execute(f'''
+            SELECT MAX(id) FROM (
+                SELECT id FROM requirements WHERE id > ? AND {condition} ORDER BY id LIMIT ?
+            )
+        ''', (last_id,) + tuple(params) + (batch_size,))
+        upper = cursor.fetchone()[0]
+        if upper is None:
+            return removed
+
+        if archive:
+            archived_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            cursor.execute(f'''
+                INSERT INTO requirements_archive ({_ARCHIVE_COLUMNS}, archived_at)
+                SELECT {_ARCHIVE_COLUMNS}, ? FROM requirements
+                WHERE id > ? AND id <= ? AND {condition}
+            ''', (archived_at, last_id, upper) + tuple(params))
+            count = cursor.rowcount
+            # 同一個交易中只刪除剛複製的列（寫入鎖已取得，其他連接無法在兩個語句之間修改）
+            cursor.execute('''
+                DELETE FROM requirements
+                WHERE id > ? AND id <= ?
+                  AND id IN (SELECT id FROM requirements_archive WHERE id > ? AND id <= ?)
+            ''', (last_id, upper, last_id, upper))
+        else:
+            cursor.execute(f"DELETE FROM requirements WHERE id > ? AND id <= ? AND {condition}",
+                           (last_id, upper) + tuple(params))
+            count = cursor.rowcount
+        conn.commit()
+
+        removed += count
+        last_id = upper
+        if progress:
+            progress(removed)
+
+def count_archivable_requirements(conn, days=DEFAULT_ARCHIVE_DAYS):
+    """計算可以歸檔的需求單數量
+
+    Args:
+        conn: 數據庫連接
+        days: 完成（或失效）超過此天數的需求單才歸檔
+
+    Returns:
+        int: 需求單數量，發生錯誤時返回 None
+    """
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users ORDER BY id")
-        return cursor.fetchall()
+        cursor.execute(f"SELECT COUNT(*) FROM requirements WHERE {_ARCHIVE_CONDITION}",
+                       ARCHIVE_STATUSES + (_archive_cutoff(days),))
+        return cursor.fetchone()[0]
     except Error as e:
-        print(f"獲取用戶列表時發生錯誤: {e}")
-        return []
+        print(f"計算可歸檔的需求單時發生錯誤: {e}")
+        return None
 
-def get_all_admins(conn):
-    """獲取所有管理員列表"""
+def archive_requirements(conn, days=DEFAULT_ARCHIVE_DAYS, batch_size=ARCHIVE_BATCH_SIZE, progress=None):
+    """將已完成或已失效超過指定天數的需求單移到歸檔表格
+
+    歸檔的需求單不再出現在日常列表與統計中；以 include_archived=True
+    查詢列表或詳情、以及分析報表仍會包含這些需求單。
+
+    Args:
+        conn: 數據庫連接
+        days: 審核通過（或提交、建立）超過此天數的需求單才歸檔
+        batch_size: 每個交易移動的筆數
+        progress: 每批完成後呼叫的函數，參數為累計移動的筆數
+
+    Returns:
+        int: 歸檔的筆數，發生錯誤時返回 None
+    """
+    try:
+        if days < 0:
+            raise ValueError("保留天數不可小於 0")
+        return _remove_requirements(conn, _ARCHIVE_CONDITION, ARCHIVE_STATUSES + (_archive_cutoff(days),),
+                                    batch_size, progress=progress)
+    except (Error, ValueError) as e:
+        conn.rollback()
+        print(f"歸檔需求單時發生錯誤: {e}")
+        return None
+
+def get_archive_stats(conn):
+    """獲取需求單表格與歸檔表格的筆數
+
+    Returns:
+        dict: {'active': requirements 的筆數, 'archived': 歸檔的筆數, 'oldest_archived_at': ...}，
+              發生錯誤時返回 None
+    """
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE role = 'admin' ORDER BY id")
-        return cursor.fetchall()
+        cursor.execute("SELECT COUNT(*) FROM requirements")
+        active = cursor.fetchone()[0]
+        try:
+            cursor.execute("SELECT COUNT(*), MIN(archived_at) FROM requirements_archive")
+        except sqlite3.OperationalError:
+            create_tables(conn)
+            cursor.execute("SELECT COUNT(*), MIN(archived_at) FROM requirements_archive")
+        archived, oldest = cursor.fetchone()
+        return {'active': active, 'archived': archived, 'oldest_archived_at': oldest}
     except Error as e:
-        print(f"獲取管理員列表時發生錯誤: {e}")
-        return []
+        print(f"獲取歸檔統計時發生錯誤: {e}")
+        return None
 
-def get_user_by_id(conn, user_id):
-    """根據用戶ID獲取用戶資料"""
+# 可永久刪除：在垃圾桶中超過保留天數
+_PURGE_CONDITION = "is_deleted = 1 AND deleted_at < ?"
+
+def count_purgeable_requirements(conn, days=DEFAULT_TRASH_RETENTION_DAYS):
+    """計算垃圾桶中超過保留天數的需求單數量
+
+    Args:
+        conn: 數據庫連接
+        days: 保留天數
+
+    Returns:
+        int: 需求單數量，發生錯誤時返回 None
+    """
     try:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-        return cursor.fetchone()
+        cursor.execute(f"SELECT COUNT(*) FROM requirements WHERE {_PURGE_CONDITION}",
+                       (_archive_cutoff(days),))
+        return cursor.fetchone()[0]
     except Error as e:
-        print(f"獲取用戶資料時發生錯誤: {e}")
+        print(f"計算可清除的需求單時發生錯誤: {e}")
         return None
 
+def purge_deleted_requirements(conn, days=DEFAULT_TRASH_RETENTION_DAYS, batch_size=ARCHIVE_BATCH_SIZE,
+                               archive=False, progress=None):
+    """永久刪除（或歸檔）垃圾桶中超過保留天數的需求單
+
+    永久刪除後無法再恢復；歸檔的需求單保留在 requirements_archive 中，不會出現在一般列表與詳情中，
+    可以用 get_deleted_requirements(include_archived=True) 列出並以 restore_requirement 恢復。
+
+    Args:
+        conn: 數據庫連接
+        days: 刪除超過此天數的需求單才清除
+        batch_size: 每個交易處理的筆數
+        archive: True 表示移到歸檔表格，False 表示永久刪除
+        progress: 每批完成後呼叫的函數，參數為累計處理的筆數
+
+    Returns:
+        int: 清除的筆數，發生錯誤時返回 None
+    """
+    try:
+        if days < 0:
+            raise ValueError("保留天數不可小於 0")
+        return _remove_requirements(conn, _PURGE_CONDITION, (_archive_cutoff(days),),
+                                    batch_size, archive=archive, progress=progress)
+    except (Error, ValueError) as e:
+        conn.rollback()
+        print(f"清除垃圾桶時發生錯誤: {e}")
+        return None
+
+def trim_requirement_changes(conn, keep=CHANGE_LOG_RETENTION):
+    """刪除較早的需求單變更記錄，只保留最新的 keep 筆
+
+    get_requirement_changes 發現記錄已被清理時會要求呼叫端重新載入全部資料，
+    因此只影響落後超過 keep 筆變更的快取。
+
+    Args:
+        conn: 數據庫連接
+        keep: 保留的筆數
+
+    Returns:
+        int: 刪除的筆數，發生錯誤時返回 None
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM requirement_changes WHERE seq <= (SELECT MAX(seq) FROM requirement_changes) - ?",
+                       (keep,))
+        conn.commit()
+        return cursor.rowcount
+    except Error as e:
+        print(f"清理變更記錄時發生錯誤: {e}")
+        return None
+
+def get_free_space(conn):
+    """獲取資料庫的空間使用情況
+
+    Returns:
+        dict: {'auto_vacuum': 0/1/2 (none/full/incremental), 'page_size', 'page_count', 'free_pages'}
+    """
+    return {
+        'auto_vacuum': conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+        'page_size': conn.execute("PRAGMA page_size").fetchone()[0],
+        'page_count': conn.execute("PRAGMA page_count").fetchone()[0],
+        'free_pages': conn.execute("PRAGMA freelist_count").fetchone()[0],
+    }
+
+def reclaim_free_pages(conn, step=VACUUM_STEP_PAGES):
+    """以 incremental_vacuum 分段將空閒頁歸還給檔案系統
+
+    只有啟用增量清理（auto_vacuum = INCREMENTAL）的資料庫才能歸還空間；
+    每次只釋放 step 頁，兩次之間其他連接可以寫入。
+
+    Args:
+        conn: 數據庫連接
+        step: 每次釋放的頁數
+
+    Returns:
+        dict: {'enabled': 是否啟用增量清理, 'reclaimed_bytes': 歸還的位元組數,
+               'free_pages': 剩餘的空閒頁數}，發生錯誤時返回 None
+    """
+    try:
+        before = get_free_space(conn)
+        if before['auto_vacuum'] != 2:
+            return {'enabled': False, 'reclaimed_bytes': 0, 'free_pages': before['free_pages']}
+        free_pages = before['free_pages']
+        while free_pages > 0:
+            conn.execute(f"PRAGMA incremental_vacuum({int(step)})").fetchall()
+            remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if remaining >= free_pages:
+                break
+            free_pages = remaining
+        after = get_free_space(conn)
+        return {
+            'enabled': True,
+            'reclaimed_bytes': (before['page_count'] - after['page_count']) * after['page_size'],
+            'free_pages': after['free_pages'],
+        }
+    except Error as e:
+        print(f"歸還資料庫空間時發生錯誤: {e}")
+        return None
+
+def enable_incremental_vacuum(conn):
+    """將現有資料庫轉換為增量清理模式（執行一次完整的 VACUUM，期間鎖定整個資料庫）
+
+    Returns:
+        bool: 操作是否成功
+    """
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    except Error as e:
+        print(f"轉換增量清理模式時發生錯誤: {e}")
+        return False
+
+# 添加缺少的用戶管理函數
+
+def get_all_users(conn):
+    """獲取所有用戶列表"""
+    return user_cache.get_users(conn)
+
+def get_all_admins(conn):
+    """獲取所有管理員列表"""
+    return user_cache.get_users(conn, role='admin')
+
+def get_user_by_id(conn, user_id):
+    """根據用戶ID獲取用戶資料"""
+    return user_cache.get_user_by_id(conn, user_id)
+
 def create_user(conn, username, password, name, email, role='staff'):
     """創建新用戶
     
     Args:
         conn: 資料庫連接
         username: 用戶名
-        password: 密碼
+        password: 明文密碼（以雜湊值儲存）
         name: 真實姓名
         email: 電子郵件
         role: 角色 ('admin' 或 'staff')
@@ -586,9 +1515,10 @@ def create_user(conn, username, password, name, email, role='staff'):
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO users (username, password, name, email, role) VALUES (?, ?, ?, ?, ?)",
-            (username, password, name, email, role)
+            (username, hash_password(password), name, email, role)
         )
         conn.commit()
+        user_cache.invalidate()
         return cursor.lastrowid
     except Error as e:
         print(f"創建用戶時發生錯誤: {e}")
@@ -616,7 +1546,7 @@ def update_user(conn, user_id, **kwargs):
         for field, value in kwargs.items():
             if field in ['name', 'email', 'password', 'role']:
                 update_fields.append(f"{field} = ?")
-                params.append(value)
+                params.append(hash_password(value) if field == 'password' else value)
         
         if not update_fields:
             return False
@@ -627,6 +1557,7 @@ def update_user(conn, user_id, **kwargs):
         update_sql = f"UPDATE users SET {', '.join(update_fields)} WHERE id = ?"
         cursor.execute(update_sql, params)
         conn.commit()
+        user_cache.invalidate()
         
         return cursor.rowcount > 0
     except Error as e:
@@ -647,6 +1578,7 @@ def delete_user(conn, user_id):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
         conn.commit()
+        user_cache.invalidate()
         return cursor.rowcount > 0
     except Error as e:
         print(f"刪除用戶時發生錯誤: {e}")
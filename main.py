@@ -7,7 +7,7 @@ sys.dont_write_bytecode = True
 import tkinter as tk
 from tkinter import ttk, messagebox
 from auth import login
-from database import create_connection, initialize_database, dispatch_scheduled_requirements
+from database import create_connection, initialize_database, dispatch_scheduled_requirements, get_dispatch_lag
 from models import User
 from requirement_manager import RequirementManager
 from registration import show_registration_form
@@ -15,6 +15,8 @@ import datetime
 import time
 import threading
 import sqlite3
+import metrics
+from ui_profiler import timed, start_heartbeat
 
 # 檢查資料庫是否存在，如果不存在則從 schema.sql 創建
 def initialize_database_from_schema():
@@ -77,12 +79,14 @@ def start_global_scheduler():
         retry_interval = 60  # 正常情況下每分鐘檢查一次
         
         while scheduler_running:
+            started = time.time()
             try:
                 # 檢查並發派到期的需求單
                 conn = create_connection()
                 if conn:
+                    # 發派前記錄最早到期的需求單已等待多久（營運指標）
+                    lag = get_dispatch_lag(conn) if metrics.is_enabled() else 0.0
                     dispatched_count = dispatch_scheduled_requirements(conn)
-                    conn.close()
                     
                     if dispatched_count > 0:
                         # 使用主線程安全的方式顯示消息（僅當有管理員登入時）
@@ -90,14 +94,20 @@ def start_global_scheduler():
                         
                     # 成功執行後重置重試間隔
                     retry_interval = 60
+                    metrics.observe_scheduler_run(started, dispatched_count, lag or 0.0, retry_interval)
+                    metrics.flush(conn)
+                    metrics.export_textfile(conn)
+                    conn.close()
                 else:
                     # 無法創建連接時增加重試間隔
                     print("無法創建資料庫連接，稍後重試")
                     retry_interval = min(retry_interval * 2, 300)  # 最多等待5分鐘
+                    metrics.observe_scheduler_run(started, 0, None, retry_interval, error=True)
             except Exception as e:
                 # 發生錯誤時增加重試間隔
                 print(f"定時任務執行錯誤: {e}")
                 retry_interval = min(retry_interval * 2, 300)  # 最多等待5分鐘
+                metrics.observe_scheduler_run(started, 0, None, retry_interval, error=True)
                 
             # 等待指定的時間後再次檢查
             for _ in range(retry_interval):
@@ -255,6 +265,7 @@ class RequirementApp:
 current_app = None
 
 
+@timed
 def perform_login():
     username = entry_username.get()
     password = entry_password.get()
@@ -285,6 +296,7 @@ def perform_login():
         messagebox.showerror("登入失敗", result["message"])
 
 
+@timed
 def perform_logout():
     """執行登出操作"""
     # 詢問用戶是否確定要登出
@@ -338,6 +350,9 @@ root.bind("<Return>", lambda event: perform_login())
 # 啟動時間更新
 update_time()
 
+# 啟用 REQMGR_UI_PROFILE 時量測介面停頓
+start_heartbeat(root)
+
 # 在應用關閉時停止定時任務
 def on_closing():
     """應用關閉時的處理"""
@@ -0,0 +1,396 @@
+"""
+營運指標
+
+以 Prometheus 文字格式匯出計數器（counter）、量表（gauge）與直方圖（histogram），
+監控全局排程器、資料庫語句、CLI 命令與 API 請求：
+
+- 指標先記錄在進程內；API 伺服器的 GET /metrics 直接匯出
+- CLI 與 GUI 等其他進程啟用後，將自上次以來的增量累加到資料庫的 metric_totals 表格，
+  API 伺服器與 `reqmgr metrics` 匯出時一併包含，短期進程的指標不會隨進程結束而遺失
+- 設定 textfile 時，GUI 排程器每次檢查後寫入文字檔，供 node_exporter 的 textfile collector 讀取
+
+以配置文件的 metrics 區段或環境變量啟用：
+    REQMGR_METRICS=1                 啟用（保存增量、記錄資料庫語句時間）
+    REQMGR_METRICS_FILE=reqmgr.prom  排程器寫入的文字檔路徑
+
+資料庫語句的時間由 query_profiler 的連接記錄，因此啟用後每個語句約增加 3 微秒。
+"""
+
+import bisect
+import os
+import sqlite3
+import threading
+
+import query_profiler
+from database import create_connection, create_tables
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)
+
+_settings = {
+    'enabled': os.getenv('REQMGR_METRICS', '') not in ('', '0'),
+    'textfile': os.getenv('REQMGR_METRICS_FILE') or None,
+}
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _label_text(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class _Metric:
+    """指標的共同部分：名稱、說明、標籤與執行緒鎖"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指標 {self.name} 需要標籤: {', '.join(self.labelnames)}")
+        return _label_text(self.labelnames, [labels[name] for name in self.labelnames])
+
+class Counter(_Metric):
+    """只增不減的計數器"""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}  # 標籤文字 -> 值
+
+    def inc(self, amount=1, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+class Gauge(_Metric):
+    """可任意設定的量表"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+class Histogram(_Metric):
+    """依區間計數的直方圖，匯出累計的 _bucket、_sum 與 _count"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # 標籤文字 -> [各區間次數..., 超過最大區間的次數, 總和]
+
+    def observe(self, value, **labels):
+        key = self._labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(entry)) for key, entry in self._values.items()]
+        result = []
+        for key, entry in items:
+            prefix = key + ',' if key else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), entry[:-1]):
+                cumulative += count
+                result.append((self.name + '_bucket', f'{prefix}le="{_format_value(bound)}"', cumulative))
+            result.append((self.name + '_sum', key, entry[-1]))
+            result.append((self.name + '_count', key, cumulative))
+        return result
+
+class MetricsRegistry:
+    """指標目錄：註冊指標、匯出文字格式，並將增量保存到資料庫"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._flushed = {}  # (指標名稱, 樣本名稱, 標籤文字) -> 上次保存時的值
+        self._flush_lock = threading.Lock()
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    @staticmethod
+    def _execute(conn, sql, params=()):
+        try:
+            return conn.execute(sql, params)
+        except sqlite3.OperationalError:
+            # 舊版資料庫沒有 metric_totals 表格
+            create_tables(conn)
+            return conn.execute(sql, params)
+
+    def flush(self, conn):
+        """將自上次保存以來的增量累加到資料庫（量表直接覆蓋）
+
+        Args:
+            conn: 數據庫連接
+        """
+        with self._flush_lock:
+            added = []
+            replaced = []
+            current = {}
+            for metric in self._metrics.values():
+                for sample, labels, value in metric.samples():
+                    key = (metric.name, sample, labels)
+                    current[key] = value
+                    previous = self._flushed.get(key)
+                    if metric.kind == 'gauge':
+                        if previous != value:
+                            replaced.append((metric.name, sample, labels, value))
+                    elif previous is None or value != previous:
+                        # 新樣本即使為 0 也保存，直方圖匯出時才有完整的區間
+                        added.append((metric.name, sample, labels, value - (previous or 0)))
+            if not added and not replaced:
+                return
+            self._execute(conn, "SELECT 1 FROM metric_totals LIMIT 1")
+            conn.executemany(
+                "INSERT INTO metric_totals (metric, sample, labels, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (sample, labels) DO UPDATE SET value = value + excluded.value",
+                added
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metric_totals (metric, sample, labels, value) VALUES (?, ?, ?, ?)",
+                replaced
+            )
+            conn.commit()
+            self._flushed = current
+
+    def collect(self, conn=None):
+        """彙整進程內與資料庫中保存的指標
+
+        Args:
+            conn: 數據庫連接，None 表示只包含進程內的指標
+
+        Returns:
+            dict: 指標名稱 -> {(樣本名稱, 標籤文字): 值}
+        """
+        families = {}
+        if conn is not None:
+            rows = self._execute(conn, "SELECT metric, sample, labels, value FROM metric_totals").fetchall()
+            for metric, sample, labels, value in rows:
+                if metric in self._metrics:
+                    families.setdefault(metric, {})[(sample, labels)] = value
+        for name, metric in self._metrics.items():
+            family = families.setdefault(name, {})
+            for sample, labels, value in metric.samples():
+                if metric.kind == 'gauge':
+                    family[(sample, labels)] = value
+                else:
+                    # 已保存到資料庫的部分不重複計算
+                    flushed = self._flushed.get((name, sample, labels), 0)
+                    family[(sample, labels)] = family.get((sample, labels), 0) + value - flushed
+        return families
+
+    def render(self, conn=None):
+        """以 Prometheus 文字格式 (0.0.4) 匯出指標
+
+        Args:
+            conn: 數據庫連接，None 表示只匯出進程內的指標
+
+        Returns:
+            str: 文字格式的指標
+        """
+        lines = []
+        for name, family in sorted(self.collect(conn).items()):
+            if not family:
+                continue
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for (sample, labels), value in sorted(family.items(), key=_sample_order):
+                label_text = '{' + labels + '}' if labels else ''
+                lines.append(f"{sample}{label_text} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+def _sample_order(item):
+    """樣本排序：同一組標籤的直方圖區間依上限排列"""
+    (sample, labels), _ = item
+    base, _, le = labels.partition('le="')
+    bound = le.rstrip('"')
+    return (base.rstrip(','), sample.endswith('_count'), sample.endswith('_sum'),
+            float('inf') if bound in ('', '+Inf') else float(bound))
+
+registry = MetricsRegistry()
+
+# ---- 全局排程器 ----
+SCHEDULER_RUNS = registry.counter(
+    'reqmgr_scheduler_runs_total', "排程器檢查到期預約需求單的次數")
+SCHEDULER_DISPATCHED = registry.counter(
+    'reqmgr_scheduler_dispatched_total', "排程器發派的預約需求單數量")
+SCHEDULER_ERRORS = registry.counter(
+    'reqmgr_scheduler_errors_total', "排程器檢查失敗的次數")
+SCHEDULER_LAG = registry.gauge(
+    'reqmgr_scheduler_dispatch_lag_seconds', "上次檢查時最早到期但尚未發派的預約需求單已逾時的秒數")
+SCHEDULER_RETRY_INTERVAL = registry.gauge(
+    'reqmgr_scheduler_retry_interval_seconds', "排程器目前的檢查間隔（失敗時加長）")
+SCHEDULER_LAST_SUCCESS = registry.gauge(
+    'reqmgr_scheduler_last_success_timestamp_seconds', "排程器上次成功檢查的時間 (epoch 秒)")
+
+# ---- 垃圾桶清除 ----
+TRASH_PURGED = registry.counter(
+    'reqmgr_trash_purged_total', "清除的垃圾桶需求單數量（依處理方式: deleted / archived）", ('action',))
+VACUUM_RECLAIMED_BYTES = registry.counter(
+    'reqmgr_vacuum_reclaimed_bytes_total', "incremental_vacuum 歸還給檔案系統的位元組數")
+DATABASE_FREE_BYTES = registry.gauge(
+    'reqmgr_database_free_bytes', "上次清除後資料庫中仍未歸還的空閒空間")
+TRASH_LAST_PURGE = registry.gauge(
+    'reqmgr_trash_last_purge_timestamp_seconds', "上次成功清除垃圾桶的時間 (epoch 秒)")
+
+# ---- 資料庫、CLI 與 API ----
+DB_STATEMENT_SECONDS = registry.histogram(
+    'reqmgr_db_statement_duration_seconds', "SQL 語句的執行時間（依呼叫的函數）", ('function',))
+CLI_COMMAND_SECONDS = registry.histogram(
+    'reqmgr_cli_command_duration_seconds', "CLI 命令的執行時間", ('command', 'status'))
+API_REQUEST_SECONDS = registry.histogram(
+    'reqmgr_api_request_duration_seconds', "API 請求的處理時間", ('method', 'route', 'status'))
+
+def _observe_statement(function, elapsed):
+    DB_STATEMENT_SECONDS.observe(elapsed, function=function)
+
+def configure_metrics(enabled=None, textfile=None):
+    """設定營運指標（只影響之後建立的資料庫連接）
+
+    Args:
+        enabled: 是否啟用，None 表示不變
+        textfile: 排程器寫入的文字檔路徑，None 表示不變，空字串表示不寫入
+    """
+    if enabled is not None:
+        _settings['enabled'] = bool(enabled)
+    if textfile is not None:
+        _settings['textfile'] = textfile or None
+    if _settings['enabled']:
+        query_profiler.add_listener(_observe_statement)
+    else:
+        query_profiler.remove_listener(_observe_statement)
+
+if _settings['enabled']:
+    query_profiler.add_listener(_observe_statement)
+
+def is_enabled():
+    """營運指標是否啟用"""
+    return _settings['enabled']
+
+def flush(conn):
+    """啟用時將進程內指標的增量保存到資料庫，失敗時只印出訊息"""
+    if not _settings['enabled']:
+        return
+    try:
+        registry.flush(conn)
+    except sqlite3.Error as e:
+        print(f"保存營運指標時發生錯誤: {e}")
+
+def render(conn=None):
+    """以 Prometheus 文字格式匯出指標（見 MetricsRegistry.render）"""
+    return registry.render(conn)
+
+def write_textfile(path, conn=None):
+    """將指標寫入文字檔（先寫入暫存文件再取代，讀取端不會讀到寫到一半的內容）
+
+    Args:
+        path: 文字檔路徑
+        conn: 數據庫連接，None 表示只寫入進程內的指標
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(render(conn))
+    os.replace(temp_path, path)
+
+def export_textfile(conn):
+    """啟用且設定了文字檔路徑時寫入文字檔，失敗時只印出訊息"""
+    if not _settings['enabled'] or not _settings['textfile']:
+        return
+    try:
+        write_textfile(_settings['textfile'], conn)
+    except (OSError, sqlite3.Error) as e:
+        print(f"寫入營運指標文字檔時發生錯誤: {e}")
+
+def observe_scheduler_run(started, dispatched, lag, retry_interval, error=False):
+    """記錄一次排程器檢查
+
+    Args:
+        started: 檢查開始時間 (epoch 秒)
+        dispatched: 發派的需求單數量
+        lag: 最早到期的預約需求單已逾時的秒數
+        retry_interval: 下次檢查的間隔秒數
+        error: 檢查是否失敗
+    """
+    SCHEDULER_RUNS.inc()
+    SCHEDULER_RETRY_INTERVAL.set(retry_interval)
+    if error:
+        SCHEDULER_ERRORS.inc()
+        return
+    SCHEDULER_DISPATCHED.inc(dispatched)
+    SCHEDULER_LAG.set(lag)
+    SCHEDULER_LAST_SUCCESS.set(started)
+
+def record_cli_command(command, status, elapsed):
+    """記錄一次 CLI 命令的執行時間，啟用時立即保存到資料庫（CLI 進程隨後結束）
+
+    Args:
+        command: 命令名稱，例如 "requirement list"
+        status: ok 或 error
+        elapsed: 執行秒數
+    """
+    CLI_COMMAND_SECONDS.observe(elapsed, command=command, status=status)
+    if not _settings['enabled']:
+        return
+    conn = create_connection()
+    if conn is not None:
+        try:
+            flush(conn)
+        finally:
+            conn.close()
+
+def observe_trash_purge(purged, archive, reclaimed_bytes, free_bytes, finished):
+    """記錄一次垃圾桶清除
+
+    Args:
+        purged: 清除的需求單數量
+        archive: 是否移到歸檔表格（否則為永久刪除）
+        reclaimed_bytes: 歸還給檔案系統的位元組數
+        free_bytes: 仍未歸還的空閒空間
+        finished: 完成時間 (epoch 秒)
+    """
+    TRASH_PURGED.inc(purged, action='archived' if archive else 'deleted')
+    VACUUM_RECLAIMED_BYTES.inc(reclaimed_bytes)
+    DATABASE_FREE_BYTES.set(free_bytes)
+    TRASH_LAST_PURGE.set(finished)
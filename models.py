@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import NamedTuple, Optional
 
 @dataclass
 class User:
@@ -21,4 +22,94 @@ class Requirement:
     created_at: datetime
     scheduled_time: datetime = None  # 預約發派時間，None表示立即發派 
     comment: str = None  # 員工提交的完成情況說明
-    completed_at: datetime = None  # 員工提交完成的時間 
\ No newline at end of file
+    completed_at: datetime = None  # 員工提交完成的時間 
+
+# 查詢結果記錄
+# 以 NamedTuple 表示資料庫查詢的每一列：以 tuple 儲存不需要每筆資料一個 __dict__，
+# 欄位依查詢的投影定義，呼叫端以欄位名稱存取而不是依賴位置索引
+
+class UserRecord(NamedTuple):
+    """使用者資料（users 表格）"""
+    id: int
+    username: str
+    password: str
+    name: str
+    email: str
+    role: str
+
+class RequirementSummary(NamedTuple):
+    """員工收到的需求單列表"""
+    id: int
+    title: str
+    status: str
+    priority: str
+    created_at: str
+    assigner_name: str
+    scheduled_time: Optional[str]
+
+class DispatchedRequirement(NamedTuple):
+    """管理員已發派的需求單列表"""
+    id: int
+    title: str
+    status: str
+    priority: str
+    created_at: str
+    assignee_name: str
+    assignee_id: int
+    scheduled_time: Optional[str]
+    completed_at: Optional[str]
+
+class ScheduledRequirement(NamedTuple):
+    """管理員預約發派（尚未發派）的需求單列表"""
+    id: int
+    title: str
+    priority: str
+    scheduled_time: str
+    assignee_name: str
+    assignee_id: int
+
+class DeletedRequirement(NamedTuple):
+    """垃圾桶中的需求單列表"""
+    id: int
+    title: str
+    status: str
+    priority: str
+    created_at: str
+    assigner_name: str
+    assignee_name: str
+    deleted_at: Optional[str]
+
+class RequirementDetail(NamedTuple):
+    """單一需求單的完整資料"""
+    id: int
+    title: str
+    description: str
+    status: str
+    priority: str
+    created_at: str
+    assigner_name: str
+    assignee_name: str
+    assigner_id: int
+    assignee_id: int
+    scheduled_time: Optional[str]
+    comment: Optional[str]
+    completed_at: Optional[str]
+    is_dispatched: int
+    is_deleted: int
+    deleted_at: Optional[str]
+
+def record_factory(record_type):
+    """建立 sqlite3 的 row_factory，將查詢結果直接轉換為指定的記錄類型
+    
+    Args:
+        record_type: NamedTuple 記錄類型，欄位順序需與查詢的投影一致
+        
+    Returns:
+        function: 可指定給 cursor.row_factory 的函數
+    """
+    make = record_type._make
+    
+    def factory(cursor, row):
+        return make(row)
+    
+    return factory
@@ -0,0 +1,347 @@
+"""
+查詢效能紀錄
+
+啟用後，database.create_connection() 與 create_read_connection() 建立的連接會記錄
+每一個 SQL 語句的執行時間、返回筆數與呼叫位置：
+- 依語句彙整執行次數、總時間、最大時間與延遲分布（直方圖）
+- 超過門檻的語句連同 EXPLAIN QUERY PLAN 寫入慢查詢日誌
+- 進程結束時將彙整結果輸出到標準錯誤
+
+查詢時間從 execute 開始，包含讀取結果（fetch 或逐筆迭代）的時間，
+到結果讀完、執行下一個語句或游標被釋放時結束。慢查詢日誌不記錄參數值，避免寫入密碼等資料。
+
+以配置文件的 profiling 區段或環境變量啟用：
+    REQMGR_PROFILE=1               啟用紀錄
+    REQMGR_SLOW_QUERY_MS=50        慢查詢門檻（毫秒）
+    REQMGR_SLOW_QUERY_LOG=slow.log 慢查詢日誌路徑
+"""
+
+import atexit
+import bisect
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+DEFAULT_SLOW_QUERY_MS = 100
+DEFAULT_SLOW_QUERY_LOG = 'slow_queries.log'
+
+# 延遲直方圖的上限（毫秒），最後一格為超過 3000 毫秒
+HISTOGRAM_BOUNDS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000)
+_HISTOGRAM_BOUNDS = tuple(bound / 1000.0 for bound in HISTOGRAM_BOUNDS_MS)
+MAX_CALLSITES = 5  # 每個語句保留的呼叫位置數量
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+
+def _env_threshold_ms(name, default):
+    """讀取毫秒門檻環境變量，格式錯誤或小於 0 時警告並使用預設值
+
+    在模組載入時執行，不可拋出例外，否則包括 --help 在內的所有命令都無法啟動。
+    """
+    value = os.getenv(name)
+    if not value:
+        return float(default)
+    try:
+        threshold = float(value)
+    except ValueError:
+        threshold = -1
+    if not threshold >= 0:
+        print(f"警告: 環境變量 {name}={value!r} 不是有效的毫秒數，使用預設值 {default}", file=sys.stderr)
+        return float(default)
+    return threshold
+
+_settings = {
+    'enabled': os.getenv('REQMGR_PROFILE', '') not in ('', '0'),
+    'slow_query_ms': _env_threshold_ms('REQMGR_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS),
+    'slow_query_log': os.getenv('REQMGR_SLOW_QUERY_LOG') or DEFAULT_SLOW_QUERY_LOG,
+}
+
+_stats_lock = threading.Lock()
+_log_lock = threading.Lock()
+_stats = {}       # 正規化後的語句 -> 彙整資料
+_normalized = {}  # 原始語句 -> 正規化後的語句
+_callsites = {}   # (程式碼物件, 行號) -> (呼叫位置文字, 函數名稱)
+_listeners = []   # 每個語句完成時呼叫的函數，參數為 (函數名稱, 秒數)
+_perf_counter = time.perf_counter
+
+def configure_profiling(enabled=None, slow_query_ms=None, slow_query_log=None):
+    """設定查詢效能紀錄（只影響之後建立的連接）
+
+    Args:
+        enabled: 是否啟用，None 表示不變
+        slow_query_ms: 慢查詢門檻（毫秒），None 表示不變
+        slow_query_log: 慢查詢日誌路徑，None 表示不變
+    """
+    if enabled is not None:
+        _settings['enabled'] = bool(enabled)
+    if slow_query_ms is not None:
+        if float(slow_query_ms) < 0:
+            raise ValueError("慢查詢門檻不可小於 0")
+        _settings['slow_query_ms'] = float(slow_query_ms)
+    if slow_query_log is not None:
+        _settings['slow_query_log'] = slow_query_log
+
+def is_enabled():
+    """查詢效能紀錄是否啟用"""
+    return _settings['enabled']
+
+def add_listener(listener):
+    """註冊語句完成時的回呼函數（例如營運指標），參數為 (呼叫的函數名稱, 秒數)
+
+    有回呼函數時，即使未啟用紀錄，之後建立的連接也會量測語句時間。
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+def remove_listener(listener):
+    """移除 add_listener 註冊的回呼函數"""
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+def connection_factory():
+    """返回建立連接時使用的連接類別（未啟用且沒有回呼函數時為一般的 sqlite3.Connection）"""
+    return ProfiledConnection if _settings['enabled'] or _listeners else sqlite3.Connection
+
+def _callsite():
+    """返回本模組以外最近一層呼叫者的位置"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return ('?', '?')
+    key = (frame.f_code, frame.f_lineno)
+    callsite = _callsites.get(key)
+    if callsite is None:
+        code = frame.f_code
+        callsite = (f"{os.path.basename(code.co_filename)}:{frame.f_lineno} {code.co_name}", code.co_name)
+        if len(_callsites) < 10000:
+            _callsites[key] = callsite
+    return callsite
+
+def _normalize(sql):
+    normalized = _normalized.get(sql)
+    if normalized is None:
+        normalized = ' '.join(sql.split())
+        if len(_normalized) < 10000:
+            _normalized[sql] = normalized
+    return normalized
+
+def _explain(conn, sql, parameters):
+    """返回語句的 EXPLAIN QUERY PLAN（無法取得時返回說明文字）"""
+    if not sql.lstrip()[:7].upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # 以一般游標執行，不計入紀錄
+        cursor = sqlite3.Cursor(conn)
+        rows = cursor.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+        cursor.close()
+        return [row[-1] for row in rows]
+    except Exception as e:
+        return [f"(無法取得查詢計劃: {e})"]
+
+def _write_slow_query(conn, sql, parameters, elapsed, rows, callsite):
+    plan = _explain(conn, sql, parameters)
+    lines = [
+        f"{time.strftime('%Y-%m-%d %H:%M:%S')} {elapsed * 1000:.1f}ms rows={rows} "
+        f"pid={os.getpid()} at {callsite}",
+        f"    {_normalize(sql)}",
+    ]
+    lines += [f"    PLAN {step}" for step in plan]
+    try:
+        with _log_lock:
+            with open(_settings['slow_query_log'], 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+    except OSError as e:
+        print(f"寫入慢查詢日誌時發生錯誤: {e}", file=sys.stderr)
+
+def _record(conn, sql, parameters, elapsed, rows, callsite):
+    """記錄一個已完成的語句"""
+    callsite, function = callsite
+    for listener in _listeners:
+        listener(function, elapsed)
+    if not _settings['enabled']:
+        return
+    key = _normalize(sql)
+    bucket = bisect.bisect_left(_HISTOGRAM_BOUNDS, elapsed)
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = {
+                'count': 0, 'total': 0.0, 'max': 0.0, 'rows': 0,
+                'histogram': [0] * (len(_HISTOGRAM_BOUNDS) + 1), 'callsites': [],
+            }
+        entry['count'] += 1
+        entry['total'] += elapsed
+        entry['rows'] += rows
+        entry['histogram'][bucket] += 1
+        if elapsed > entry['max']:
+            entry['max'] = elapsed
+        if len(entry['callsites']) < MAX_CALLSITES and callsite not in entry['callsites']:
+            entry['callsites'].append(callsite)
+    if elapsed * 1000 >= _settings['slow_query_ms']:
+        _write_slow_query(conn, sql, parameters, elapsed, rows, callsite)
+
+class ProfiledCursor(sqlite3.Cursor):
+    """記錄執行時間與返回筆數的游標"""
+
+    _pending = None  # [語句, 參數, 已用時間, 筆數, 呼叫位置]
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            sql, parameters, elapsed, rows, callsite = pending
+            _record(self.connection, sql, parameters, elapsed, rows, callsite)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        callsite = _callsite()
+        start = _perf_counter()
+        super().execute(sql, parameters)
+        elapsed = _perf_counter() - start
+        if self.description is None:
+            # 沒有結果集的語句（修改、DDL），筆數為影響的列數
+            _record(self.connection, sql, parameters, elapsed, max(self.rowcount, 0), callsite)
+        else:
+            self._pending = [sql, parameters, elapsed, 0, callsite]
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        callsite = _callsite()
+        start = _perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        _record(self.connection, sql, (), _perf_counter() - start, max(self.rowcount, 0), callsite)
+        return self
+
+    def _fetched(self, elapsed, rows, exhausted):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += elapsed
+            pending[3] += rows
+            if exhausted:
+                self._finish()
+
+    def fetchone(self):
+        start = _perf_counter()
+        row = super().fetchone()
+        self._fetched(_perf_counter() - start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = _perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(_perf_counter() - start, len(rows),
+                      len(rows) < (self.arraysize if size is None else size))
+        return rows
+
+    def fetchall(self):
+        start = _perf_counter()
+        rows = super().fetchall()
+        self._fetched(_perf_counter() - start, len(rows), True)
+        return rows
+
+    def __iter__(self):
+        pending = self._pending
+        if pending is None:
+            return super().__iter__()
+        return self._iterate(pending)
+
+    def _iterate(self, pending):
+        fetch = sqlite3.Cursor.fetchone
+        while True:
+            start = _perf_counter()
+            row = fetch(self)
+            pending[2] += _perf_counter() - start
+            if row is None:
+                break
+            pending[3] += 1
+            yield row
+        if self._pending is pending:
+            self._finish()
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+class ProfiledConnection(sqlite3.Connection):
+    """所有語句都經由 ProfiledCursor 執行的連接"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def _percentile(histogram, count, fraction):
+    """由直方圖估計百分位數（返回所在區間的上限毫秒數，超過最大區間時返回 None）"""
+    target = fraction * count
+    seen = 0
+    for bound, bucket_count in zip(HISTOGRAM_BOUNDS_MS, histogram):
+        seen += bucket_count
+        if seen >= target:
+            return bound
+    return None
+
+def get_query_stats():
+    """返回本進程的查詢彙整結果，依總時間由大到小排列
+
+    Returns:
+        list: 每個語句一個 dict，包含 sql、count、total_ms、avg_ms、max_ms、
+              p50_ms、p95_ms（直方圖區間上限）、rows、histogram 與 callsites
+    """
+    with _stats_lock:
+        items = [(sql, dict(entry, histogram=list(entry['histogram']),
+                            callsites=list(entry['callsites'])))
+                 for sql, entry in _stats.items()]
+    result = []
+    for sql, entry in items:
+        count = entry['count']
+        result.append({
+            'sql': sql,
+            'count': count,
+            'total_ms': entry['total'] * 1000,
+            'avg_ms': entry['total'] * 1000 / count,
+            'max_ms': entry['max'] * 1000,
+            'p50_ms': _percentile(entry['histogram'], count, 0.50),
+            'p95_ms': _percentile(entry['histogram'], count, 0.95),
+            'rows': entry['rows'],
+            'histogram': dict(zip([f"<={bound}ms" for bound in HISTOGRAM_BOUNDS_MS] + ['>3000ms'],
+                                  entry['histogram'])),
+            'callsites': entry['callsites'],
+        })
+    result.sort(key=lambda item: item['total_ms'], reverse=True)
+    return result
+
+def reset_query_stats():
+    """清除本進程的查詢彙整結果"""
+    with _stats_lock:
+        _stats.clear()
+
+def format_report(limit=20):
+    """將查詢彙整結果格式化為文字報表（依總時間排列前 limit 個語句）"""
+    stats = get_query_stats()
+    if not stats:
+        return "沒有查詢紀錄"
+    lines = [f"{'次數':>7} {'總計(ms)':>10} {'平均(ms)':>9} {'p95(ms)':>8} {'最大(ms)':>9} {'筆數':>9}  語句"]
+    for item in stats[:limit]:
+        p95 = '>3000' if item['p95_ms'] is None else f"{item['p95_ms']:g}"
+        sql = item['sql'] if len(item['sql']) <= 100 else item['sql'][:97] + '...'
+        lines.append(f"{item['count']:>7} {item['total_ms']:>10.1f} {item['avg_ms']:>9.2f} {p95:>8} "
+                     f"{item['max_ms']:>9.1f} {item['rows']:>9}  {sql}")
+        lines.append(f"{'':>58}  @ {', '.join(item['callsites'])}")
+    return '\n'.join(lines)
+
+@atexit.register
+def _report_at_exit():
+    if _settings['enabled'] and _stats:
+        print(f"\n查詢效能紀錄（進程 {os.getpid()}）:\n{format_report()}", file=sys.stderr)
@@ -0,0 +1,239 @@
+"""
+登入嘗試限制
+
+以令牌桶（token bucket）限制每個（使用者名稱, 用戶端）組合與每個用戶端的登入失敗次數：
+每次失敗消耗一個令牌，令牌依固定速度補充；令牌用完時鎖定一段時間。
+檢查在驗證密碼之前進行，被鎖定的嘗試不會查詢使用者或計算密碼雜湊。
+鎖定只影響失敗的用戶端：其他人從網路上輸入錯誤密碼，不會讓使用者在自己的 CLI 或 GUI 被鎖定。
+
+狀態保存在記憶體中，並同步到資料庫的 login_rate_limits 表格，
+讓 CLI、GUI 與 API 伺服器等多個進程共用鎖定狀態：
+- 短期進程（CLI、GUI）每次記錄結果時立即同步
+- API 伺服器每隔數秒批次同步，大量失敗嘗試不會變成大量寫入；開始鎖定時立即同步
+- 檢查時重新載入超過同步間隔未載入的鍵，長期執行的進程也會看到其他進程記錄的鎖定
+"""
+
+import getpass
+import socket
+import sqlite3
+import threading
+import time
+
+from database import create_tables
+
+CAPACITY = 5            # 同一用戶端對每個使用者名稱的連續失敗次數上限
+CLIENT_CAPACITY = 20    # 每個用戶端的連續失敗次數上限（同一台機器可能有多位使用者）
+REFILL_SECONDS = 60     # 每補充一個令牌所需秒數
+LOCKOUT_SECONDS = 300   # 令牌用完後的鎖定秒數
+SYNC_INTERVAL = 5       # API 伺服器同步到資料庫的間隔（秒）
+
+def local_client():
+    """本機用戶端識別（CLI 與 GUI 使用）"""
+    try:
+        user = getpass.getuser()
+    except Exception:
+        user = 'unknown'
+    return f"local:{user}@{socket.gethostname()}"
+
+def login_keys(username, client):
+    """登入嘗試對應的限制鍵：（使用者名稱, 用戶端）組合與用戶端各一個
+
+    登入成功時只重設第一個鍵（同一用戶端可能有多位使用者）。
+    """
+    return (f"user:{username}@{client}", f"client:{client}")
+
+class LoginRateLimiter:
+    """登入失敗的令牌桶限制
+
+    每個鍵在記憶體中只保存 [令牌數, 更新時間, 鎖定到期時間]；
+    令牌已補滿且未鎖定的鍵在同步時移除，記憶體只保留近期失敗過的鍵。
+
+    Args:
+        capacity: 同一用戶端對每個使用者名稱的連續失敗次數上限
+        client_capacity: 每個用戶端的連續失敗次數上限
+        refill_seconds: 每補充一個令牌所需秒數
+        lockout_seconds: 令牌用完後的鎖定秒數
+        sync_interval: 同步到資料庫的間隔（秒），0 表示每次記錄後立即同步
+    """
+
+    def __init__(self, capacity=CAPACITY, client_capacity=CLIENT_CAPACITY,
+                 refill_seconds=REFILL_SECONDS, lockout_seconds=LOCKOUT_SECONDS, sync_interval=0):
+        self.capacity = capacity
+        self.client_capacity = client_capacity
+        self.refill_seconds = refill_seconds
+        self.lockout_seconds = lockout_seconds
+        self.sync_interval = sync_interval
+        self._buckets = {}   # 鍵 -> [令牌數, 更新時間, 鎖定到期時間]
+        self._dirty = {}     # 待同步的鍵 -> 是否已重設（登入成功）
+        self._loaded = {}    # 已從資料庫載入過的鍵 -> 載入時間
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def _capacity(self, key):
+        return self.client_capacity if key.startswith('client:') else self.capacity
+
+    def _refill(self, key, bucket, now):
+        tokens, updated_at, locked_until = bucket
+        if now > updated_at:
+            bucket[0] = min(self._capacity(key), tokens + (now - updated_at) / self.refill_seconds)
+            bucket[1] = now
+        return bucket
+
+    def _full(self, key, bucket, now):
+        """令牌已補滿且未鎖定"""
+        return self._refill(key, bucket, now)[0] >= self._capacity(key) and bucket[2] <= now
+
+    def _bucket(self, key, now):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(self._capacity(key)), now, 0.0]
+        return self._refill(key, bucket, now)
+
+    # ---- 資料庫同步 ----
+
+    @staticmethod
+    def _execute(conn, sql, params=()):
+        try:
+            return conn.execute(sql, params)
+        except sqlite3.OperationalError:
+            # 舊版資料庫沒有 login_rate_limits 表格
+            create_tables(conn)
+            return conn.execute(sql, params)
+
+    def _load(self, conn, keys, now, force=False):
+        """從資料庫載入其他進程記錄的狀態
+
+        只載入尚未載入或載入超過 sync_interval 秒的鍵（force 為 True 時全部重新載入）。
+        本進程尚未同步的鍵與資料庫取較嚴格者，其他鍵以資料庫為準。
+        """
+        if not force:
+            keys = [key for key in keys if now - self._loaded.get(key, -self.sync_interval) >= self.sync_interval]
+        if not keys:
+            return
+        placeholders = ", ".join("?" for _ in keys)
+        rows = self._execute(
+            conn,
+            f"SELECT key, tokens, updated_at, locked_until FROM login_rate_limits WHERE key IN ({placeholders})",
+            keys
+        ).fetchall()
+        stored = {key: self._refill(key, [tokens, updated_at, locked_until], now)
+                  for key, tokens, updated_at, locked_until in rows}
+        for key in keys:
+            if key in self._dirty:
+                if key in stored:
+                    bucket = self._bucket(key, now)
+                    bucket[0] = min(bucket[0], stored[key][0])
+                    bucket[2] = max(bucket[2], stored[key][2])
+            elif key in stored:
+                self._buckets[key] = stored[key]
+            else:
+                # 其他進程已重設（或記錄已過期清除）
+                self._buckets.pop(key, None)
+            self._loaded[key] = now
+
+    def _sync(self, conn, now):
+        """將有變更的鍵寫入資料庫"""
+        if self._dirty:
+            # 寫入前先合併其他進程的記錄（登入成功重設的鍵以本進程為準）
+            merge_keys = [key for key, reset in self._dirty.items() if not reset]
+            self._load(conn, merge_keys, now, force=True)
+            rows = []
+            recovered = []
+            for key in self._dirty:
+                bucket = self._bucket(key, now)
+                if self._full(key, bucket, now):
+                    recovered.append((key,))
+                else:
+                    rows.append((key, bucket[0], bucket[1], bucket[2]))
+            # 清除已過鎖定期且補滿（以較大的用戶端上限估算）的記錄
+            self._execute(
+                conn,
+                "DELETE FROM login_rate_limits WHERE locked_until <= ? AND updated_at + (? - tokens) * ? <= ?",
+                (now, max(self.capacity, self.client_capacity), self.refill_seconds, now)
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO login_rate_limits (key, tokens, updated_at, locked_until) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.executemany("DELETE FROM login_rate_limits WHERE key = ?", recovered)
+            conn.commit()
+            self._dirty.clear()
+
+        # 移除已恢復正常的鍵，並讓下次使用時重新從資料庫載入（載入記錄不會隨使用過的鍵無限增長）
+        for key in [key for key, bucket in self._buckets.items() if self._full(key, bucket, now)]:
+            del self._buckets[key]
+        self._loaded.clear()
+        self._last_sync = now
+
+    def _maybe_sync(self, conn, now):
+        if now - self._last_sync >= self.sync_interval:
+            self._sync(conn, now)
+
+    def sync(self, conn):
+        """立即將狀態同步到資料庫"""
+        with self._lock:
+            self._sync(conn, time.time())
+
+    # ---- 檢查與記錄 ----
+
+    def check(self, conn, keys):
+        """檢查是否允許登入嘗試（在驗證密碼之前呼叫）
+
+        Args:
+            conn: 數據庫連接
+            keys: 限制鍵（見 login_keys）
+
+        Returns:
+            int: 需要等待的秒數，0 表示允許
+        """
+        now = time.time()
+        with self._lock:
+            # 只讀取的長期進程同樣定期清理記憶體中的鍵
+            self._maybe_sync(conn, now)
+            self._load(conn, keys, now)
+            wait = 0.0
+            for key in keys:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    continue
+                tokens, _, locked_until = self._refill(key, bucket, now)
+                if locked_until > now:
+                    wait = max(wait, locked_until - now)
+                elif tokens < 1:
+                    wait = max(wait, (1 - tokens) * self.refill_seconds)
+            return int(wait + 0.999)
+
+    def record_failure(self, conn, keys):
+        """記錄一次登入失敗，令牌用完時鎖定"""
+        now = time.time()
+        with self._lock:
+            locked = False
+            for key in keys:
+                bucket = self._bucket(key, now)
+                bucket[0] = max(0.0, bucket[0] - 1)
+                if bucket[0] < 1 and bucket[2] <= now:
+                    bucket[2] = now + self.lockout_seconds
+                    locked = True
+                self._dirty.setdefault(key, False)
+            # 開始鎖定時立即同步，讓其他進程也拒絕此使用者
+            if locked:
+                self._sync(conn, now)
+            else:
+                self._maybe_sync(conn, now)
+
+    def record_success(self, conn, keys):
+        """記錄一次登入成功，重設使用者的失敗次數
+
+        只重設有失敗記錄的鍵（載入後與資料庫一致），沒有失敗過的使用者不會產生寫入。
+        """
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                if key in self._buckets:
+                    self._buckets[key] = [float(self._capacity(key)), now, 0.0]
+                    self._dirty[key] = True
+            self._maybe_sync(conn, now)
+
+# CLI 與 GUI 共用的限制器（短期進程，每次記錄後立即同步）
+login_limiter = LoginRateLimiter()
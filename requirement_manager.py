@@ -6,7 +6,10 @@ from database import (create_connection, get_all_staff, create_requirement,
                     cancel_scheduled_requirement, submit_requirement, approve_requirement,
                     reject_requirement, invalidate_requirement, get_admin_requirements_by_staff,
                     get_admin_scheduled_by_staff, delete_requirement, restore_requirement,
-                    get_deleted_requirements)
+                    get_deleted_requirements, get_requirement_detail,
+                    prefetch_requirement_details, clear_requirement_detail_cache)
+from assignment import choose_assignee
+from ui_profiler import timed
 import datetime
 import threading
 import time
@@ -15,6 +18,11 @@ import time
 class RequirementManager:
     """需求單管理類"""
     
+    # 開啟詳情視窗後，預先載入列表中前後各幾筆需求單的詳情
+    DETAIL_PREFETCH_RADIUS = 3
+    # 員工下拉選單中的自動分配選項
+    AUTO_ASSIGN_OPTION = "自動分配 (負載最低的員工)"
+    
     def __init__(self, root, current_user):
         """初始化需求單管理界面
         
@@ -53,6 +61,7 @@ class RequirementManager:
         # self.scheduler_running = False
         # self.start_scheduler()
     
+    @timed
     def setup_admin_interface(self):
         """設置管理員派發需求單介面"""
         # 創建選項卡控件
@@ -115,7 +124,7 @@ class RequirementManager:
         self.staff_combobox = ttk.Combobox(
             staff_selection_frame,
             textvariable=self.staff_var,
-            values=[f"{staff[1]} (ID:{staff[0]})" for staff in staffs],
+            values=[self.AUTO_ASSIGN_OPTION] + [f"{staff.username} (ID:{staff.id})" for staff in staffs],
             width=30
         )
         self.staff_combobox.pack(side=tk.LEFT, padx=(0, 5))
@@ -315,7 +324,7 @@ class RequirementManager:
         
         # 獲取所有員工
         staffs = get_all_staff(self.conn)
-        staff_options = [("全部員工", "all")] + [(staff[1], str(staff[0])) for staff in staffs]
+        staff_options = [("全部員工", "all")] + [(staff.username, str(staff.id)) for staff in staffs]
         
         # 建立員工過濾下拉選單
         self.staff_filter_var = tk.StringVar(value="all")
@@ -435,6 +444,7 @@ class RequirementManager:
         # 載入數據
         self.load_admin_reviewing_requirements()
         
+    @timed
     def load_admin_reviewing_requirements(self):
         """載入管理員待審核的需求單數據"""
         # 清空現有數據
@@ -445,39 +455,32 @@ class RequirementManager:
         requirements = get_admin_dispatched_requirements(self.conn, self.user_id)
         
         # 篩選狀態為「待審核」的需求單
-        reviewing_requirements = [req for req in requirements if req[3] == 'reviewing']
+        reviewing_requirements = [req for req in requirements if req.status == 'reviewing']
         
         # 添加數據到表格
         for req in reviewing_requirements:
             try:
-                # 處理數據可能缺少欄位的情況
-                if len(req) >= 11:
-                    req_id, title, desc, status, priority, created_at, assignee_name, assignee_id, scheduled_time, comment, completed_at = req
-                else:
-                    # 獲取基本必要數據
-                    req_id, title, desc, status, priority, created_at, assignee_name = req[:7]
-                
                 # 格式化緊急程度
-                priority_text = "緊急" if priority == "urgent" else "普通"
+                priority_text = "緊急" if req.priority == "urgent" else "普通"
                 
                 # 格式化時間
-                if isinstance(created_at, str):
+                if isinstance(req.created_at, str):
                     try:
-                        date_obj = datetime.datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+                        date_obj = datetime.datetime.strptime(req.created_at, "%Y-%m-%d %H:%M:%S")
                         date_text = date_obj.strftime("%Y-%m-%d %H:%M")
                     except ValueError:
-                        date_text = created_at
+                        date_text = req.created_at
                 else:
-                    date_text = created_at
+                    date_text = req.created_at
                     
                 # 插入數據
                 item_id = self.admin_reviewing_treeview.insert(
                     "", tk.END, 
-                    values=(req_id, title, assignee_name, priority_text, date_text)
+                    values=(req.id, req.title, req.assignee_name, priority_text, date_text)
                 )
                 
                 # 根據優先級設置行顏色
-                if priority == 'urgent':
+                if req.priority == 'urgent':
                     self.admin_reviewing_treeview.item(item_id, tags=('urgent',))
                 
             except Exception as e:
@@ -507,7 +510,7 @@ class RequirementManager:
         
         # 獲取所有員工
         staffs = get_all_staff(self.conn)
-        staff_options = [("全部員工", "all")] + [(staff[1], str(staff[0])) for staff in staffs]
+        staff_options = [("全部員工", "all")] + [(staff.username, str(staff.id)) for staff in staffs]
         
         # 建立員工過濾下拉選單
         self.scheduled_staff_filter_var = tk.StringVar(value="all")
@@ -579,6 +582,7 @@ class RequirementManager:
         # 載入數據
         self.load_admin_scheduled_requirements()
 
+    @timed
     def setup_staff_interface(self):
         """設置員工查看需求單介面"""
         # 需求單列表框架
@@ -667,6 +671,7 @@ class RequirementManager:
         
         return self.staff_frame
     
+    @timed
     def load_user_requirements(self):
         """載入用戶收到的需求單到列表"""
         # 清空現有數據
@@ -694,45 +699,37 @@ class RequirementManager:
         
         # 添加數據到表格
         for req in requirements:
-            # 處理數據可能缺少欄位的情況
-            if len(req) >= 9:
-                req_id, title, desc, status, priority, created_at, assigner_name, scheduled_time, comment = req
-            else:
-                # 如果沒有comment欄位，創建默認值
-                req_id, title, desc, status, priority, created_at, assigner_name, scheduled_time = req
-                comment = None
-            
             # 如果過濾條件不是"all"，則只顯示符合條件的需求單
-            if status_filter != "all" and status != status_filter:
+            if status_filter != "all" and req.status != status_filter:
                 continue
                 
             # 格式化狀態和緊急程度
-            status_text = self.get_status_display_text(status)
-            priority_text = "緊急" if priority == "urgent" else "普通"
+            status_text = self.get_status_display_text(req.status)
+            priority_text = "緊急" if req.priority == "urgent" else "普通"
             
             # 如果日期是字符串，需要解析
-            if isinstance(created_at, str):
+            if isinstance(req.created_at, str):
                 try:
                     # SQLite默認時間格式
-                    date_obj = datetime.datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+                    date_obj = datetime.datetime.strptime(req.created_at, "%Y-%m-%d %H:%M:%S")
                     date_text = date_obj.strftime("%Y-%m-%d %H:%M")
                 except ValueError:
-                    date_text = created_at
+                    date_text = req.created_at
             else:
-                date_text = created_at
+                date_text = req.created_at
                 
             # 插入數據
             item_id = self.staff_req_treeview.insert(
                 "", tk.END, 
-                values=(req_id, title, assigner_name, status_text, priority_text, date_text)
+                values=(req.id, req.title, req.assigner_name, status_text, priority_text, date_text)
             )
             
             # 根據狀態設置行顏色
-            if status == 'reviewing':
+            if req.status == 'reviewing':
                 self.staff_req_treeview.item(item_id, tags=('reviewing',))
-            elif status == 'completed':
+            elif req.status == 'completed':
                 self.staff_req_treeview.item(item_id, tags=('completed',))
-            elif status == 'invalid':
+            elif req.status == 'invalid':
                 self.staff_req_treeview.item(item_id, tags=('invalid',))
                 
         # 設置標籤顏色
@@ -740,6 +737,7 @@ class RequirementManager:
         self.staff_req_treeview.tag_configure('completed', background='#e6ffe6')
         self.staff_req_treeview.tag_configure('invalid', background='#f0f0f0')
 
+    @timed
     def show_requirement_details(self, event):
         """顯示需求單詳情"""
         # 獲取選中的項目
@@ -750,25 +748,15 @@ class RequirementManager:
         item = self.staff_req_treeview.item(selected_item)
         req_id = item['values'][0]
         
-        # 獲取需求單詳情
-        requirements = get_user_requirements(self.conn, self.user_id)
-        requirement = None
-        
-        for req in requirements:
-            if req[0] == req_id:
-                requirement = req
-                break
+        # 按需載入需求單詳情（列表只包含摘要欄位）
+        requirement = get_requirement_detail(self.conn, req_id)
         
-        if not requirement:
+        # 只能查看指派給自己且已發派、未刪除的需求單
+        if not requirement or requirement.assignee_id != self.user_id or not requirement.is_dispatched or requirement.is_deleted:
             return
+        self.schedule_detail_prefetch(self.staff_req_treeview, selected_item)
             
         # 顯示詳情對話框
-        # 處理數據可能缺少欄位的情況
-        if len(requirement) >= 9:
-            req_id, title, description, status, priority, created_at, assigner_name, scheduled_time, comment = requirement
-        else:
-            req_id, title, description, status, priority, created_at, assigner_name, scheduled_time = requirement
-            comment = None
         
         detail_window = tk.Toplevel(self.root)
         detail_window.title(f"需求單詳情 #{req_id}")
@@ -779,18 +767,18 @@ class RequirementManager:
         # 標題
         ttk.Label(
             detail_window, 
-            text=f"標題: {title}", 
+            text=f"標題: {requirement.title}", 
             font=('Arial', 12, 'bold')
         ).pack(pady=(20, 10), padx=20, anchor=tk.W)
         
         # 發派人
         ttk.Label(
             detail_window, 
-            text=f"發派人: {assigner_name}"
+            text=f"發派人: {requirement.assigner_name}"
         ).pack(pady=5, padx=20, anchor=tk.W)
         
         # 狀態
-        status_text = self.get_status_display_text(status)
+        status_text = self.get_status_display_text(requirement.status)
         status_label = ttk.Label(
             detail_window, 
             text=f"狀態: {status_text}"
@@ -798,33 +786,33 @@ class RequirementManager:
         status_label.pack(pady=5, padx=20, anchor=tk.W)
         
         # 根據狀態設置顏色
-        if status == 'reviewing':
+        if requirement.status == 'reviewing':
             status_label.configure(foreground="blue")
-        elif status == 'completed':
+        elif requirement.status == 'completed':
             status_label.configure(foreground="green")
-        elif status == 'invalid':
+        elif requirement.status == 'invalid':
             status_label.configure(foreground="gray")
         
         # 緊急程度
-        priority_text = "緊急" if priority == "urgent" else "普通"
+        priority_text = "緊急" if requirement.priority == "urgent" else "普通"
         priority_label = ttk.Label(
             detail_window, 
             text=f"緊急程度: {priority_text}"
         )
         priority_label.pack(pady=5, padx=20, anchor=tk.W)
         
-        if priority == "urgent":
+        if requirement.priority == "urgent":
             priority_label.configure(foreground="red")
         
         # 發派時間（實際發派時間）
-        if isinstance(created_at, str):
+        if isinstance(requirement.created_at, str):
             try:
-                date_obj = datetime.datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+                date_obj = datetime.datetime.strptime(requirement.created_at, "%Y-%m-%d %H:%M:%S")
                 date_text = date_obj.strftime("%Y-%m-%d %H:%M")
             except ValueError:
-                date_text = created_at
+                date_text = requirement.created_at
         else:
-            date_text = created_at
+            date_text = requirement.created_at
             
         ttk.Label(
             detail_window, 
@@ -833,15 +821,15 @@ class RequirementManager:
         ).pack(pady=5, padx=20, anchor=tk.W)
         
         # 如果有預約時間，顯示預約時間
-        if scheduled_time:
-            if isinstance(scheduled_time, str):
+        if requirement.scheduled_time:
+            if isinstance(requirement.scheduled_time, str):
                 try:
-                    date_obj = datetime.datetime.strptime(scheduled_time, "%Y-%m-%d %H:%M:%S")
+                    date_obj = datetime.datetime.strptime(requirement.scheduled_time, "%Y-%m-%d %H:%M:%S")
                     scheduled_text = date_obj.strftime("%Y-%m-%d %H:%M")
                 except ValueError:
-                    scheduled_text = scheduled_time
+                    scheduled_text = requirement.scheduled_time
             else:
-                scheduled_text = scheduled_time
+                scheduled_text = requirement.scheduled_time
                 
             ttk.Label(
                 detail_window, 
@@ -861,7 +849,7 @@ class RequirementManager:
         content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
         
         content_text = tk.Text(content_frame, wrap=tk.WORD, height=8)
-        content_text.insert(tk.END, description)
+        content_text.insert(tk.END, requirement.description)
         content_text.config(state=tk.DISABLED)  # 設為只讀
         
         scrollbar = ttk.Scrollbar(content_frame, command=content_text.yview)
@@ -871,7 +859,7 @@ class RequirementManager:
         content_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
         # 如果有完成說明，顯示完成說明
-        if comment and (status == 'reviewing' or status == 'completed'):
+        if requirement.comment and (requirement.status == 'reviewing' or requirement.status == 'completed'):
             ttk.Label(
                 detail_window, 
                 text="完成情況:", 
@@ -882,7 +870,7 @@ class RequirementManager:
             comment_frame.pack(fill=tk.X, padx=20, pady=5)
             
             comment_text = tk.Text(comment_frame, wrap=tk.WORD, height=4)
-            comment_text.insert(tk.END, comment)
+            comment_text.insert(tk.END, requirement.comment)
             comment_text.config(state=tk.DISABLED)  # 設為只讀
             
             comment_scroll = ttk.Scrollbar(comment_frame, command=comment_text.yview)
@@ -900,7 +888,7 @@ class RequirementManager:
         left_button_frame.pack(side=tk.LEFT, fill=tk.X, padx=20)
         
         # 如果需求單狀態是「未完成」，顯示提交按鈕
-        if status == 'pending':
+        if requirement.status == 'pending':
             ttk.Button(
                 left_button_frame, 
                 text="提交完成情況", 
@@ -921,6 +909,7 @@ class RequirementManager:
         else:
             self.schedule_frame.grid_remove()
 
+    @timed
     def create_requirement(self):
         """建立新的需求單"""
         staff_str = self.staff_combobox.get()
@@ -928,13 +917,6 @@ class RequirementManager:
             messagebox.showerror("錯誤", "請選擇要指派的員工")
             return
 
-        # 從下拉框中提取員工ID
-        try:
-            staff_id = int(staff_str.split("ID:")[1].rstrip(")"))
-        except (IndexError, ValueError) as e:
-            messagebox.showerror("錯誤", f"提取員工ID時發生錯誤: {e}")
-            return
-
         title = self.title_entry.get()
         description = self.desc_text.get("1.0", tk.END).strip()
         priority = self.priority_var.get()
@@ -942,6 +924,21 @@ class RequirementManager:
         if not title or not description:
             messagebox.showerror("錯誤", "標題和內容不能為空")
             return
+
+        if staff_str == self.AUTO_ASSIGN_OPTION:
+            # 自動分配給目前負載最低的員工
+            staff = choose_assignee(self.conn, priority)
+            if not staff:
+                messagebox.showerror("錯誤", "沒有可自動分配的員工")
+                return
+            staff_id = staff.id
+        else:
+            # 從下拉框中提取員工ID
+            try:
+                staff_id = int(staff_str.split("ID:")[1].rstrip(")"))
+            except (IndexError, ValueError) as e:
+                messagebox.showerror("錯誤", f"提取員工ID時發生錯誤: {e}")
+                return
             
         # 處理預約發派邏輯
         scheduled_time = None
@@ -984,6 +981,8 @@ class RequirementManager:
                 message = f"需求單 #{req_id} (緊急程度: {priority_text}) 已設定於 {scheduled_time} 發派"
             else:
                 message = f"需求單 #{req_id} (緊急程度: {priority_text}) 已成功派發"
+            if staff_str == self.AUTO_ASSIGN_OPTION:
+                message += f"\n已自動分配給: {staff.name} ({staff.username})"
                 
             messagebox.showinfo("成功", message)
             self.title_entry.delete(0, tk.END)
@@ -1015,10 +1014,12 @@ class RequirementManager:
         if self.staff_frame:
             self.staff_frame.pack_forget()
             
-        # 關閉資料庫連接
+        # 關閉資料庫連接並清除詳情快取
         if self.conn:
             self.conn.close()
+        clear_requirement_detail_cache()
 
+    @timed
     def load_admin_dispatched_requirements(self):
         """載入管理員已發派的需求單數據"""
         # 清空現有數據
@@ -1048,48 +1049,36 @@ class RequirementManager:
         # 添加數據到表格
         for req in requirements:
             try:
-                # 處理數據可能缺少欄位的情況
-                if len(req) >= 11:
-                    req_id, title, desc, status, priority, created_at, assignee_name, assignee_id, scheduled_time, comment, completed_at = req
-                elif len(req) >= 9:
-                    req_id, title, desc, status, priority, created_at, assignee_name, assignee_id, scheduled_time = req
-                    comment = None
-                    completed_at = None
-                else:
-                    # 基本信息不完整，跳過此記錄
-                    print(f"跳過不完整的需求單記錄: {req}")
-                    continue
-                
                 # 如果狀態過濾條件不是"all"，則只顯示符合條件的需求單
-                if status_filter != "all" and status != status_filter:
+                if status_filter != "all" and req.status != status_filter:
                     continue
                     
                 # 格式化狀態和緊急程度
-                status_text = self.get_status_display_text(status)
-                priority_text = "緊急" if priority == "urgent" else "普通"
+                status_text = self.get_status_display_text(req.status)
+                priority_text = "緊急" if req.priority == "urgent" else "普通"
                 
                 # 格式化時間
-                if isinstance(created_at, str):
+                if isinstance(req.created_at, str):
                     try:
-                        date_obj = datetime.datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+                        date_obj = datetime.datetime.strptime(req.created_at, "%Y-%m-%d %H:%M:%S")
                         date_text = date_obj.strftime("%Y-%m-%d %H:%M")
                     except ValueError:
-                        date_text = created_at
+                        date_text = req.created_at
                 else:
-                    date_text = created_at
+                    date_text = req.created_at
                     
                 # 插入數據
                 item_id = self.admin_dispatched_treeview.insert(
                     "", tk.END, 
-                    values=(req_id, title, assignee_name, status_text, priority_text, date_text)
+                    values=(req.id, req.title, req.assignee_name, status_text, priority_text, date_text)
                 )
                 
                 # 根據狀態設置行顏色或標記
-                if status == 'reviewing':
+                if req.status == 'reviewing':
                     self.admin_dispatched_treeview.item(item_id, tags=('reviewing',))
-                elif status == 'completed':
+                elif req.status == 'completed':
                     self.admin_dispatched_treeview.item(item_id, tags=('completed',))
-                elif status == 'invalid':
+                elif req.status == 'invalid':
                     self.admin_dispatched_treeview.item(item_id, tags=('invalid',))
             except Exception as e:
                 print(f"處理需求單時發生錯誤: {e}, 數據: {req}")
@@ -1099,6 +1088,7 @@ class RequirementManager:
         self.admin_dispatched_treeview.tag_configure('completed', background='#e6ffe6')
         self.admin_dispatched_treeview.tag_configure('invalid', background='#f0f0f0')
 
+    @timed
     def load_admin_scheduled_requirements(self):
         """載入管理員預約發派的需求單數據"""
         # 清空現有數據
@@ -1126,27 +1116,26 @@ class RequirementManager:
         
         # 添加數據到表格
         for req in requirements:
-            req_id, title, desc, priority, scheduled_time, assignee_name, assignee_id = req
-            
             # 格式化緊急程度
-            priority_text = "緊急" if priority == "urgent" else "普通"
+            priority_text = "緊急" if req.priority == "urgent" else "普通"
             
             # 格式化時間
-            if isinstance(scheduled_time, str):
+            if isinstance(req.scheduled_time, str):
                 try:
-                    date_obj = datetime.datetime.strptime(scheduled_time, "%Y-%m-%d %H:%M:%S")
+                    date_obj = datetime.datetime.strptime(req.scheduled_time, "%Y-%m-%d %H:%M:%S")
                     scheduled_text = date_obj.strftime("%Y-%m-%d %H:%M")
                 except ValueError:
-                    scheduled_text = scheduled_time
+                    scheduled_text = req.scheduled_time
             else:
-                scheduled_text = scheduled_time
+                scheduled_text = req.scheduled_time
                 
             # 插入數據
             self.admin_scheduled_treeview.insert(
                 "", tk.END, 
-                values=(req_id, title, assignee_name, priority_text, scheduled_text)
+                values=(req.id, req.title, req.assignee_name, priority_text, scheduled_text)
             )
             
+    @timed
     def show_dispatched_details(self, event):
         """顯示已發派需求單詳情"""
         # 獲取選中的項目
@@ -1157,30 +1146,15 @@ class RequirementManager:
         item = self.admin_dispatched_treeview.item(selected_item)
         req_id = item['values'][0]
         
-        # 獲取需求單詳情
-        requirements = get_admin_dispatched_requirements(self.conn, self.user_id)
-        requirement = None
-        
-        for req in requirements:
-            if req[0] == req_id:
-                requirement = req
-                break
+        # 按需載入需求單詳情（列表只包含摘要欄位）
+        requirement = get_requirement_detail(self.conn, req_id)
         
-        if not requirement:
+        if not requirement or requirement.assigner_id != self.user_id:
             return
+        self.schedule_detail_prefetch(self.admin_dispatched_treeview, selected_item)
             
         # 顯示詳情
         try:
-            # 處理數據可能缺少欄位的情況
-            if len(requirement) >= 11:
-                req_id, title, description, status, priority, created_at, assignee_name, assignee_id, scheduled_time, comment, completed_at = requirement
-            elif len(requirement) >= 9:
-                req_id, title, description, status, priority, created_at, assignee_name, assignee_id, scheduled_time = requirement
-                comment = None
-                completed_at = None
-            else:
-                messagebox.showerror("錯誤", "需求單詳情不完整")
-                return
         
             # 創建詳情視窗
             detail_window = tk.Toplevel(self.root)
@@ -1192,7 +1166,7 @@ class RequirementManager:
             # 標題
             ttk.Label(
                 detail_window, 
-                text=title, 
+                text=requirement.title, 
                 font=('Arial', 14, 'bold')
             ).pack(pady=(20, 10), padx=20, anchor=tk.W)
             
@@ -1206,20 +1180,20 @@ class RequirementManager:
             
             ttk.Label(
                 left_details, 
-                text=f"狀態: {status}", 
+                text=f"狀態: {requirement.status}", 
                 font=('Arial', 10)
             ).pack(pady=2, anchor=tk.W)
             
             ttk.Label(
                 left_details, 
-                text=f"緊急程度: {priority}", 
+                text=f"緊急程度: {requirement.priority}", 
                 font=('Arial', 10),
-                foreground="red" if priority == "緊急" else "black"
+                foreground="red" if requirement.priority == "緊急" else "black"
             ).pack(pady=2, anchor=tk.W)
             
             ttk.Label(
                 left_details, 
-                text=f"發派時間: {created_at}", 
+                text=f"發派時間: {requirement.created_at}", 
                 font=('Arial', 10)
             ).pack(pady=2, anchor=tk.W)
             
@@ -1229,14 +1203,14 @@ class RequirementManager:
             
             ttk.Label(
                 right_details, 
-                text=f"指派給: {assignee_name}", 
+                text=f"指派給: {requirement.assignee_name}", 
                 font=('Arial', 10)
             ).pack(pady=2, anchor=tk.W)
             
-            if status in ["待審核", "已完成"]:
+            if requirement.status in ["待審核", "已完成"]:
                 ttk.Label(
                     right_details, 
-                    text=f"完成時間: {completed_at}", 
+                    text=f"完成時間: {requirement.completed_at}", 
                     font=('Arial', 10)
                 ).pack(pady=2, anchor=tk.W)
             
@@ -1255,7 +1229,7 @@ class RequirementManager:
             content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
             
             content_text = tk.Text(content_frame, wrap=tk.WORD, height=8)
-            content_text.insert(tk.END, description)
+            content_text.insert(tk.END, requirement.description)
             content_text.config(state=tk.DISABLED)  # 設為只讀
             
             scrollbar = ttk.Scrollbar(content_frame, command=content_text.yview)
@@ -1265,7 +1239,7 @@ class RequirementManager:
             content_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
             
             # 如果有完成情況說明，則顯示
-            if comment:
+            if requirement.comment:
                 # 說明標題
                 ttk.Label(
                     detail_window, 
@@ -1278,7 +1252,7 @@ class RequirementManager:
                 comment_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
                 
                 comment_text = tk.Text(comment_frame, wrap=tk.WORD, height=4)
-                comment_text.insert(tk.END, comment)
+                comment_text.insert(tk.END, requirement.comment)
                 comment_text.config(state=tk.DISABLED)  # 設為只讀
                 
                 comment_scrollbar = ttk.Scrollbar(comment_frame, command=comment_text.yview)
@@ -1296,7 +1270,7 @@ class RequirementManager:
             left_button_frame.pack(side=tk.LEFT, fill=tk.X)
             
             # 如果狀態是待審核，顯示審核和退回按鈕
-            if status == "待審核":
+            if requirement.status == "待審核":
                 ttk.Button(
                     left_button_frame, 
                     text="審核通過", 
@@ -1310,7 +1284,7 @@ class RequirementManager:
                 ).pack(side=tk.LEFT, padx=5)
             
             # 如果狀態不是已失效，顯示設為失效按鈕
-            if status != "已失效":
+            if requirement.status != "已失效":
                 ttk.Button(
                     left_button_frame, 
                     text="設為失效", 
@@ -1333,6 +1307,7 @@ class RequirementManager:
         except Exception as e:
             messagebox.showerror("錯誤", f"顯示需求單詳情時發生錯誤: {e}")
         
+    @timed
     def show_scheduled_details(self, event):
         """顯示預約發派需求單詳情"""
         # 獲取選中的項目
@@ -1343,20 +1318,14 @@ class RequirementManager:
         item = self.admin_scheduled_treeview.item(selected_item)
         req_id = item['values'][0]
         
-        # 獲取需求單詳情
-        requirements = get_admin_scheduled_requirements(self.conn, self.user_id)
-        requirement = None
-        
-        for req in requirements:
-            if req[0] == req_id:
-                requirement = req
-                break
+        # 按需載入需求單詳情（列表只包含摘要欄位）
+        requirement = get_requirement_detail(self.conn, req_id)
         
-        if not requirement:
+        if not requirement or requirement.assigner_id != self.user_id:
             return
+        self.schedule_detail_prefetch(self.admin_scheduled_treeview, selected_item)
             
         # 顯示詳情
-        req_id, title, description, priority, scheduled_time, assignee_name, assignee_id = requirement
         
         # 創建詳情視窗
         detail_window = tk.Toplevel(self.root)
@@ -1368,7 +1337,7 @@ class RequirementManager:
         # 標題
         ttk.Label(
             detail_window, 
-            text=title, 
+            text=requirement.title, 
             font=('Arial', 14, 'bold')
         ).pack(pady=(20, 10), padx=20, anchor=tk.W)
         
@@ -1382,14 +1351,14 @@ class RequirementManager:
         
         ttk.Label(
             left_details, 
-            text=f"緊急程度: {priority}", 
+            text=f"緊急程度: {requirement.priority}", 
             font=('Arial', 10),
-            foreground="red" if priority == "緊急" else "black"
+            foreground="red" if requirement.priority == "緊急" else "black"
         ).pack(pady=2, anchor=tk.W)
         
         ttk.Label(
             left_details, 
-            text=f"預約發派時間: {scheduled_time}", 
+            text=f"預約發派時間: {requirement.scheduled_time}", 
             font=('Arial', 10)
         ).pack(pady=2, anchor=tk.W)
         
@@ -1399,7 +1368,7 @@ class RequirementManager:
         
         ttk.Label(
             right_details, 
-            text=f"指派給: {assignee_name}", 
+            text=f"指派給: {requirement.assignee_name}", 
             font=('Arial', 10)
         ).pack(pady=2, anchor=tk.W)
         
@@ -1418,7 +1387,7 @@ class RequirementManager:
         content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
         
         content_text = tk.Text(content_frame, wrap=tk.WORD, height=8)
-        content_text.insert(tk.END, description)
+        content_text.insert(tk.END, requirement.description)
         content_text.config(state=tk.DISABLED)  # 設為只讀
         
         scrollbar = ttk.Scrollbar(content_frame, command=content_text.yview)
@@ -1461,6 +1430,7 @@ class RequirementManager:
         if confirm:
             self.perform_cancel_scheduled(req_id)
             
+    @timed
     def perform_cancel_scheduled(self, req_id, window_to_close=None):
         """執行取消預約發派"""
         if cancel_scheduled_requirement(self.conn, req_id):
@@ -1489,6 +1459,36 @@ class RequirementManager:
         }
         return status_map.get(status, status) 
 
+    def schedule_detail_prefetch(self, treeview, selected_item):
+        """在介面空閒時預先載入選中項目前後相鄰需求單的詳情
+        
+        管理員逐筆點擊查看時，下一個詳情視窗可以直接從快取中開啟。
+        
+        Args:
+            treeview: 需求單列表
+            selected_item: 目前選中的項目
+        """
+        def prefetch():
+            try:
+                items = treeview.get_children()
+                index = items.index(selected_item[0])
+            except (tk.TclError, ValueError, IndexError):
+                return
+            
+            radius = self.DETAIL_PREFETCH_RADIUS
+            neighbours = items[max(index - radius, 0):index] + items[index + 1:index + 1 + radius]
+            req_ids = []
+            for item in neighbours:
+                values = treeview.item(item, 'values')
+                if values and str(values[0]).isdigit():
+                    req_ids.append(int(values[0]))
+            
+            if req_ids and self.conn:
+                prefetch_requirement_details(self.conn, req_ids)
+        
+        self.root.after_idle(prefetch)
+
+    @timed
     def submit_requirement(self):
         """員工提交需求單完成情況"""
         # 檢查用戶ID是否有效
@@ -1555,6 +1555,7 @@ class RequirementManager:
             command=lambda: self.perform_submit_requirement(req_id, comment_text.get("1.0", tk.END).strip(), submit_window)
         ).pack(side=tk.RIGHT)
         
+    @timed
     def perform_submit_requirement(self, req_id, comment, window):
         """執行提交需求單操作"""
         if not comment:
@@ -1568,6 +1569,7 @@ class RequirementManager:
         else:
             messagebox.showerror("錯誤", "提交需求單失敗") 
 
+    @timed
     def perform_approve_requirement(self, req_id, window=None):
         """執行審核通過需求單"""
         confirm = messagebox.askyesno("確認審核", "確定要審核通過此需求單嗎？")
@@ -1583,6 +1585,7 @@ class RequirementManager:
             else:
                 messagebox.showerror("錯誤", "審核需求單失敗")
                 
+    @timed
     def perform_reject_requirement(self, req_id, window=None):
         """執行退回需求單"""
         confirm = messagebox.askyesno("確認退回", "確定要退回此需求單嗎？狀態將改回「未完成」")
@@ -1598,6 +1601,7 @@ class RequirementManager:
             else:
                 messagebox.showerror("錯誤", "退回需求單失敗")
                 
+    @timed
     def perform_invalidate_requirement(self, req_id, window=None):
         """執行使需求單失效"""
         confirm = messagebox.askyesno("確認設為失效", "確定要將此需求單設為失效嗎？此操作無法撤銷！")
@@ -1610,6 +1614,7 @@ class RequirementManager:
             else:
                 messagebox.showerror("錯誤", "設為失效失敗") 
 
+    @timed
     def perform_delete_requirement(self, req_id, window=None):
         """執行刪除需求單操作"""
         confirm = messagebox.askyesno("確認刪除", "確定要刪除此需求單嗎？\n刪除後可在垃圾桶中查看或恢復。")
@@ -1678,6 +1683,7 @@ class RequirementManager:
         # 載入已刪除的需求單
         self.load_deleted_requirements()
 
+    @timed
     def load_deleted_requirements(self):
         """載入已刪除的需求單"""
         # 清空現有項目
@@ -1689,24 +1695,22 @@ class RequirementManager:
         
         # 填充樹狀視圖
         for req in requirements:
-            req_id = req[0]
-            title = req[1]
-            priority = "緊急" if req[4] == "urgent" else "普通"
-            deleted_time = req[8][:19] if req[8] else "-"  # 截取日期時間部分
-            assignee = req[6]
-            status = self.get_status_display_text(req[3])
+            priority = "緊急" if req.priority == "urgent" else "普通"
+            deleted_time = req.deleted_at[:19] if req.deleted_at else "-"  # 截取日期時間部分
+            status = self.get_status_display_text(req.status)
             
             # 根據緊急程度設置標籤
             tag = "urgent" if priority == "緊急" else "normal"
             
             self.trash_treeview.insert(
-                "", "end", values=(req_id, title, priority, deleted_time, assignee, status), tags=(tag,)
+                "", "end", values=(req.id, req.title, priority, deleted_time, req.assignee_name, status), tags=(tag,)
             )
             
         # 設置標籤顏色
         self.trash_treeview.tag_configure("urgent", foreground="red")
         self.trash_treeview.tag_configure("normal", foreground="black")
 
+    @timed
     def show_deleted_details(self, event):
         """顯示已刪除需求單的詳情"""
         # 獲取選中的項目
@@ -1717,29 +1721,23 @@ class RequirementManager:
         item = self.trash_treeview.item(selected_item)
         req_id = item['values'][0]
         
-        # 從數據庫獲取所有已刪除的需求單
-        requirements = get_deleted_requirements(self.conn, self.user_id)
-        
-        # 查找對應的需求單
-        requirement = None
-        for req in requirements:
-            if req[0] == req_id:
-                requirement = req
-                break
+        # 按需載入需求單詳情（列表只包含摘要欄位）
+        requirement = get_requirement_detail(self.conn, req_id)
                 
-        if not requirement:
+        if not requirement or requirement.assigner_id != self.user_id or not requirement.is_deleted:
             messagebox.showerror("錯誤", "找不到需求單資訊")
             return
+        self.schedule_detail_prefetch(self.trash_treeview, selected_item)
             
         # 解析需求單資訊
-        title = requirement[1]
-        description = requirement[2]
-        status = self.get_status_display_text(requirement[3])
-        priority = "緊急" if requirement[4] == "urgent" else "普通"
-        created_time = requirement[5][:19] if requirement[5] else "-"  # 截取日期時間部分
-        assignee = requirement[6]
-        deleted_time = requirement[8][:19] if requirement[8] else "-"  # 截取日期時間部分
-        comment = requirement[9] if requirement[9] else ""
+        title = requirement.title
+        description = requirement.description
+        status = self.get_status_display_text(requirement.status)
+        priority = "緊急" if requirement.priority == "urgent" else "普通"
+        created_time = requirement.created_at[:19] if requirement.created_at else "-"  # 截取日期時間部分
+        assignee = requirement.assignee_name
+        deleted_time = requirement.deleted_at[:19] if requirement.deleted_at else "-"  # 截取日期時間部分
+        comment = requirement.comment if requirement.comment else ""
         
         # 創建詳情視窗
         detail_window = tk.Toplevel(self.root)
@@ -1857,6 +1855,7 @@ class RequirementManager:
             command=detail_window.destroy
         ).pack(side=tk.RIGHT)
 
+    @timed
     def perform_restore_requirement(self, req_id, window=None):
         """執行恢復需求單操作"""
         confirm = messagebox.askyesno("確認恢復", "確定要恢復此需求單嗎？")
@@ -1880,7 +1879,7 @@ class RequirementManager:
             staffs = get_all_staff(self.conn)
             
             # 更新下拉選單的值
-            self.staff_combobox['values'] = [f"{staff[1]} (ID:{staff[0]})" for staff in staffs]
+            self.staff_combobox['values'] = [self.AUTO_ASSIGN_OPTION] + [f"{staff.username} (ID:{staff.id})" for staff in staffs]
             
             # 如果之前有選中值，嘗試保持它
             if current_selection:
@@ -1891,6 +1890,7 @@ class RequirementManager:
             messagebox.showerror("錯誤", f"刷新員工列表時發生錯誤: {str(e)}")
             print(f"刷新員工列表錯誤: {str(e)}")
 
+    @timed
     def load_admin_reviewing_requirements(self):
         """載入管理員待審核的需求單數據"""
         # 清空現有數據
@@ -1901,39 +1901,32 @@ class RequirementManager:
         requirements = get_admin_dispatched_requirements(self.conn, self.user_id)
         
         # 篩選狀態為「待審核」的需求單
-        reviewing_requirements = [req for req in requirements if req[3] == 'reviewing']
+        reviewing_requirements = [req for req in requirements if req.status == 'reviewing']
         
         # 添加數據到表格
         for req in reviewing_requirements:
             try:
-                # 處理數據可能缺少欄位的情況
-                if len(req) >= 11:
-                    req_id, title, desc, status, priority, created_at, assignee_name, assignee_id, scheduled_time, comment, completed_at = req
-                else:
-                    # 獲取基本必要數據
-                    req_id, title, desc, status, priority, created_at, assignee_name = req[:7]
-                
                 # 格式化緊急程度
-                priority_text = "緊急" if priority == "urgent" else "普通"
+                priority_text = "緊急" if req.priority == "urgent" else "普通"
                 
                 # 格式化時間
-                if isinstance(created_at, str):
+                if isinstance(req.created_at, str):
                     try:
-                        date_obj = datetime.datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+                        date_obj = datetime.datetime.strptime(req.created_at, "%Y-%m-%d %H:%M:%S")
                         date_text = date_obj.strftime("%Y-%m-%d %H:%M")
                     except ValueError:
-                        date_text = created_at
+                        date_text = req.created_at
                 else:
-                    date_text = created_at
+                    date_text = req.created_at
                     
                 # 插入數據
                 item_id = self.admin_reviewing_treeview.insert(
                     "", tk.END, 
-                    values=(req_id, title, assignee_name, priority_text, date_text)
+                    values=(req.id, req.title, req.assignee_name, priority_text, date_text)
                 )
                 
                 # 根據優先級設置行顏色
-                if priority == 'urgent':
+                if req.priority == 'urgent':
                     self.admin_reviewing_treeview.item(item_id, tags=('urgent',))
                 
             except Exception as e:
@@ -1942,6 +1935,7 @@ class RequirementManager:
         # 設置標籤顏色
         self.admin_reviewing_treeview.tag_configure('urgent', background='#ffecec')
 
+    @timed
     def show_reviewing_requirement_details(self, event):
         """顯示待審核需求單詳情"""
         # 獲取選中的項目
@@ -1952,26 +1946,15 @@ class RequirementManager:
         item = self.admin_reviewing_treeview.item(selected_item)
         req_id = item['values'][0]
         
-        # 獲取需求單詳情
-        requirements = get_admin_dispatched_requirements(self.conn, self.user_id)
-        requirement = None
+        # 按需載入需求單詳情（列表只包含摘要欄位）
+        requirement = get_requirement_detail(self.conn, req_id)
         
-        for req in requirements:
-            if req[0] == req_id:
-                requirement = req
-                break
-        
-        if not requirement:
+        if not requirement or requirement.assigner_id != self.user_id:
             return
+        self.schedule_detail_prefetch(self.admin_reviewing_treeview, selected_item)
             
-        # 處理數據可能缺少欄位的情況
-        if len(requirement) >= 11:
-            req_id, title, description, status, priority, created_at, assignee_name, assignee_id, scheduled_time, comment, completed_at = requirement
-        else:
-            # 獲取基本必要數據
-            req_id, title, description, status, priority, created_at, assignee_name = requirement[:7]
-            comment = ""
-            completed_at = ""
+        comment = requirement.comment or ""
+        completed_at = requirement.completed_at or ""
         
         # 創建詳情對話框
         detail_window = tk.Toplevel(self.root)
@@ -1983,7 +1966,7 @@ class RequirementManager:
         # 標題
         ttk.Label(
             detail_window, 
-            text=f"標題: {title}", 
+            text=f"標題: {requirement.title}", 
             font=('Arial', 12, 'bold')
         ).pack(pady=(20, 10), padx=20, anchor=tk.W)
         
@@ -2008,7 +1991,7 @@ class RequirementManager:
         left_details.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         # 緊急程度
-        priority_text = "緊急" if priority == "urgent" else "普通"
+        priority_text = "緊急" if requirement.priority == "urgent" else "普通"
         priority_label = ttk.Label(
             left_details, 
             text=f"緊急程度: {priority_text}",
@@ -2016,13 +1999,13 @@ class RequirementManager:
         )
         priority_label.pack(pady=2, anchor=tk.W)
         
-        if priority == "urgent":
+        if requirement.priority == "urgent":
             priority_label.configure(foreground="red")
         
         # 發派時間
         ttk.Label(
             left_details, 
-            text=f"發派時間: {created_at}", 
+            text=f"發派時間: {requirement.created_at}", 
             font=('Arial', 10)
         ).pack(pady=2, anchor=tk.W)
         
@@ -2033,7 +2016,7 @@ class RequirementManager:
         # 接收人
         ttk.Label(
             right_details, 
-            text=f"接收人: {assignee_name}", 
+            text=f"接收人: {requirement.assignee_name}", 
             font=('Arial', 10)
         ).pack(pady=2, anchor=tk.W)
         
@@ -2059,7 +2042,7 @@ class RequirementManager:
         content_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=5)
         
         content_text = tk.Text(content_frame, wrap=tk.WORD, height=8)
-        content_text.insert(tk.END, description)
+        content_text.insert(tk.END, requirement.description)
         content_text.config(state=tk.DISABLED)  # 設為只讀
         
         scrollbar = ttk.Scrollbar(content_frame, command=content_text.yview)
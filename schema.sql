@@ -1,3 +1,4 @@
+PRAGMA auto_vacuum = INCREMENTAL;
 CREATE TABLE users (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         username TEXT UNIQUE NOT NULL,
@@ -15,13 +16,109 @@ CREATE TABLE requirements (
                         assignee_id INTEGER NOT NULL,
                         status TEXT NOT NULL DEFAULT 'pending',
                         priority TEXT NOT NULL DEFAULT 'normal',
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime')),
                         scheduled_time TIMESTAMP,
                         is_dispatched INTEGER DEFAULT 1,
                         completed_at TIMESTAMP,
                         comment TEXT,
                         is_deleted INTEGER DEFAULT 0,
                         deleted_at TIMESTAMP,
+                        approved_at TIMESTAMP,
                         FOREIGN KEY (assigner_id) REFERENCES users (id),
                         FOREIGN KEY (assignee_id) REFERENCES users (id)
                     );
+CREATE INDEX idx_requirements_assignee_summary
+                        ON requirements (assignee_id, is_dispatched, is_deleted, created_at,
+                                         status, priority, title, assigner_id, scheduled_time);
+CREATE INDEX idx_requirements_assigner_summary
+                        ON requirements (assigner_id, is_dispatched, is_deleted, created_at,
+                                         assignee_id, status, priority, title, scheduled_time,
+                                         completed_at, deleted_at);
+CREATE TABLE requirement_changes (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        requirement_id INTEGER,
+                        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    );
+CREATE TRIGGER trg_requirements_insert
+                        AFTER INSERT ON requirements
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NEW.id);
+                        END;
+CREATE TRIGGER trg_requirements_update
+                        AFTER UPDATE ON requirements
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NEW.id);
+                        END;
+CREATE TRIGGER trg_requirements_delete
+                        AFTER DELETE ON requirements
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (OLD.id);
+                        END;
+CREATE TRIGGER trg_users_name_update
+                        AFTER UPDATE OF name ON users
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NULL);
+                        END;
+CREATE TRIGGER trg_users_delete
+                        AFTER DELETE ON users
+                        BEGIN
+                            INSERT INTO requirement_changes (requirement_id) VALUES (NULL);
+                        END;
+CREATE TABLE users_version (
+                        id INTEGER PRIMARY KEY CHECK (id = 0),
+                        version INTEGER NOT NULL
+                    );
+CREATE TRIGGER trg_users_version_insert
+                            AFTER INSERT ON users
+                            BEGIN
+                                UPDATE users_version SET version = version + 1 WHERE id = 0;
+                            END;
+CREATE TRIGGER trg_users_version_update
+                            AFTER UPDATE ON users
+                            BEGIN
+                                UPDATE users_version SET version = version + 1 WHERE id = 0;
+                            END;
+CREATE TRIGGER trg_users_version_delete
+                            AFTER DELETE ON users
+                            BEGIN
+                                UPDATE users_version SET version = version + 1 WHERE id = 0;
+                            END;
+CREATE TABLE app_secrets (
+                        name TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    );
+CREATE TABLE login_rate_limits (
+                        key TEXT PRIMARY KEY,
+                        tokens REAL NOT NULL,
+                        updated_at REAL NOT NULL,
+                        locked_until REAL NOT NULL DEFAULT 0
+                    );
+CREATE TABLE metric_totals (
+                        metric TEXT NOT NULL,
+                        sample TEXT NOT NULL,
+                        labels TEXT NOT NULL,
+                        value REAL NOT NULL,
+                        PRIMARY KEY (sample, labels)
+                    );
+CREATE TABLE requirements_archive (
+                        id INTEGER PRIMARY KEY,
+                        title TEXT NOT NULL,
+                        description TEXT NOT NULL,
+                        assigner_id INTEGER NOT NULL,
+                        assignee_id INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        priority TEXT NOT NULL,
+                        created_at TIMESTAMP,
+                        scheduled_time TIMESTAMP,
+                        is_dispatched INTEGER,
+                        completed_at TIMESTAMP,
+                        comment TEXT,
+                        is_deleted INTEGER,
+                        deleted_at TIMESTAMP,
+                        approved_at TIMESTAMP,
+                        archived_at TIMESTAMP NOT NULL
+                    );
+CREATE INDEX idx_requirements_archive_assignee
+                        ON requirements_archive (assignee_id, created_at);
+CREATE INDEX idx_requirements_archive_assigner
+                        ON requirements_archive (assigner_id, created_at);
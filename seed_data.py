@@ -0,0 +1,238 @@
+"""
+測試資料產生器
+
+產生大量使用者與需求單，作為效能測試與負載模擬的資料集：
+- 狀態、優先級與員工工作量依接近正式環境的比例分布
+- 需求單描述長度不一，包含預約發派、已提交、已完成與已刪除的需求單
+- 以 executemany 分批寫入，寫入期間使用 bulk-load 設定檔，
+  並暫時移除新增觸發器；寫入量不少於現有資料時也暫時移除列表索引，寫入完成後再一次重建
+
+產生的使用者名稱都以指定前綴開頭（預設 seed_），所有測試使用者共用同一組密碼。
+"""
+
+import random
+import time
+
+import user_cache
+from credentials import hash_password
+from database import apply_pragmas, create_tables
+
+DEFAULT_PREFIX = 'seed'
+DEFAULT_PASSWORD = 'seed1234'
+
+# 需求單狀態分布（已發派的需求單）
+STATUS_WEIGHTS = (
+    ('completed', 0.45),
+    ('pending', 0.30),
+    ('submitted', 0.15),
+    ('invalid', 0.10),
+)
+URGENT_RATE = 0.2      # 緊急需求單比例
+SCHEDULED_RATE = 0.03  # 尚未發派的預約需求單比例
+DELETED_RATE = 0.04    # 已刪除（在垃圾桶中）的需求單比例
+
+# 寫入期間暫時移除的索引與觸發器，寫入完成後由 create_tables() 重建
+# （索引只在寫入量不少於現有資料時移除，少量追加時重建索引反而較慢）
+_BULK_INDEXES = ('idx_requirements_assignee_summary', 'idx_requirements_assigner_summary')
+_BULK_TRIGGERS = ('trg_requirements_insert',)
+
+_TITLE_SUBJECTS = ('月報', '客戶資料', '庫存盤點', '系統權限', '採購單', '合約', '會議記錄',
+                   '報價單', '出貨排程', '員工訓練', '網站內容', '帳務核對', '設備維修', '年度預算')
+_TITLE_ACTIONS = ('整理', '更新', '審閱', '建立', '確認', '彙整', '修正', '追蹤', '歸檔', '匯出')
+_SENTENCES = (
+    '請依照上週會議的結論完成相關調整，並在完成後回報處理結果。',
+    '資料來源以系統匯出的最新版本為準，若有缺漏請先與負責同仁確認。',
+    '此項目會影響下個月的排程，請優先處理並注意與其他部門的協調。',
+    '完成後請將文件上傳至共用資料夾，並在備註中註明版本與修改內容。',
+    '客戶反映目前的流程過於繁瑣，請評估是否可以簡化步驟。',
+    '如需額外的權限或資源，請直接聯繫管理員申請。',
+    '請參考附件中的範本格式，欄位名稱與順序需保持一致。',
+    '本需求單為例行作業，處理方式與上一期相同。',
+    'Please double-check the figures against the exported report before submitting.',
+    '若預計無法在期限內完成，請提前告知以便重新安排。',
+)
+_COMMENTS = ('已完成，詳見共用資料夾。', '已依要求修改完畢。', '處理完成，請審核。',
+             '資料已更新並通知相關人員。', 'Done, see attached file.')
+
+_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def _format_time(epoch):
+    return time.strftime(_TIME_FORMAT, time.localtime(epoch))
+
+def _description_pool(rng, size=256):
+    """預先產生一批長度不一（約 30 到 1500 字）的描述，寫入時重複使用"""
+    pool = []
+    for _ in range(size):
+        count = max(1, int(rng.lognormvariate(2.0, 0.9)))
+        pool.append(''.join(rng.choice(_SENTENCES) for _ in range(min(count, 50))))
+    return pool
+
+def seed_users(conn, staff_count, admin_count=1, prefix=DEFAULT_PREFIX, password=DEFAULT_PASSWORD):
+    """建立測試使用者（已存在的使用者名稱會沿用）
+
+    密碼只雜湊一次供所有測試使用者共用，避免大量使用者時花費數分鐘計算雜湊。
+
+    Args:
+        conn: 數據庫連接
+        staff_count: 員工數量
+        admin_count: 管理員數量
+        prefix: 使用者名稱前綴
+        password: 所有測試使用者的密碼
+
+    Returns:
+        tuple: (管理員ID列表, 員工ID列表)
+    """
+    password_hash = hash_password(password)
+    rows = [(f"{prefix}_admin{i:04d}", password_hash, f"測試管理員{i}",
+             f"{prefix}_admin{i:04d}@example.com", 'admin') for i in range(admin_count)]
+    rows += [(f"{prefix}_staff{i:06d}", password_hash, f"測試員工{i}",
+              f"{prefix}_staff{i:06d}@example.com", 'staff') for i in range(staff_count)]
+    conn.executemany(
+        "INSERT OR IGNORE INTO users (username, password, name, email, role) VALUES (?, ?, ?, ?, ?)",
+        rows
+    )
+    conn.commit()
+    user_cache.invalidate()
+
+    ids = dict(conn.execute(
+        "SELECT username, id FROM users WHERE username GLOB ?", (f"{prefix}_*",)
+    ).fetchall())
+    admin_ids = [ids[row[0]] for row in rows[:admin_count]]
+    staff_ids = [ids[row[0]] for row in rows[admin_count:]]
+    return admin_ids, staff_ids
+
+def _requirement_rows(rng, start, count, total, admin_ids, staff_ids, staff_weights,
+                      descriptions, now, span):
+    """產生一批需求單資料列，建立時間隨序號遞增，分布在 span 秒內"""
+    statuses = rng.choices([s for s, _ in STATUS_WEIGHTS], [w for _, w in STATUS_WEIGHTS], k=count)
+    assignees = rng.choices(staff_ids, cum_weights=staff_weights, k=count)
+    random_value = rng.random
+    rows = []
+    for offset in range(count):
+        i = start + offset
+        created = now - span + span * (i + random_value()) / total
+        title = f"{rng.choice(_TITLE_SUBJECTS)}{rng.choice(_TITLE_ACTIONS)} #{i + 1}"
+        priority = 'urgent' if random_value() < URGENT_RATE else 'normal'
+        status = statuses[offset]
+        scheduled_time = completed_at = approved_at = comment = deleted_at = None
+        is_dispatched = 1
+        is_deleted = 0
+
+        if random_value() < SCHEDULED_RATE:
+            # 預約發派：建立於近期，預約時間在未來 1 到 30 天
+            status = 'not_dispatched'
+            is_dispatched = 0
+            created = now - random_value() * 7 * 86400
+            scheduled_time = _format_time(now + 3600 + random_value() * 30 * 86400)
+        elif random_value() < 0.1:
+            # 已到期發派的預約需求單，發派時建立時間被設為預約時間
+            scheduled_time = _format_time(created)
+
+        if status in ('submitted', 'completed'):
+            done = min(now, created + rng.expovariate(1 / (2 * 86400)))
+            completed_at = _format_time(done)
+            comment = rng.choice(_COMMENTS)
+            if status == 'completed':
+                approved_at = _format_time(min(now, done + rng.expovariate(1 / (86400 / 2))))
+
+        if is_dispatched and random_value() < DELETED_RATE:
+            is_deleted = 1
+            deleted_at = _format_time(min(now, created + random_value() * 14 * 86400))
+
+        rows.append((title, rng.choice(descriptions), rng.choice(admin_ids), assignees[offset],
+                     status, priority, _format_time(created), scheduled_time, is_dispatched,
+                     completed_at, comment, is_deleted, deleted_at, approved_at))
+    return rows
+
+def seed_requirements(conn, count, admin_ids, staff_ids, days=365, batch_size=50000,
+                      seed=None, progress=None):
+    """產生測試需求單
+
+    寫入期間使用 bulk-load 設定檔，並暫時移除新增觸發器與（大量寫入時）列表索引；
+    完成後（包括中途失敗）重建索引與觸發器，並寫入一筆影響所有需求單的變更記錄，
+    讓已開啟的畫面與快取重新載入。
+
+    Args:
+        conn: 數據庫連接
+        count: 需求單數量
+        admin_ids: 指派者（管理員）ID列表
+        staff_ids: 接收者（員工）ID列表
+        days: 建立時間分布的天數（從現在往前）
+        batch_size: 每次提交的筆數
+        seed: 亂數種子，相同種子產生相同的資料
+        progress: 進度回呼函數，參數為 (已寫入筆數, 總筆數)
+
+    Returns:
+        int: 寫入的需求單數量
+    """
+    if not admin_ids or not staff_ids:
+        raise ValueError("至少需要一位管理員與一位員工")
+    rng = random.Random(seed)
+    descriptions = _description_pool(rng)
+    # 員工工作量不平均：少數員工負責大部分需求單
+    staff_weights = []
+    total_weight = 0.0
+    for rank in range(len(staff_ids)):
+        total_weight += 1.0 / (rank + 1) ** 0.8
+        staff_weights.append(total_weight)
+    now = time.time()
+    span = days * 86400
+
+    existing = conn.execute("SELECT COUNT(*) FROM requirements").fetchone()[0]
+
+    apply_pragmas(conn, profile='bulk-load', pragmas={})
+    written = 0
+    try:
+        if count >= existing:
+            for name in _BULK_INDEXES:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+        for name in _BULK_TRIGGERS:
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.commit()
+
+        while written < count:
+            size = min(batch_size, count - written)
+            rows = _requirement_rows(rng, written, size, count, admin_ids, staff_ids,
+                                     staff_weights, descriptions, now, span)
+            conn.executemany(
+                """INSERT INTO requirements
+                   (title, description, assigner_id, assignee_id, status, priority, created_at,
+                    scheduled_time, is_dispatched, completed_at, comment, is_deleted, deleted_at,
+                    approved_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            conn.commit()
+            written += size
+            if progress:
+                progress(written, count)
+    finally:
+        conn.rollback()
+        create_tables(conn)
+        conn.execute("INSERT INTO requirement_changes (requirement_id) VALUES (NULL)")
+        conn.commit()
+        apply_pragmas(conn)
+    return written
+
+def seed_database(conn, users, requirements, admins=1, prefix=DEFAULT_PREFIX,
+                  password=DEFAULT_PASSWORD, days=365, batch_size=50000, seed=None, progress=None):
+    """產生測試使用者與需求單
+
+    Args:
+        conn: 數據庫連接
+        users: 員工數量
+        requirements: 需求單數量
+        admins: 管理員數量
+        其餘參數見 seed_users 與 seed_requirements
+
+    Returns:
+        dict: 管理員ID、員工ID與寫入的需求單數量
+    """
+    create_tables(conn)
+    admin_ids, staff_ids = seed_users(conn, users, admins, prefix, password)
+    written = 0
+    if requirements:
+        written = seed_requirements(conn, requirements, admin_ids, staff_ids, days,
+                                    batch_size, seed, progress)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return {'admin_ids': admin_ids, 'staff_ids': staff_ids, 'requirements': written}
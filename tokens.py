@@ -0,0 +1,123 @@
+"""
+會話權杖
+
+權杖格式為 <內容>.<簽章>，兩段皆為不含填充的 base64url：
+內容是使用者資料與有效期限的 JSON，簽章是以系統金鑰計算的 HMAC-SHA256。
+驗證只需要一次 HMAC 與一次 JSON 解析，不必查詢使用者資料；
+CLI 的會話文件與 API 伺服器的 Bearer 認證使用相同的權杖。
+
+簽章金鑰保存在資料庫的 app_secrets 表格，第一次使用時隨機產生，
+因此同一個資料庫的 CLI 與 API 伺服器可以互相驗證對方簽發的權杖。
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import secrets
+import sqlite3
+import threading
+import time
+
+from database import create_tables
+
+SECRET_NAME = 'session_token_key'
+
+_secret_lock = threading.Lock()
+_secret_cache = {}  # 金鑰名稱 -> 金鑰
+
+def get_token_secret(conn, create=True):
+    """獲取權杖簽章金鑰（本進程只查詢一次）
+
+    Args:
+        conn: 數據庫連接
+        create: 金鑰不存在時是否建立（包含舊版資料庫缺少的表格）；
+                只驗證權杖時應為 False，避免在錯誤的資料庫中產生新的金鑰
+
+    Returns:
+        bytes: 簽章金鑰，create 為 False 且金鑰不存在時返回 None
+    """
+    with _secret_lock:
+        secret = _secret_cache.get(SECRET_NAME)
+        if secret is not None:
+            return secret
+        query = "SELECT value FROM app_secrets WHERE name = ?"
+        try:
+            row = conn.execute(query, (SECRET_NAME,)).fetchone()
+        except sqlite3.OperationalError:
+            # 舊版資料庫沒有 app_secrets 表格
+            if not create:
+                return None
+            create_tables(conn)
+            row = conn.execute(query, (SECRET_NAME,)).fetchone()
+        if row is None:
+            if not create:
+                return None
+            # 多個進程同時產生時以第一個寫入的為準
+            conn.execute("INSERT OR IGNORE INTO app_secrets (name, value) VALUES (?, ?)",
+                         (SECRET_NAME, secrets.token_hex(32)))
+            conn.commit()
+            row = conn.execute(query, (SECRET_NAME,)).fetchone()
+        secret = bytes.fromhex(row[0])
+        _secret_cache[SECRET_NAME] = secret
+        return secret
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def user_claims(user):
+    """由使用者資料建立權杖內容"""
+    return {
+        'uid': user.id,
+        'usr': user.username,
+        'name': user.name,
+        'email': user.email,
+        'role': user.role,
+    }
+
+def issue_token(secret, claims, ttl, issued_at=None):
+    """簽發權杖
+
+    Args:
+        secret: 簽章金鑰
+        claims: 權杖內容（通常由 user_claims 建立）
+        ttl: 有效秒數（從 issued_at 起算）
+        issued_at: 簽發時間 (epoch 秒)，None 表示現在
+
+    Returns:
+        tuple: (權杖字串, 權杖內容)，內容包含 iat 與 exp
+    """
+    issued_at = int(time.time() if issued_at is None else issued_at)
+    payload = dict(claims, iat=issued_at, exp=issued_at + int(ttl))
+    body = _b64encode(json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8'))
+    signature = hmac.new(secret, body.encode('ascii'), hashlib.sha256).digest()
+    return f"{body}.{_b64encode(signature)}", payload
+
+def verify_token(secret, token, now=None):
+    """驗證權杖
+
+    Args:
+        secret: 簽章金鑰
+        token: 權杖字串
+        now: 目前時間 (epoch 秒)，None 表示現在
+
+    Returns:
+        dict: 權杖內容；簽章錯誤、格式錯誤或已過期時返回 None
+    """
+    body, _, signature = token.strip().partition('.')
+    if not body or not signature:
+        return None
+    try:
+        expected = hmac.new(secret, body.encode('ascii'), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            return None
+        payload = json.loads(_b64decode(body).decode('utf-8'))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get('exp', 0) <= (time.time() if now is None else now):
+        return None
+    return payload
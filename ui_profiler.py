@@ -0,0 +1,158 @@
+"""
+GUI 事件迴圈延遲紀錄
+
+量測 Tk 介面被阻塞的時間，找出哪些處理函數讓員工的大量列表凍結：
+
+- 心跳：以 root.after() 每 50 毫秒排程一次回呼，實際觸發時間比預期晚的部分即為事件迴圈停頓
+  （處理函數執行、視窗繪製等都會延後心跳）；超過門檻的停頓連同期間執行的處理函數印出
+- 處理函數：以 @timed 裝飾的列表載入、詳情視窗與修改操作記錄每次的執行時間
+- 結束時在標準錯誤輸出停頓與各處理函數的次數、p50、p95 與最大值
+
+以環境變量啟用（預設關閉，未啟用時 @timed 只多一次判斷）：
+    REQMGR_UI_PROFILE=1            啟用
+    REQMGR_UI_STALL_MS=100         停頓門檻（毫秒）
+    REQMGR_UI_PROFILE_LOG=ui.log   另外將停頓紀錄附加到文件
+    REQMGR_UI_OVERLAY=1            在主視窗右下角顯示最近與最大停頓
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+
+HEARTBEAT_MS = 50
+DEFAULT_STALL_MS = 100
+
+def _env_stall_ms():
+    """讀取停頓門檻，格式錯誤或小於 0 時警告並使用預設值（模組載入時不可拋出例外）"""
+    value = os.getenv('REQMGR_UI_STALL_MS')
+    if not value:
+        return float(DEFAULT_STALL_MS)
+    try:
+        stall_ms = float(value)
+    except ValueError:
+        stall_ms = -1
+    if not stall_ms >= 0:
+        print(f"警告: 環境變量 REQMGR_UI_STALL_MS={value!r} 不是有效的毫秒數，使用預設值 {DEFAULT_STALL_MS}",
+              file=sys.stderr)
+        return float(DEFAULT_STALL_MS)
+    return stall_ms
+
+_settings = {
+    'enabled': os.getenv('REQMGR_UI_PROFILE', '') not in ('', '0'),
+    'stall_ms': _env_stall_ms(),
+    'log': os.getenv('REQMGR_UI_PROFILE_LOG') or None,
+    'overlay': os.getenv('REQMGR_UI_OVERLAY', '') not in ('', '0'),
+}
+
+_lock = threading.Lock()
+_handlers = {}  # 處理函數名稱 -> 每次執行的秒數列表
+_stalls = []  # 超過心跳間隔的停頓秒數
+_recent = []  # 上次心跳以來完成的 (處理函數名稱, 秒數)
+_heartbeat = {'root': None, 'last': None, 'beats': 0, 'label': None, 'max': 0.0}
+
+def is_enabled():
+    """GUI 延遲紀錄是否啟用"""
+    return _settings['enabled']
+
+def timed(func):
+    """記錄處理函數執行時間的裝飾器（未啟用時直接呼叫）"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _settings['enabled']:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with _lock:
+                _handlers.setdefault(name, []).append(elapsed)
+                _recent.append((name, elapsed))
+    return wrapper
+
+def _log(message):
+    print(message, file=sys.stderr)
+    if _settings['log']:
+        try:
+            with open(_settings['log'], 'a', encoding='utf-8') as f:
+                f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} {message}\n")
+        except OSError as e:
+            print(f"無法寫入介面延遲紀錄: {e}", file=sys.stderr)
+
+def _beat():
+    root = _heartbeat['root']
+    if root is None:
+        return
+    now = time.perf_counter()
+    stall = now - _heartbeat['last'] - HEARTBEAT_MS / 1000
+    _heartbeat['last'] = now
+    _heartbeat['beats'] += 1
+    with _lock:
+        recent = _recent[:]
+        _recent.clear()
+        if stall > 0.001:
+            _stalls.append(stall)
+    if stall * 1000 >= _settings['stall_ms']:
+        handlers = '，'.join(f"{name} {elapsed * 1000:.0f}ms" for name, elapsed in recent)
+        _log(f"介面停頓 {stall * 1000:.0f}ms（期間執行: {handlers or '無紀錄的處理函數'}）")
+    _heartbeat['max'] = max(_heartbeat['max'], stall)
+    label = _heartbeat['label']
+    if label is not None:
+        label.config(text=f"停頓 {max(stall, 0) * 1000:.0f}ms / 最大 {_heartbeat['max'] * 1000:.0f}ms")
+    try:
+        root.after(HEARTBEAT_MS, _beat)
+    except Exception:
+        # 視窗已關閉
+        _heartbeat['root'] = None
+
+def start_heartbeat(root):
+    """啟用時開始以心跳量測事件迴圈停頓，並依設定顯示右下角的停頓標籤
+
+    Args:
+        root: tkinter 根視窗
+    """
+    if not _settings['enabled'] or _heartbeat['root'] is not None:
+        return
+    _heartbeat['root'] = root
+    _heartbeat['last'] = time.perf_counter()
+    if _settings['overlay']:
+        import tkinter as tk
+        label = tk.Label(root, font=('Arial', 8), fg='white', bg='#555555')
+        label.place(relx=1.0, rely=1.0, anchor='se')
+        _heartbeat['label'] = label
+    root.after(HEARTBEAT_MS, _beat)
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _summary_row(name, values):
+    values = sorted(values)
+    return (f"{len(values):>7} {sum(values) * 1000:>10.1f} {_percentile(values, 0.5) * 1000:>9.1f} "
+            f"{_percentile(values, 0.95) * 1000:>9.1f} {values[-1] * 1000:>9.1f}  {name}")
+
+def format_report():
+    """將停頓與處理函數的執行時間格式化為文字報表（依最大值排列）"""
+    with _lock:
+        stalls = list(_stalls)
+        handlers = {name: list(values) for name, values in _handlers.items()}
+    threshold = _settings['stall_ms'] / 1000
+    lines = [f"心跳 {_heartbeat['beats']} 次，停頓超過 {_settings['stall_ms']:g}ms: "
+             f"{sum(1 for stall in stalls if stall >= threshold)} 次，"
+             f"合計 {sum(stall for stall in stalls if stall >= threshold):.2f} 秒",
+             f"{'次數':>7} {'總計(ms)':>10} {'p50(ms)':>9} {'p95(ms)':>9} {'最大(ms)':>9}  項目"]
+    if stalls:
+        lines.append(_summary_row("(事件迴圈停頓)", stalls))
+    for name, values in sorted(handlers.items(), key=lambda item: max(item[1]), reverse=True):
+        lines.append(_summary_row(name, values))
+    return '\n'.join(lines)
+
+@atexit.register
+def _report_at_exit():
+    if _settings['enabled'] and (_heartbeat['beats'] or _handlers):
+        print(f"\n介面延遲紀錄（進程 {os.getpid()}）:\n{format_report()}", file=sys.stderr)
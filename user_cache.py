@@ -0,0 +1,126 @@
+"""
+使用者目錄快取
+
+使用者表格很小，整張載入記憶體後以 ID 與使用者名稱建立索引，
+讓登入驗證、員工下拉選單以及需求單列表的姓名解析都不必重複查詢資料庫。
+
+快取在以下情況失效：
+- 本進程透過 database.add_user / create_user / update_user / delete_user 修改使用者
+- 其他連接（例如另一個 CLI 進程）修改了使用者表格，由觸發器遞增的 users_version 計數偵測；
+  需求單的修改不會讓快取失效（舊版資料庫沒有此表格時改用 PRAGMA data_version）
+"""
+
+import threading
+from collections import OrderedDict
+from sqlite3 import Error, OperationalError
+
+from models import UserRecord, record_factory
+
+# 同時追蹤版本的連接數上限（例如 API 伺服器的每個工作執行緒各有一個連接）
+MAX_TRACKED_CONNECTIONS = 16
+
+_user_factory = record_factory(UserRecord)
+_lock = threading.Lock()
+_state = {
+    # 快取確認有效時的版本：None -> users_version 計數；舊版資料庫為 連接 -> 該連接的 data_version
+    'versions': OrderedDict(),
+    'users': None,         # 依 ID 排序的使用者列表
+    'by_id': {},
+    'by_username': {},
+    'names': {},
+}
+
+def invalidate():
+    """使快取失效，下次查詢時重新載入使用者表格"""
+    with _lock:
+        _state['users'] = None
+        _state['versions'].clear()
+
+def _ensure_loaded(conn):
+    """確認快取與資料庫一致，必要時重新載入
+
+    users_version 的計數只在使用者表格被修改時遞增，所有連接看到的數值一致，
+    因此 API 伺服器等大量寫入需求單的情況下不會重新載入。
+    舊版資料庫沒有此表格時改用 PRAGMA data_version：其他連接提交任何修改後都會改變，
+    而且數值只在同一個連接上可比較，因此每個連接各自記錄上次確認時的版本。
+    """
+    try:
+        key = None
+        version = conn.execute("SELECT version FROM users_version WHERE id = 0").fetchone()
+    except OperationalError:
+        # 舊版資料庫（執行 create_tables 後建立 users_version）
+        key = conn
+        version = conn.execute("PRAGMA data_version").fetchone()
+    versions = _state['versions']
+    if _state['users'] is not None and version is not None and versions.get(key) == version[0]:
+        versions.move_to_end(key)
+        return
+
+    cursor = conn.cursor()
+    cursor.row_factory = _user_factory
+    cursor.execute("SELECT id, username, password, name, email, role FROM users ORDER BY id")
+    users = cursor.fetchall()
+
+    if version is not None:
+        versions[key] = version[0]
+        versions.move_to_end(key)
+    while len(versions) > MAX_TRACKED_CONNECTIONS:
+        versions.popitem(last=False)
+    _state['users'] = users
+    _state['by_id'] = {user.id: user for user in users}
+    _state['by_username'] = {user.username: user for user in users}
+    _state['names'] = {user.id: user.name for user in users}
+
+def get_user_by_id(conn, user_id):
+    """根據用戶ID獲取用戶資料"""
+    try:
+        with _lock:
+            _ensure_loaded(conn)
+            return _state['by_id'].get(user_id)
+    except Error as e:
+        print(f"獲取用戶資料時發生錯誤: {e}")
+        return None
+
+def get_user_by_username(conn, username):
+    """根據使用者名稱獲取使用者資料"""
+    try:
+        with _lock:
+            _ensure_loaded(conn)
+            return _state['by_username'].get(username)
+    except Error as e:
+        print(f"獲取用戶資料時發生錯誤: {e}")
+        return None
+
+def get_users(conn, role=None):
+    """獲取使用者列表（依ID排序）
+
+    Args:
+        conn: 資料庫連接
+        role: 只返回指定角色的使用者，None 表示全部
+
+    Returns:
+        list: 使用者資料列表
+    """
+    try:
+        with _lock:
+            _ensure_loaded(conn)
+            if role is None:
+                return list(_state['users'])
+            return [user for user in _state['users'] if user.role == role]
+    except Error as e:
+        print(f"獲取用戶列表時發生錯誤: {e}")
+        return []
+
+def get_user_names(conn):
+    """獲取用戶ID到姓名的對照表，供列表查詢在記憶體中解析姓名
+
+    Returns:
+        dict: {用戶ID: 姓名}（共用的快取物件，請勿修改）
+    """
+    try:
+        with _lock:
+            _ensure_loaded(conn)
+            return _state['names']
+    except Error as e:
+        print(f"獲取用戶列表時發生錯誤: {e}")
+        return {}
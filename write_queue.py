@@ -0,0 +1,166 @@
+"""
+單一寫入執行緒與群組提交
+
+所有修改操作排入同一個佇列，由一個寫入執行緒依序執行。
+執行緒取出第一個操作後，會在延遲上限內繼續收集後續到達的操作
+（最多 max_batch 個），全部在同一個交易中執行後只提交一次，
+讓大量並行的小型寫入共用一次磁碟同步，也不必互相競爭 SQLite 的寫入鎖。
+
+每個操作在自己的 SAVEPOINT 中執行：操作拋出例外時只回滾該操作，
+同一批的其他操作照常提交。呼叫者取得的 Future 在交易提交成功後才完成。
+
+用法:
+    writer = WriterService()
+    future = writer.submit(database.submit_requirement, req_id, "已完成")
+    ok = future.result()
+    writer.close()
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sqlite3 import Error
+
+import database
+
+MAX_BATCH = 128     # 每個交易最多合併的操作數量
+MAX_DELAY = 0.002   # 收集同一批操作的延遲上限（秒）
+
+_STOP = object()
+
+class WriterService:
+    """單一寫入執行緒
+
+    Args:
+        max_batch: 每個交易最多合併的操作數量
+        max_delay: 第一個操作到達後，等待更多操作加入同一批的時間上限（秒）
+        connect: 建立資料庫連接的函數
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_delay=MAX_DELAY,
+                 connect=database.create_connection):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._connect = connect
+        self._queue = queue.Queue()
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._stats = {'operations': 0, 'batches': 0, 'failed': 0}
+        self._thread = threading.Thread(target=self._run, name='reqmgr-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """排入一個修改操作
+
+        修改函數會以 commit=False 呼叫，由寫入執行緒在整批操作完成後統一提交。
+        修改函數發生資料庫錯誤時須拋出例外，寫入執行緒才會只回滾此操作並把例外交給 Future。
+
+        Args:
+            func: 以資料庫連接為第一個參數、接受 commit 參數的修改函數
+            *args, **kwargs: 修改函數的其餘參數
+
+        Returns:
+            Future: 交易提交後完成，結果為修改函數的返回值
+        """
+        if self._closed:
+            raise RuntimeError("寫入服務已關閉")
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func, *args, **kwargs):
+        """排入一個修改操作並等待結果"""
+        return self.submit(func, *args, **kwargs).result()
+
+    def stats(self):
+        """返回累計的操作數量、交易數量與失敗操作數量"""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self):
+        """等待排隊中的操作完成後停止寫入執行緒"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    # ---- 寫入執行緒 ----
+
+    def _collect(self, first):
+        """以第一個操作開始收集一批操作，返回 (操作列表, 是否收到停止訊號)"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                batch, stopping = self._collect(item)
+                self._run_batch(conn, batch)
+                if stopping:
+                    break
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _run_batch(self, conn, batch):
+        """在同一個交易中執行一批操作，提交後才設定各操作的結果"""
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        if conn is None:
+            for future, _, _, _ in batch:
+                future.set_exception(Error("無法連接到資料庫"))
+            return
+
+        results = []
+        try:
+            conn.execute("BEGIN")
+            for future, func, args, kwargs in batch:
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    result = func(conn, *args, commit=False, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    results.append((None, e))
+                else:
+                    results.append((result, None))
+                conn.execute("RELEASE write_op")
+            conn.commit()
+        except Error as e:
+            print(f"提交資料庫交易時發生錯誤: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            results = [(None, e)] * len(batch)
+
+        failed = 0
+        for (future, _, _, _), (result, error) in zip(batch, results):
+            if error is not None:
+                failed += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        with self._stats_lock:
+            self._stats['operations'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['failed'] += failed